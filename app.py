@@ -15,6 +15,13 @@ try:
 except ImportError:
     AGGRID_AVAILABLE = False
 
+try:
+    from svglib.svglib import svg2rlg
+    from reportlab.graphics import renderPDF
+    SVG2PDF_AVAILABLE = True
+except ImportError:
+    SVG2PDF_AVAILABLE = False
+
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 # Импорт системы постоянного хранения
@@ -455,6 +462,34 @@ def get_storage():
 
 storage = get_storage()
 
+
+def add_to_history(plotter, name, graph_type):
+    """
+    Рендерит график в SVG (без временных файлов), добавляет его в историю
+    сессии и сохраняет на диск. PDF не рендерится: он делается из SVG
+    только по кнопке в галерее (svg_to_pdf).
+    """
+    svg_data = plotter.render(['svg'])['svg']
+    timestamp_str = datetime.now().strftime('%H:%M:%S')
+    st.session_state.graph_history.append({
+        'name': name,
+        'timestamp': timestamp_str,
+        'type': graph_type,
+        'svg_data': svg_data
+    })
+    # Сохраняем на диск для постоянного хранения
+    storage.save_graph(name, timestamp_str, graph_type, svg_data)
+    return svg_data
+
+
+def svg_to_pdf(svg_data):
+    """PDF из SVG графика (svglib + reportlab, как в convert_svg_to_pdf.py)"""
+    drawing = svg2rlg(io.BytesIO(svg_data))
+    if drawing is None:
+        raise ValueError("Could not parse SVG for PDF conversion")
+    return renderPDF.drawToString(drawing)
+
+
 # Session state с автозагрузкой из постоянного хранилища
 if 'data_loaded' not in st.session_state:
     st.session_state.data_loaded = False
@@ -548,6 +583,22 @@ if mode == "Мои графики":
                                     width="stretch",
                                     key=f"dl_{i}_{j}"
                                 )
+                                if 'pdf_data' in graph:
+                                    st.download_button(
+                                        "Скачать PDF",
+                                        graph['pdf_data'],
+                                        file_name=f"{graph['name']}.pdf",
+                                        mime="application/pdf",
+                                        width="stretch",
+                                        key=f"dl_pdf_{i}_{j}"
+                                    )
+                                elif SVG2PDF_AVAILABLE and st.button("Подготовить PDF", width="stretch", key=f"pdf_{i}_{j}"):
+                                    # PDF - только по запросу, сохраняется в записи истории
+                                    try:
+                                        graph['pdf_data'] = svg_to_pdf(graph['svg_data'])
+                                        st.rerun()
+                                    except Exception as e:
+                                        st.error(f"Ошибка PDF: {str(e)}")
                             with col_b:
                                 # PNG-кнопка через JS canvas (без доп. зависимостей)
                                 _svg_b64_safe = base64.b64encode(graph['svg_data']).decode()
@@ -1603,22 +1654,7 @@ function(params) {
                         else:
                             plotter.set_axes(xlabel=xlabel, ylabel=ylabel, grid=True)
 
-                        # Сохраняем в SVG
-                        with tempfile.NamedTemporaryFile(delete=False, suffix='.svg') as tmp:
-                            plotter.save(tmp.name)
-                            with open(tmp.name, 'rb') as f:
-                                svg_data = f.read()
-
-                            timestamp_str = datetime.now().strftime('%H:%M:%S')
-                            st.session_state.graph_history.append({
-                                'name': output_file,
-                                'timestamp': timestamp_str,
-                                'type': graph_type,
-                                'svg_data': svg_data
-                            })
-                            # Сохраняем на диск для постоянного хранения
-                            storage.save_graph(output_file, timestamp_str, graph_type, svg_data)
-                            os.unlink(tmp.name)
+                        add_to_history(plotter, output_file, graph_type)
 
                         success_count += 1
 
@@ -1755,22 +1791,7 @@ else:
                         spines=spines_config
                     )
 
-                    with tempfile.NamedTemporaryFile(delete=False, suffix='.svg') as tmp:
-                        plotter.save(tmp.name)
-                        with open(tmp.name, 'rb') as f:
-                            svg_data = f.read()
-
-                        timestamp_str = datetime.now().strftime('%H:%M:%S')
-                        st.session_state.graph_history.append({
-                            'name': filename,
-                            'timestamp': timestamp_str,
-                            'type': 'function',
-                            'svg_data': svg_data
-                        })
-                        # Сохраняем на диск для постоянного хранения
-                        storage.save_graph(filename, timestamp_str, 'function', svg_data)
-                        st.session_state.current_graph = svg_data
-                        os.unlink(tmp.name)
+                    st.session_state.current_graph = add_to_history(plotter, filename, 'function')
 
                 st.session_state.last_built_tab = "function"
                 st.session_state.pop('save_name_func_inline', None)
@@ -1939,22 +1960,7 @@ else:
                     else:
                         plotter.set_axes(xlabel=xlabel_ode, ylabel=ylabel_ode, grid=True)
 
-                    with tempfile.NamedTemporaryFile(delete=False, suffix='.svg') as tmp:
-                        plotter.save(tmp.name)
-                        with open(tmp.name, 'rb') as f:
-                            svg_data = f.read()
-
-                        timestamp_str = datetime.now().strftime('%H:%M:%S')
-                        st.session_state.graph_history.append({
-                            'name': filename_ode,
-                            'timestamp': timestamp_str,
-                            'type': 'ode',
-                            'svg_data': svg_data
-                        })
-                        # Сохраняем на диск для постоянного хранения
-                        storage.save_graph(filename_ode, timestamp_str, 'ode', svg_data)
-                        st.session_state.current_graph = svg_data
-                        os.unlink(tmp.name)
+                    st.session_state.current_graph = add_to_history(plotter, filename_ode, 'ode')
 
                 st.session_state.last_built_tab = "ode"
                 st.session_state.pop('save_name_ode_inline', None)
@@ -2085,22 +2091,7 @@ else:
                         spines=spines_config_pp
                     )
 
-                    with tempfile.NamedTemporaryFile(delete=False, suffix='.svg') as tmp:
-                        plotter.save(tmp.name)
-                        with open(tmp.name, 'rb') as f:
-                            svg_data = f.read()
-
-                        timestamp_str = datetime.now().strftime('%H:%M:%S')
-                        st.session_state.graph_history.append({
-                            'name': filename_pp,
-                            'timestamp': timestamp_str,
-                            'type': 'phase',
-                            'svg_data': svg_data
-                        })
-                        # Сохраняем на диск для постоянного хранения
-                        storage.save_graph(filename_pp, timestamp_str, 'phase', svg_data)
-                        st.session_state.current_graph = svg_data
-                        os.unlink(tmp.name)
+                    st.session_state.current_graph = add_to_history(plotter, filename_pp, 'phase')
 
                 st.session_state.last_built_tab = "phase"
                 st.session_state.pop('save_name_pp_inline', None)
@@ -1,5 +1,7 @@
 import matplotlib.pyplot as plt  # как будет видно ниже, очень удобно использовать сокращение переменных.
 import numpy as np               # тоже сократим для красоты
+from utils.decimation import parse_decimation, decimation_indices
+from utils.stage_timer import stage
 
 
 # На всякий случай комментарий:
@@ -27,6 +29,47 @@ class GraphPlotter:
         self.ax2 = None  # Вторая ось Y (правая), создается при необходимости
         self.curves = []
         self.dpi = dpi  # Сохраняем DPI для использования при сохранении
+        self.decimation = parse_decimation(None)  # Прореживание кривых при сохранении (см. utils/decimation.py)
+
+    def set_decimation(self, config):
+        """
+        Настройка прореживания кривых для этого графика (блок decimation в конфиге):
+        False/'none' - сохранять все точки, 'minmax' или {method, oversample, min_points}
+        """
+        self.decimation = parse_decimation(config)
+
+    def _decimate_curves(self):
+        """
+        Прореживает кривые по итоговым пределам осей, размеру рисунка и DPI.
+
+        Вызывается перед сохранением, когда пределы осей уже известны.
+        Остаются только точки, различимые при разрешении dpi (по умолчанию
+        с запасом в 2 столбца на пиксель), экстремумы сохраняются.
+        """
+        if self.decimation['method'] == 'none':
+            return
+
+        # Пиксели display координат matplotlib (fig.dpi) -> пиксели при сохранении (self.dpi)
+        oversample = float(self.decimation['oversample']) * self.dpi / self.fig.dpi
+        min_points = int(self.decimation['min_points'])
+
+        for line in self.curves:
+            x, y = line.get_data(orig=True)
+            x = np.asarray(x, dtype=float)
+            y = np.asarray(y, dtype=float)
+            if len(x) <= min_points:
+                continue
+
+            ax = line.axes
+            # Фиксируем пределы (автомасштаб по полным данным) и пропорции осей
+            ax.get_xlim()
+            ax.get_ylim()
+            ax.apply_aspect()
+
+            with np.errstate(invalid='ignore'):
+                pixels = line.get_transform().transform(np.column_stack([x, y]))
+            keep = decimation_indices(pixels[:, 0], pixels[:, 1], oversample=oversample)
+            line.set_data(x[keep], y[keep])
 
     def enable_dual_y_axis(self):
         """Создает вторую ось Y (правую) для отображения данных в другом масштабе"""
@@ -265,38 +308,94 @@ class GraphPlotter:
         """
         self.ax.axvline(x=x, color=color, linestyle=linestyle, linewidth=linewidth, label=label)
 
-    def save(self, filename):
-        # Определяем формат по расширению файла
-        import os
-        ext = os.path.splitext(filename)[1].lower()
-
-        # ВАЖНО: Удаляем существующий файл если он есть
-        # Это решает проблему с невозможностью перезаписи некоторых файлов (особенно начинающихся с цифр)
-        if os.path.exists(filename):
-            try:
-                os.remove(filename)
-            except Exception as e:
-                print(f"Warning: Couldn't delete existing file {filename}: {e}")
-
-        if ext == '.png':
-            # Для PNG используем DPI из конфига (по умолчанию 300)
-            # Без bbox_inches='tight' для строго квадратных изображений
-            self.fig.savefig(filename, format='png', dpi=self.dpi)
-        else:
-            # По умолчанию SVG
-            self.fig.savefig(filename, format='svg')
+    # Форматы, которые умеет сохранять render (расширение файла = формат)
+    RENDER_FORMATS = ('svg', 'pdf', 'png')
+
+    def render(self, formats=('svg',), filename=None, close=True):
+        """
+        Сохраняет график сразу в нескольких форматах за один вызов.
 
-        plt.close(self.fig)
-        #поямнения к формуле выше:
+        Кривые прореживаются и рисуются один раз, затем фигура записывается
+        в буферы в памяти для каждого формата - без временных файлов и без
+        отдельной конвертации SVG -> PDF.
 
+        Параметры:
+        - formats: список форматов из RENDER_FORMATS ('svg', 'pdf', 'png')
+        - filename: если задан, дополнительно записывает файлы <имя>.<формат>
+          (расширение filename, если оно есть, отбрасывается)
+        - close: закрыть фигуру после сохранения
+
+        Возвращает:
+        - Dict {формат: bytes}
+        """
+        import io
+        import os
 
-        # Чтобы сохранять абсолютно все точки, которые считаются(о чем речь - см файл), нужно:
+        formats = [str(fmt).lower().lstrip('.') for fmt in formats]
+        for fmt in formats:
+            if fmt not in self.RENDER_FORMATS:
+                raise ValueError(f"Unsupported format: {fmt}. Valid formats: {list(self.RENDER_FORMATS)}")
+
+        rendered = {}
+        with stage('render'):
+            self._decimate_curves()
+            for fmt in formats:
+                buffer = io.BytesIO()
+                if fmt == 'png':
+                    # Для PNG используем DPI из конфига (по умолчанию 300)
+                    # Без bbox_inches='tight' для строго квадратных изображений
+                    self.fig.savefig(buffer, format='png', dpi=self.dpi)
+                else:
+                    self.fig.savefig(buffer, format=fmt)
+                rendered[fmt] = buffer.getvalue()
+
+        if filename is not None:
+            stem, ext = os.path.splitext(filename)
+            with stage('save'):
+                for fmt, data in rendered.items():
+                    path = filename if ext.lower() == f'.{fmt}' else f'{stem}.{fmt}'
+                    # ВАЖНО: Удаляем существующий файл если он есть
+                    # Это решает проблему с невозможностью перезаписи некоторых файлов (особенно начинающихся с цифр)
+                    if os.path.exists(path):
+                        try:
+                            os.remove(path)
+                        except Exception as e:
+                            print(f"Warning: Couldn't delete existing file {path}: {e}")
+                    with open(path, 'wb') as f:
+                        f.write(data)
+
+        if close:
+            plt.close(self.fig)
+        return rendered
+
+    def save(self, filename, formats=None):
+        """
+        Сохраняет график в файл. Формат определяется по расширению
+        (.png, .pdf, иначе SVG). formats - дополнительные форматы, которые
+        записываются рядом с тем же именем (например ['pdf'] -> file.svg + file.pdf).
+        """
+        import os
+        ext = os.path.splitext(filename)[1].lower().lstrip('.')
+        main_format = ext if ext in self.RENDER_FORMATS else 'svg'
+        extra_formats = [fmt for fmt in (formats or []) if str(fmt).lower().lstrip('.') != main_format]
+
+        # Чтобы сохранять абсолютно все точки, которые считаются(о чем речь - см файл), нужно
+        # выключить прореживание (decimation: none) и упрощение путей matplotlib:
         #import matplotlib as mpl
         #mpl.rcParams['path.simplify'] = False  # <-- Отключить упрощение
         #mpl.rcParams['path.simplify_threshold'] = 0.0  # <-- Порог = 0
 
-        #self.fig.savefig(filename, format='svg', bbox_inches='tight')
-        #plt.close(self.fig)
+        if ext == main_format:
+            self.render([main_format] + extra_formats, filename=filename)
+            return
+
+        # Нестандартное расширение: SVG сохраняется под исходным именем
+        rendered = self.render([main_format] + extra_formats)
+        stem = os.path.splitext(filename)[0]
+        with stage('save'):
+            for fmt, data in rendered.items():
+                with open(filename if fmt == main_format else f'{stem}.{fmt}', 'wb') as f:
+                    f.write(data)
 
     def clear(self):
         self.ax.clear()
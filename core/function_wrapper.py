@@ -3,16 +3,20 @@ import sympy as sp # заменяем на короткое название б
 from sympy.parsing.latex import parse_latex #преобразует латех формулу в sympy дерево для удобного хранения, в дальнейшем будет понятно, почему хранить в виде дерева удобною
 import numpy as np #также, чисто для удобства, заменяем библиотеку на ее сокращение np
 
+from utils.stage_timer import stage
+
 
 class SymPyFunction: # создаем базовый класс
     def __init__(self, formula_latex):
         self.formula_latex = formula_latex
-        self.expr = parse_latex(formula_latex)
+        with stage('parse'):
+            self.expr = parse_latex(formula_latex)
         self.symbols = list(self.expr.free_symbols)
         self.func_compiled = None
 
     def compile(self, symbol_order):  # компилирует sympy дерево в функцию, на вход получает один параметр - порядок переменных в функции, первый параметр обязателен для метода класса.
-        self.func_compiled = sp.lambdify(symbol_order, self.expr, 'numpy')
+        with stage('compile'):
+            self.func_compiled = sp.lambdify(symbol_order, self.expr, 'numpy')
         return self.func_compiled
 
     def evaluate(self, **kwargs): # вычисляет значение функции для заданных значений переменных, на вход получает **kwargs:dict - именованные аргументы, хранить удобно именно как именованные переменные,
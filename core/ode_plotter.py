@@ -1,6 +1,10 @@
 from core.base_plotter import GraphPlotter
-from models.ode_system import ODESystem
-from utils.validators import merge_params
+from models.ode_system import get_ode_system
+from utils.validators import merge_params, IMPLICIT_SOLVER_METHODS
+from utils.batch_integrators import solve_batch, BATCH_SOLVER_METHODS
+from utils.solution_cache import get_solution_cache
+from utils.dense_trajectory import DenseTrajectory
+from utils.stage_timer import stage, timed
 from scipy.integrate import solve_ivp
 import numpy as np
 
@@ -9,33 +13,290 @@ class ODEPlotter(GraphPlotter):
     def __init__(self, global_params, dpi=300):
         super().__init__(dpi=dpi)
         self.global_params = global_params
+        # Оценка ошибки последнего пакетного интегрирования (BATCH_RK4/BATCH_DOPRI)
+        self.last_error_estimate = None
 
-    def solve_and_plot_time(self, equations_latex, variable_names, initial_conditions, params, t_span, style_list, solver_method=None, equilibria_config=None):
-        system = ODESystem(equations_latex, variable_names)
-
-        merged_params = merge_params(self.global_params, params)
-
-        param_values = [merged_params[str(p)] for p in system.params]
+    @staticmethod
+    def _jacobian_kwargs(system, param_values, method):
+        """
+        Аналитическая матрица Якоби для неявных методов (Radau, BDF, LSODA).
+        Явные методы jac не принимают - для них возвращается пустой словарь.
+        """
+        if method not in IMPLICIT_SOLVER_METHODS:
+            return {}
+        return {'jac': lambda t, y: system.jacobian(t, y, param_values)}
 
+    @staticmethod
+    def _solver_settings(merged_params, t_span, solver_method):
+        """Настройки интегрирования: (t_span, rtol, atol, n_points, method)"""
         t_span_use = merged_params.get('t_span', t_span)
         rtol = merged_params.get('rtol', 1e-9)
         atol = merged_params.get('atol', 1e-12)
         n_points = merged_params.get('n_points', 1000)
         # LSODA автоматически переключается между stiff/non-stiff методами
         method = solver_method or merged_params.get('default_solver_method', 'LSODA')
+        return t_span_use, rtol, atol, n_points, method
+
+    @staticmethod
+    def _max_step(merged_params, t_span_use):
+        """
+        Максимальный шаг интегратора по настройке max_step:
+        - 'auto' (по умолчанию): (t1 - t0) / 100, не меньше 100 шагов на графике
+        - 'none': без ограничения, шаг выбирается только по rtol/atol
+        - число: заданное значение
+        """
+        max_step = merged_params.get('max_step', 'auto')
+        if max_step is None:
+            return np.inf
+        if isinstance(max_step, str):
+            setting = max_step.strip().lower()
+            if setting == 'auto':
+                return (t_span_use[1] - t_span_use[0]) / 100
+            if setting == 'none':
+                return np.inf
+        try:
+            value = float(max_step)
+        except (TypeError, ValueError):
+            value = np.nan
+        if not value > 0:
+            raise ValueError(f"Invalid max_step: {max_step}. Use 'auto', 'none' or a positive number")
+        return value
+
+    def _dense_points(self, merged_params):
+        """
+        Сколько точек брать из плотного решения для отрисовки (dense_points):
+        'auto' (по умолчанию) - по две на пиксель ширины рисунка, или число.
+        """
+        dense_points = merged_params.get('dense_points', 'auto')
+        if isinstance(dense_points, str) and dense_points.strip().lower() == 'auto':
+            width_inches = self.fig.get_size_inches()[0]
+            return int(2 * width_inches * self.dpi)
+        return int(dense_points)
+
+    def _sampled(self, solution, merged_params):
+        """Решение в виде массивов (t, y): плотное решение передискретизируется здесь"""
+        if isinstance(solution, DenseTrajectory):
+            return solution.sample(self._dense_points(merged_params))
+        return solution
+
+    def _problem_spec(self, kind, system, param_values, initial_conditions, merged_params, t_span, solver_method):
+        """Каноническое описание задачи для кэша решений (все, от чего зависит результат)"""
+        t_span_use, rtol, atol, n_points, method = self._solver_settings(merged_params, t_span, solver_method)
+        return {
+            'kind': kind,
+            'equations': system.equations_latex,
+            'variables': system.variable_names,
+            'params': dict(zip((str(p) for p in system.params), param_values)),
+            'initial_conditions': initial_conditions,
+            't_span': list(t_span_use),
+            'method': method,
+            'rtol': rtol,
+            'atol': atol,
+            'n_points': n_points,
+            'max_step': self._max_step(merged_params, t_span_use),
+            'dense_output': self._use_dense_output(merged_params, method),
+            'batch_error_warning': merged_params.get('batch_error_warning', 1e-3) if method in BATCH_SOLVER_METHODS else None
+        }
+
+    @staticmethod
+    def _use_dense_output(merged_params, method):
+        """Плотное решение (dense_output: true) - только для методов SciPy"""
+        return bool(merged_params.get('dense_output', False)) and method not in BATCH_SOLVER_METHODS
+
+    def _solve(self, system, param_values, initial_conditions, merged_params, t_span, solver_method):
+        """
+        Решение для одной кривой: сначала ищется в кэше решений,
+        при промахе интегрируется и сохраняется в кэш.
+
+        Возвращает (t, y) на сетке из n_points точек или, при dense_output: true,
+        DenseTrajectory (точки для графика берутся из нее через _sampled).
+        """
+        cache = get_solution_cache()
+        spec = self._problem_spec('single', system, param_values, initial_conditions, merged_params, t_span, solver_method)
+        dense = spec['dense_output']
+        cached = cache.get(spec)
+        if cached is not None:
+            return DenseTrajectory.from_arrays(cached) if dense else (cached['t'], cached['y'])
+
+        solution = self._integrate(system, param_values, initial_conditions, merged_params, t_span, solver_method)
+        if dense:
+            cache.put(spec, **solution.arrays())
+        else:
+            cache.put(spec, t=solution[0], y=solution[1])
+        return solution
+
+    def _integrate(self, system, param_values, initial_conditions, merged_params, t_span, solver_method):
+        t_span_use, rtol, atol, n_points, method = self._solver_settings(merged_params, t_span, solver_method)
+        max_step = self._max_step(merged_params, t_span_use)
+
+        if method in BATCH_SOLVER_METHODS:
+            sol = self._solve_batch(system, param_values, np.asarray(initial_conditions, dtype=float),
+                                    merged_params, t_span, solver_method)
+            return sol.t, sol.y
+
+        # Плотное решение: без t_eval, интегратор хранит только свои шаги
+        dense = self._use_dense_output(merged_params, method)
+        t_eval = None if dense else np.linspace(t_span_use[0], t_span_use[1], n_points)
+
+        with stage('solve'):
+            sol = solve_ivp(
+                lambda t, y: system.right_hand_side(t, y, param_values),
+                t_span_use,
+                initial_conditions,
+                method=method,
+                rtol=rtol,
+                atol=atol,
+                t_eval=t_eval,
+                dense_output=dense,
+                max_step=max_step,
+                **self._jacobian_kwargs(system, param_values, method)
+            )
+        if dense:
+            return DenseTrajectory.from_solve_ivp(sol, lambda t, y: system.evaluate(t, y, param_values))
+        return sol.t, sol.y
 
+    def _solve_batch(self, system, param_values, y0, merged_params, t_span, solver_method):
+        """
+        Интегрирование пакетным NumPy методом (BATCH_RK4, BATCH_DOPRI).
+        y0 - форма (n_vars,) или (n_vars, N). Если оценка ошибки метода больше
+        batch_error_warning (по умолчанию 1e-3), выводится предупреждение.
+        """
+        t_span_use, rtol, atol, n_points, method = self._solver_settings(merged_params, t_span, solver_method)
         t_eval = np.linspace(t_span_use[0], t_span_use[1], n_points)
 
-        sol = solve_ivp(
-            lambda t, y: system.right_hand_side(t, y, param_values),
-            t_span_use,
-            initial_conditions,
-            method=method,
-            rtol=rtol,
-            atol=atol,
-            t_eval=t_eval,
-            max_step=(t_span_use[1] - t_span_use[0]) / 100  # Ограничиваем шаг для стабильности
-        )
+        with stage('solve'):
+            sol = solve_batch(
+                lambda t, y: system.evaluate(t, y, param_values),
+                t_span_use,
+                y0,
+                method=method,
+                t_eval=t_eval,
+                rtol=rtol,
+                atol=atol,
+                max_step=self._max_step(merged_params, t_span_use)
+            )
+
+        error_warning = merged_params.get('batch_error_warning', 1e-3)
+        if not sol.success or not sol.error_estimate <= error_warning:
+            print(f"Warning: {method} error estimate {sol.error_estimate:.2e} exceeds {error_warning:.0e} "
+                  f"({sol.message}); consider a SciPy solver for this curve")
+        self.last_error_estimate = sol.error_estimate
+        return sol
+
+    def solve_ensemble(self, equations_latex, variable_names, initial_conditions_list, params, t_span, solver_method=None):
+        """
+        Интегрирует N траекторий одной системы (разные начальные условия) одним вызовом solve_ivp.
+
+        Состояние ансамбля хранится как (N, n_vars) и разворачивается в вектор
+        по траекториям, поэтому правые части всех траекторий считаются одним
+        вызовом ядра на шаг, а матрица Якоби блочно-диагональная: для Radau/BDF
+        передается разреженная блочная матрица, для LSODA - ленточная
+        (lband = uband = n_vars - 1).
+
+        Шаг общий для всех траекторий, а норма ошибки считается по всему
+        вектору состояния, поэтому ансамбль имеет смысл для кривых с одинаковыми
+        уравнениями, параметрами и t_span.
+
+        Параметры:
+        - initial_conditions_list: список начальных условий, по одному на траекторию
+        - остальные - как в solve_and_plot_time
+
+        Возвращает:
+        - (t, Y): t - массив времени, Y - массив формы (N, n_vars, len(t))
+        """
+        from scipy.sparse import bsr_matrix
+
+        system = get_ode_system(equations_latex, variable_names)
+        merged_params = merge_params(self.global_params, params)
+        param_values = system.param_vector(merged_params)
+        t_span_use, rtol, atol, n_points, method = self._solver_settings(merged_params, t_span, solver_method)
+
+        cache = get_solution_cache()
+        spec = self._problem_spec('ensemble', system, param_values, initial_conditions_list, merged_params,
+                                  t_span, solver_method)
+        cached = cache.get(spec)
+        if cached is not None:
+            return cached['t'], cached['y']
+
+        y0 = np.array(initial_conditions_list, dtype=float)
+        n_traj, n_vars = y0.shape
+
+        if method in BATCH_SOLVER_METHODS:
+            # Пакетные методы работают с состоянием (n_vars, N) напрямую
+            sol = self._solve_batch(system, param_values, y0.T, merged_params, t_span, solver_method)
+            Y = np.moveaxis(sol.y, 1, 0)
+            cache.put(spec, t=sol.t, y=Y)
+            return sol.t, Y
+
+        def rhs(t, y):
+            state = y.reshape(n_traj, n_vars)
+            derivatives = system.evaluate(t, state.T, param_values)
+            return derivatives.T.ravel()
+
+        solver_kwargs = {}
+        if method in IMPLICIT_SOLVER_METHODS:
+            def jacobian_blocks(t, y):
+                state = y.reshape(n_traj, n_vars)
+                # (n_vars, n_vars, N) -> (N, n_vars, n_vars)
+                return np.moveaxis(system.jacobian(t, state.T, param_values), -1, 0)
+
+            if method == 'LSODA':
+                def jac(t, y):
+                    # Ленточный формат LSODA: packed[uband + i - j, j] = J[i, j]
+                    blocks = jacobian_blocks(t, y)
+                    packed = np.zeros((2 * n_vars - 1, n_traj * n_vars))
+                    for i in range(n_vars):
+                        for j in range(n_vars):
+                            packed[n_vars - 1 + i - j, j::n_vars] = blocks[:, i, j]
+                    return packed
+
+                solver_kwargs.update(jac=jac, lband=n_vars - 1, uband=n_vars - 1)
+            else:
+                indices = np.arange(n_traj)
+                indptr = np.arange(n_traj + 1)
+
+                def jac(t, y):
+                    return bsr_matrix((jacobian_blocks(t, y), indices, indptr),
+                                      shape=(n_traj * n_vars, n_traj * n_vars))
+
+                solver_kwargs['jac'] = jac
+
+        t_eval = np.linspace(t_span_use[0], t_span_use[1], n_points)
+
+        with stage('solve'):
+            sol = solve_ivp(
+                rhs,
+                t_span_use,
+                y0.ravel(),
+                method=method,
+                rtol=rtol,
+                atol=atol,
+                t_eval=t_eval,
+                max_step=self._max_step(merged_params, t_span_use),
+                **solver_kwargs
+            )
+
+        Y = sol.y.reshape(n_traj, n_vars, -1)
+        cache.put(spec, t=sol.t, y=Y)
+        return sol.t, Y
+
+    def solve_and_plot_time(self, equations_latex, variable_names, initial_conditions, params, t_span, style_list, solver_method=None, equilibria_config=None, solution=None):
+        """
+        solution: готовое решение (t, y) для этой кривой, например из solve_ensemble.
+        Если None - система интегрируется здесь.
+        """
+        system = get_ode_system(equations_latex, variable_names)
+
+        merged_params = merge_params(self.global_params, params)
+
+        param_values = system.param_vector(merged_params)
+
+        t_span_use = self._solver_settings(merged_params, t_span, solver_method)[0]
+
+        if solution is None:
+            solution = self._solve(system, param_values, initial_conditions, merged_params, t_span, solver_method)
+        solution = self._sampled(solution, merged_params)
+        sol_t, sol_y = solution
 
         for i, style in enumerate(style_list):
             # Пропускаем переменные со стилем None (не нужно строить)
@@ -50,45 +311,34 @@ class ODEPlotter(GraphPlotter):
             else:
                 use_right_axis = False
                 plot_style = style
-            self.add_curve(sol.t, sol.y[i], plot_style, use_right_axis=use_right_axis)
+            self.add_curve(sol_t, sol_y[i], plot_style, use_right_axis=use_right_axis)
 
         # Добавляем равновесия/асимптоты если включено
         equilibria_info = None
         if equilibria_config:
-            equilibria_info = self._add_equilibria(system, variable_names, initial_conditions, param_values, t_span_use, equilibria_config, analyze_stability=False)
+            equilibria_info = self._add_equilibria(system, variable_names, initial_conditions, param_values, t_span_use, equilibria_config, analyze_stability=False,
+                                                   solution=solution)
 
         return equilibria_info
 
     def solve_and_plot_phase(self, equations_latex, variable_names, initial_conditions, params, t_span, var_indices,
-                             style, solver_method=None):
-        system = ODESystem(equations_latex, variable_names)
+                             style, solver_method=None, solution=None):
+        """
+        solution: готовое решение (t, y) для этой кривой, например из solve_ensemble.
+        Если None - система интегрируется здесь.
 
+        Возвращает решение (t, y) - по нему можно продолжить поиск равновесия.
+        """
         merged_params = merge_params(self.global_params, params)
+        if solution is None:
+            system = get_ode_system(equations_latex, variable_names)
+            param_values = system.param_vector(merged_params)
+            solution = self._solve(system, param_values, initial_conditions, merged_params, t_span, solver_method)
+        solution = self._sampled(solution, merged_params)
+        sol_y = solution[1]
 
-        param_values = [merged_params[str(p)] for p in system.params]
-
-        t_span_use = merged_params.get('t_span', t_span)
-        rtol = merged_params.get('rtol', 1e-9)
-        atol = merged_params.get('atol', 1e-12)
-        n_points = merged_params.get('n_points', 1000)
-        # LSODA автоматически переключается между stiff/non-stiff методами
-        method = solver_method or merged_params.get('default_solver_method', 'LSODA')
-
-        t_eval = np.linspace(t_span_use[0], t_span_use[1], n_points)
-
-        sol = solve_ivp(
-            lambda t, y: system.right_hand_side(t, y, param_values),
-            t_span_use,
-            initial_conditions,
-            method=method,
-            rtol=rtol,
-            atol=atol,
-            t_eval=t_eval,
-            max_step=(t_span_use[1] - t_span_use[0]) / 100  # Ограничиваем шаг для стабильности
-        )
-
-        x_var = sol.y[var_indices[0]]
-        y_var = sol.y[var_indices[1]]
+        x_var = sol_y[var_indices[0]]
+        y_var = sol_y[var_indices[1]]
 
         # Извлекаем параметры стрелок из style (они не должны попасть в matplotlib)
         show_arrows = style.pop('show_arrows', False)
@@ -103,44 +353,105 @@ class ODEPlotter(GraphPlotter):
             color = style.get('color', 'black')
             self.add_arrows_to_curve(x_var, y_var, color=color, num_arrows=num_arrows, arrow_size=arrow_size)
 
+        return solution
+
     def add_vector_field(self, equations_latex, variable_names, params, var_indices, field_config):
-        from models.ode_system import ODESystem
-        import numpy as np
-        import warnings
+        self.add_phase_overlays(equations_latex, variable_names, params, var_indices,
+                                field_config=field_config)
 
-        system = ODESystem(equations_latex, variable_names)
+    def add_isoclines(self, equations_latex, variable_names, params, var_indices, isocline_config):
+        """
+        Добавляет изоклины (нуль-клины) на фазовый портрет
 
-        merged_params = merge_params(self.global_params, params)
-        param_values = [merged_params[str(p)] for p in system.params]
+        Изоклины - это линии, на которых производная одной из переменных равна нулю:
+        - ds/dt = 0 (изоклина для s)
+        - dw/dt = 0 (изоклина для w)
 
-        # Получить пределы осей
-        xlim = self.ax.get_xlim()
-        ylim = self.ax.get_ylim()
+        Параметры:
+        - equations_latex: список уравнений системы в LaTeX
+        - variable_names: список имен переменных
+        - params: параметры системы
+        - var_indices: индексы переменных для фазового портрета [index_s, index_w]
+        - isocline_config: конфигурация изоклин (цвета, стили и т.д.)
+        """
+        self.add_phase_overlays(equations_latex, variable_names, params, var_indices,
+                                isocline_config=isocline_config)
+
+    @timed('overlays')
+    def add_phase_overlays(self, equations_latex, variable_names, params, var_indices,
+                           field_config=None, isocline_config=None):
+        """
+        Добавляет векторное поле и/или изоклины на фазовый портрет.
+
+        Правые части вычисляются на сетках через ODESystem.evaluate_grid без
+        циклов Python. Если включены оба слоя с одинаковыми fixed_values,
+        точки обеих сеток считаются за один вызов ядра.
 
-        # Создать сетку точек
-        density = field_config.get('density', 20)
-        x_grid = np.linspace(xlim[0], xlim[1], density)
-        y_grid = np.linspace(ylim[0], ylim[1], density)
-        X, Y = np.meshgrid(x_grid, y_grid)
+        Параметры:
+        - equations_latex, variable_names, params, var_indices: как в add_isoclines
+        - field_config: конфигурация векторного поля (density, color, ...) или None
+        - isocline_config: конфигурация изоклин (resolution, color_ds, ...) или None
 
-        # Вычислить векторы направлений
-        U = np.zeros_like(X)
-        V = np.zeros_like(Y)
+        В обеих конфигурациях можно указать fixed_values: {имя: значение} -
+        значения переменных, которых нет на осях (по умолчанию 0).
+        """
+        # При автомасштабе quiver расширяет пределы осей, и сетка изоклин
+        # строится уже по новым пределам - тогда слои считаются по очереди
+        autoscale = self.ax.get_autoscalex_on() or self.ax.get_autoscaley_on()
+        if field_config is not None and isocline_config is not None and autoscale:
+            self.add_phase_overlays(equations_latex, variable_names, params, var_indices,
+                                    field_config=field_config)
+            self.add_phase_overlays(equations_latex, variable_names, params, var_indices,
+                                    isocline_config=isocline_config)
+            return
+
+        system = get_ode_system(equations_latex, variable_names)
 
-        # Подавляем warnings о делении на ноль (нормально для векторных полей)
-        with warnings.catch_warnings():
-            warnings.filterwarnings('ignore', category=RuntimeWarning)
+        merged_params = merge_params(self.global_params, params)
+        param_values = system.param_vector(merged_params)
 
-            for i in range(density):
-                for j in range(density):
-                    state = [0] * len(variable_names)
-                    state[var_indices[0]] = X[i, j]
-                    state[var_indices[1]] = Y[i, j]
+        # Получить пределы осей
+        xlim = self.ax.get_xlim()
+        ylim = self.ax.get_ylim()
 
-                    derivatives = system.right_hand_side(0, state, param_values)
-                    U[i, j] = derivatives[var_indices[0]]
-                    V[i, j] = derivatives[var_indices[1]]
+        # Создать сетки точек для каждого слоя
+        layers = []
+        if field_config is not None:
+            layers.append((field_config, field_config.get('density', 20)))
+        if isocline_config is not None:
+            layers.append((isocline_config, isocline_config.get('resolution', 200)))
+
+        grids = []
+        for config, size in layers:
+            x_grid = np.linspace(xlim[0], xlim[1], size)
+            y_grid = np.linspace(ylim[0], ylim[1], size)
+            grids.append(np.meshgrid(x_grid, y_grid))
+
+        # Вычислить производные: одним проходом, если фиксированные значения совпадают
+        fixed = [config.get('fixed_values') or {} for config, _ in layers]
+        if all(f == fixed[0] for f in fixed):
+            X_all = np.concatenate([X.ravel() for X, _ in grids])
+            Y_all = np.concatenate([Y.ravel() for _, Y in grids])
+            derivatives_all = system.evaluate_grid(X_all, Y_all, var_indices, param_values, fixed[0])
+
+            derivatives = []
+            offset = 0
+            for X, _ in grids:
+                derivatives.append(derivatives_all[:, offset:offset + X.size].reshape((-1,) + X.shape))
+                offset += X.size
+        else:
+            derivatives = [
+                system.evaluate_grid(X, Y, var_indices, param_values, f)
+                for (X, Y), f in zip(grids, fixed)
+            ]
+
+        for (config, _), (X, Y), d in zip(layers, grids, derivatives):
+            if config is field_config:
+                self._draw_vector_field(X, Y, d[var_indices[0]], d[var_indices[1]], xlim, ylim, config)
+            else:
+                self._draw_isoclines(X, Y, d[var_indices[0]], d[var_indices[1]], config)
 
+    def _draw_vector_field(self, X, Y, U, V, xlim, ylim, field_config):
         # Нормализация с учетом масштаба осей
         x_scale = xlim[1] - xlim[0]
         y_scale = ylim[1] - ylim[0]
@@ -150,8 +461,7 @@ class ODEPlotter(GraphPlotter):
         V_scaled = V / y_scale
 
         # Нормализуем - все стрелки одинаковой длины
-        with warnings.catch_warnings():
-            warnings.filterwarnings('ignore', category=RuntimeWarning)
+        with np.errstate(all='ignore'):
             magnitude = np.sqrt(U_scaled ** 2 + V_scaled ** 2)
             magnitude[magnitude == 0] = 1  # избежать деления на 0
             U_norm = U_scaled / magnitude
@@ -168,57 +478,7 @@ class ODEPlotter(GraphPlotter):
             headlength=4
         )
 
-    def add_isoclines(self, equations_latex, variable_names, params, var_indices, isocline_config):
-        """
-        Добавляет изоклины (нуль-клины) на фазовый портрет
-
-        Изоклины - это линии, на которых производная одной из переменных равна нулю:
-        - ds/dt = 0 (изоклина для s)
-        - dw/dt = 0 (изоклина для w)
-
-        Параметры:
-        - equations_latex: список уравнений системы в LaTeX
-        - variable_names: список имен переменных
-        - params: параметры системы
-        - var_indices: индексы переменных для фазового портрета [index_s, index_w]
-        - isocline_config: конфигурация изоклин (цвета, стили и т.д.)
-        """
-        from models.ode_system import ODESystem
-        import numpy as np
-        import warnings
-
-        system = ODESystem(equations_latex, variable_names)
-
-        merged_params = merge_params(self.global_params, params)
-        param_values = [merged_params[str(p)] for p in system.params]
-
-        # Получить пределы осей
-        xlim = self.ax.get_xlim()
-        ylim = self.ax.get_ylim()
-
-        # Создать сетку точек
-        resolution = isocline_config.get('resolution', 200)
-        x_grid = np.linspace(xlim[0], xlim[1], resolution)
-        y_grid = np.linspace(ylim[0], ylim[1], resolution)
-        X, Y = np.meshgrid(x_grid, y_grid)
-
-        # Вычислить производные для каждой точки сетки
-        dS = np.zeros_like(X)
-        dW = np.zeros_like(Y)
-
-        with warnings.catch_warnings():
-            warnings.filterwarnings('ignore', category=RuntimeWarning)
-
-            for i in range(resolution):
-                for j in range(resolution):
-                    state = [0] * len(variable_names)
-                    state[var_indices[0]] = X[i, j]
-                    state[var_indices[1]] = Y[i, j]
-
-                    derivatives = system.right_hand_side(0, state, param_values)
-                    dS[i, j] = derivatives[var_indices[0]]
-                    dW[i, j] = derivatives[var_indices[1]]
-
+    def _draw_isoclines(self, X, Y, dS, dW, isocline_config):
         # Построить изоклину ds/dt = 0
         if isocline_config.get('show_ds', True):
             self.ax.contour(
@@ -239,7 +499,173 @@ class ODEPlotter(GraphPlotter):
                 alpha=isocline_config.get('alpha_dw', 0.8)
             )
 
-    def _add_equilibria(self, system, variable_names, initial_conditions, param_values, t_span, equilibria_config, analyze_stability=False):
+    def add_all_equilibria(self, equations_latex, variable_names, params, var_indices, config):
+        """
+        Находит все равновесия в области графика (multi-start Newton) и отмечает их
+        маркерами - без интегрирования траекторий.
+
+        Параметры:
+        - equations_latex, variable_names, params, var_indices: как в add_isoclines
+        - config: настройки (словарь all_equilibria из YAML):
+            bounds: {имя переменной: [min, max]} - область поиска. Для переменных
+                на осях по умолчанию берутся текущие пределы осей, для остальных
+                переменных границы обязательны
+            n_starts (256), seeds ('sobol' | 'grid'), tol (1e-10)
+            markersize (8), color_stable ('black'), color_unstable ('black'),
+            color_saddle ('black')
+
+        Маркеры: устойчивое - закрашенный круг, неустойчивое - пустой круг,
+        седло - квадрат, нейтральное - ромб.
+
+        Возвращает:
+        - список словарей в формате _add_equilibria (для asimptota.txt)
+        """
+        from utils.equilibrium_finder import EquilibriumFinder
+
+        system = get_ode_system(equations_latex, variable_names)
+        merged_params = merge_params(self.global_params, params)
+        param_values = system.param_vector(merged_params)
+
+        bounds_config = config.get('bounds', {}) or {}
+        axis_limits = {var_indices[0]: self.ax.get_xlim(), var_indices[1]: self.ax.get_ylim()}
+        bounds = []
+        for i, name in enumerate(variable_names):
+            if name in bounds_config:
+                bounds.append(tuple(bounds_config[name]))
+            elif i in axis_limits:
+                bounds.append(tuple(sorted(axis_limits[i])))
+            else:
+                raise ValueError(f"all_equilibria: missing bounds for variable '{name}'")
+
+        finder = EquilibriumFinder(
+            lambda t, y, params_dict: system.right_hand_side(t, y, param_values),
+            jac_func=lambda t, y, params_dict: system.jacobian(t, y, param_values)
+        )
+        roots = finder.find_all_equilibria(
+            bounds, {},
+            n_starts=int(config.get('n_starts', 256)),
+            seeds=config.get('seeds', 'sobol'),
+            tol=float(config.get('tol', 1e-10))
+        )
+
+        markersize = config.get('markersize', 8)
+        equilibria_info = []
+        for root in roots:
+            point = root['equilibrium']
+            stability = root['stability']
+
+            if stability == "Устойчивое":
+                marker, color, face = 'o', config.get('color_stable', 'black'), None
+            elif stability == "Неустойчивое":
+                marker, color, face = 'o', config.get('color_unstable', 'black'), 'white'
+            elif stability.startswith("Седло"):
+                marker, color, face = 's', config.get('color_saddle', 'black'), 'white'
+            else:
+                marker, color, face = 'D', config.get('color_unstable', 'black'), 'white'
+
+            self.ax.plot(point[var_indices[0]], point[var_indices[1]], linestyle='none',
+                         marker=marker, color=color, markersize=markersize,
+                         markerfacecolor=face if face else color, zorder=5)
+
+            equilibria_info.append({
+                's_star': float(point[0]),
+                'w_star': float(point[1]) if len(point) > 1 else None,
+                'converged': True,
+                'method': 'multi-start Newton',
+                'max_derivative': root['residual'],
+                'stability': stability,
+                'equilibrium_type': root['type'],
+                'eigenvalues': [complex(ev) for ev in root['eigenvalues']]
+            })
+
+        return equilibria_info
+
+    def plot_bifurcation(self, equations_latex, variable_names, initial_conditions, params, continuation,
+                         variable=None, styles=None, solver_method=None):
+        """
+        Строит бифуркационную диаграмму: ветвь равновесий x*(λ) по параметру λ.
+
+        Параметры:
+        - equations_latex, variable_names, params: как в solve_and_plot_time
+        - initial_conditions: начальное приближение к равновесию при λ = range[0].
+          Если Ньютон из него не сходится, равновесие сначала ищется
+          интегрированием (EquilibriumFinder)
+        - continuation: настройки продолжения
+            parameter: имя параметра (обязательно)
+            range: [λ_start, λ_end] (обязательно)
+            method: 'arclength' (по умолчанию) или 'natural'
+            step: начальный шаг по параметру (по умолчанию 1/200 диапазона)
+            max_steps: максимальное число точек (2000)
+        - variable: имя переменной по оси Y (по умолчанию первая)
+        - styles: {'stable': {...}, 'unstable': {...}, 'fold': {...}, 'hopf': {...}}
+          стили устойчивой/неустойчивой частей ветви и маркеров бифуркаций
+        - solver_method: метод интегрирования для поиска стартового равновесия
+
+        Возвращает:
+        - результат EquilibriumContinuation.run
+        """
+        from utils.continuation import EquilibriumContinuation
+        from utils.equilibrium_finder import EquilibriumFinder
+
+        system = get_ode_system(equations_latex, variable_names)
+        merged_params = merge_params(self.global_params, params)
+
+        parameter = continuation['parameter']
+        param_range = continuation['range']
+        engine = EquilibriumContinuation(system, merged_params, parameter)
+
+        # Стартовое равновесие: Ньютон из initial_conditions, иначе интегрирование
+        x0, converged, _ = engine.newton(initial_conditions, float(param_range[0]))
+        if not converged:
+            param_values = engine.params_at(float(param_range[0]))
+            finder = EquilibriumFinder(
+                lambda t, y, params_dict: system.right_hand_side(t, y, param_values),
+                jac_func=lambda t, y, params_dict: system.jacobian(t, y, param_values)
+            )
+            x0 = finder.find_equilibrium(np.array(initial_conditions, dtype=float), {},
+                                         method=solver_method or 'LSODA')['equilibrium']
+
+        result = engine.run(
+            x0, param_range,
+            method=continuation.get('method', 'arclength'),
+            step=continuation.get('step'),
+            max_steps=int(continuation.get('max_steps', 2000))
+        )
+
+        var_index = variable_names.index(variable) if variable else 0
+        lam = result['param']
+        values = result['states'][var_index]
+        stable = result['stable']
+        styles = styles or {}
+
+        # Устойчивые участки - сплошной линией, неустойчивые - пунктиром.
+        # Точку смены устойчивости включаем в оба участка, чтобы линия не рвалась
+        boundary = np.zeros_like(stable)
+        boundary[1:] |= stable[1:] != stable[:-1]
+        boundary[:-1] |= stable[1:] != stable[:-1]
+        for part, key, default in ((stable, 'stable', {'color': 'black', 'linestyle': '-'}),
+                                   (~stable, 'unstable', {'color': 'black', 'linestyle': '--'})):
+            if not np.any(part):
+                continue
+            style = dict(default)
+            style.update(styles.get(key) or {})
+            self.add_curve(lam, np.where(part | boundary, values, np.nan), style)
+
+        markers = {'fold': ('LP', {'marker': 's', 'color': 'red'}),
+                   'hopf': ('H', {'marker': 'o', 'color': 'blue'})}
+        for bifurcation in result['bifurcations']:
+            text, default = markers[bifurcation['type']]
+            style = dict(default)
+            style.update(styles.get(bifurcation['type']) or {})
+            self.ax.plot(bifurcation['param'], bifurcation['state'][var_index], linestyle='none',
+                         markersize=style.pop('markersize', 6), zorder=5, **style)
+            self.ax.annotate(text, (bifurcation['param'], bifurcation['state'][var_index]),
+                             textcoords='offset points', xytext=(5, 5))
+
+        return result
+
+    def _add_equilibria(self, system, variable_names, initial_conditions, param_values, t_span, equilibria_config, analyze_stability=False,
+                        solution=None):
         """
         Находит и отрисовывает равновесия системы (асимптоты)
 
@@ -251,6 +677,8 @@ class ODEPlotter(GraphPlotter):
         - t_span: временной интервал
         - equilibria_config: настройки отображения равновесий
         - analyze_stability: нужен ли анализ устойчивости (для фазовых портретов)
+        - solution: уже посчитанное для графика решение (t, y). Если задано,
+          поиск продолжается из его конечного состояния, а не с t=0
 
         Возвращает:
         - Dict с информацией о равновесии или None если не найдено
@@ -259,25 +687,69 @@ class ODEPlotter(GraphPlotter):
 
         # Создаем ODE функцию для finder
         def ode_func(t, y, params_dict):
-            return np.array(system.right_hand_side(t, y, param_values))
+            return system.right_hand_side(t, y, param_values)
+
+        def jac_func(t, y, params_dict):
+            return system.jacobian(t, y, param_values)
 
-        # Автоматически выбираем время интегрирования для поиска равновесия
-        # Используем в 10 раз больше чем время графика, минимум 100
+        # Верхняя граница времени интегрирования для поиска равновесия:
+        # в 10 раз больше чем время графика, минимум 100. Интегрирование
+        # останавливается раньше, как только производные успокоились
         t_graph_end = t_span[1] if isinstance(t_span, (list, tuple)) else t_span
         t_max_auto = max(t_graph_end * 10, 100.0)
 
         # Получаем настройки поиска (можно переопределить t_max вручную если нужно)
         t_max = equilibria_config.get('t_max', t_max_auto)
         refine = equilibria_config.get('refine', True)
-
-        # Создаем finder и ищем равновесие
-        finder = EquilibriumFinder(ode_func, convergence_threshold=1e-6)
-        result = finder.find_equilibrium(
-            y0=np.array(initial_conditions),
-            params={},  # параметры уже в param_values
-            t_max=t_max,
-            refine=refine
-        )
+        method = equilibria_config.get('method', 'LSODA')
+        settle_window = equilibria_config.get('settle_window')
+
+        # Продолжаем траекторию графика вместо повторного интегрирования с t=0
+        y0, t0 = np.array(initial_conditions, dtype=float), 0.0
+        if solution is not None and len(solution[0]) > 0 and np.all(np.isfinite(solution[1][:, -1])):
+            y0, t0 = np.array(solution[1][:, -1], dtype=float), float(solution[0][-1])
+
+        # Создаем finder и ищем равновесие (результат поиска тоже кэшируется)
+        finder = EquilibriumFinder(ode_func, convergence_threshold=1e-6, jac_func=jac_func,
+                                   settle_window=settle_window)
+        cache = get_solution_cache()
+        spec = {
+            'kind': 'equilibrium',
+            'equations': system.equations_latex,
+            'variables': system.variable_names,
+            'params': dict(zip((str(p) for p in system.params), param_values)),
+            'y0': y0,
+            't0': t0,
+            't_max': t_max,
+            'refine': refine,
+            'method': method,
+            'settle_window': settle_window,
+            'convergence_threshold': finder.convergence_threshold
+        }
+        cached = cache.get(spec)
+        if cached is not None:
+            max_derivative = float(cached['max_derivative'])
+            result = {
+                'equilibrium': cached['equilibrium'],
+                'converged': bool(cached['converged']),
+                'method': str(cached['method']),
+                'integration_info': {} if np.isnan(max_derivative) else {'max_derivative': max_derivative}
+            }
+        else:
+            result = finder.find_equilibrium(
+                y0=y0,
+                params={},  # параметры уже в param_values
+                t_max=t_max,
+                refine=refine,
+                method=method,
+                t0=t0
+            )
+            max_derivative = result['integration_info'].get('max_derivative')
+            cache.put(spec,
+                      equilibrium=np.asarray(result['equilibrium'], dtype=float),
+                      converged=np.array(bool(result['converged'])),
+                      method=np.array(result.get('method', 'integration')),
+                      max_derivative=np.array(np.nan if max_derivative is None else float(max_derivative)))
 
         equilibrium = result['equilibrium']
         converged = result['converged']
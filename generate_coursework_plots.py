@@ -44,9 +44,9 @@ def run_config(config_path):
     print(f"  Конфиг: {config_path}")
 
     try:
-        # Запускаем main.py с конфигом
+        # Запускаем main.py с конфигом: SVG и PDF сохраняются за один проход
         result = subprocess.run(
-            ["python", str(MAIN_SCRIPT), "--config", str(config_path)],
+            ["python", str(MAIN_SCRIPT), "--config", str(config_path), "--formats", "pdf"],
             capture_output=True,
             text=True,
             timeout=120,
@@ -69,48 +69,6 @@ def run_config(config_path):
         return False
 
 
-def convert_svg_to_pdf():
-    """Конвертирует все SVG файлы в PDF"""
-    print_header("КОНВЕРТАЦИЯ SVG → PDF")
-
-    svg_files = list(OUTPUT_DIR.glob("*.svg"))
-
-    if not svg_files:
-        print("⚠ Нет SVG файлов для конвертации")
-        return
-
-    print(f"Найдено SVG файлов: {len(svg_files)}")
-
-    convert_script = GRAPHIC_DIR / "convert_svg_to_pdf.py"
-
-    if not convert_script.exists():
-        print(f"⚠ Скрипт конвертации не найден: {convert_script}")
-        return
-
-    for svg_file in svg_files:
-        print(f"\nКонвертация: {svg_file.name}")
-        try:
-            result = subprocess.run(
-                ["python", str(convert_script), str(svg_file)],
-                capture_output=True,
-                text=True,
-                timeout=60,
-                cwd=str(GRAPHIC_DIR)
-            )
-
-            if result.returncode == 0:
-                pdf_file = svg_file.with_suffix('.pdf')
-                if pdf_file.exists():
-                    print(f"  ✓ {pdf_file.name}")
-                else:
-                    print(f"  ✗ PDF не создан")
-            else:
-                print(f"  ✗ Ошибка конвертации")
-
-        except Exception as e:
-            print(f"  ✗ Исключение: {e}")
-
-
 def create_summary():
     """Создает сводку по созданным графикам"""
     print_header("СВОДКА ПО ГРАФИКАМ")
@@ -211,12 +169,6 @@ def main():
         print("\n✗ Ни один график не был создан")
         return
 
-    # Конвертация в PDF
-    try:
-        convert_svg_to_pdf()
-    except Exception as e:
-        print(f"\n⚠ Ошибка при конвертации: {e}")
-
     # Создание сводки
     create_summary()
 
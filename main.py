@@ -15,13 +15,37 @@ from utils.excel_loader import ExcelConfigLoader
 from utils.config_merger import ConfigMerger
 from core.function_plotter import FunctionPlotter
 from core.ode_plotter import ODEPlotter
-from models.ode_system import ODESystem
+from models.ode_system import get_ode_system
+from utils.sweep import iter_graph_jobs, has_sweep
+from utils.solution_cache import (configure_solution_cache, get_solution_cache, solution_cache_config,
+                                  format_cache_report)
+from utils.worker_pool import (get_worker_pool, get_progress_queue, report_progress, kill_worker,
+                               default_num_workers, DEFAULT_TASK_TIMEOUT, DEFAULT_FALLBACK_CHAIN)
+from utils.scheduler import (CostModel, DEFAULT_TIMINGS_FILE, job_features, plan_windows, simulate_wall_time,
+                             format_duration, ProgressETA)
+from utils.build_manifest import BuildManifest, DEFAULT_MANIFEST_FILE, code_version, output_files
+from utils.run_report import RunReport, parse_report
+from utils.progress_journal import ProgressJournal, DEFAULT_JOURNAL_FILE
+from utils.job_plan import encode_jobs, decode_jobs, plan_header, write_plan, load_plan_header, iter_plan_jobs
+from utils.stage_timer import StageSummary, snapshot, since
+from collections import deque
+from itertools import islice, count
+import queue
+import tempfile
+import threading
+import time
 import params_global
 
+# Номера пачек заданий - уникальны в пределах процесса (пул живет между вызовами)
+_CHUNK_IDS = count()
+
 #Функция ниже определяет типа графика и проверяет корректность типа графика, после чего вызывает либо соответствующий обработчик графика либо выкидывает ошибку Unkown type.
 def plot_from_config(config):
     validate_config(config) # проверяет корректность входных данных config, в случае ошибки выбрасывает через raise ошибку и останавливает программу.
 
+    # Кэш решений ОДУ на диске (solution_cache: false - выключить)
+    configure_solution_cache(config.get('solution_cache'))
+
     plot_type = config['type']  # извлекаем из словаря config тип графика
 
     if plot_type == 'function':
@@ -30,6 +54,8 @@ def plot_from_config(config):
         plot_ode_time(config)
     elif plot_type == 'phase_portrait':
         plot_phase_portrait(config)
+    elif plot_type == 'bifurcation':
+        plot_bifurcation(config)
     elif plot_type == 'from_excel':
         plot_from_excel(config)
     else:
@@ -142,33 +168,27 @@ def _build_single_graph(args):
     Вспомогательная функция для построения одного графика в отдельном процессе.
     Используется для параллелизации.
 
+    Backend matplotlib и params_global настраивает инициализатор пула
+    (utils.worker_pool), поэтому здесь только построение.
+
     Параметры:
-    - args: кортеж (output_file, rows, base_config, graph_type, params_global_dict)
+    - args: кортеж (output_file, rows, base_config, graph_type[, overrides]);
+      overrides - настройки решателя попытки из fallback_chain
 
     Возвращает:
-    - dict: {'success': bool, 'output': str, 'error': str (если success=False)}
+    - кортеж (success, output, количество кривых или текст ошибки, equilibria_info, timing);
+      timing - признаки графика, время построения и время этапов (utils.stage_timer)
     """
-    output_file, rows, base_config, graph_type, params_global_dict = args
+    output_file, rows, base_config, graph_type = args[:4]
+    overrides = args[4] if len(args) > 4 else None
+    start = time.perf_counter()
+    before = snapshot()
 
     try:
-        # КРИТИЧНО для Windows: принудительно устанавливаем non-GUI backend
-        # ДО любых импортов, которые могут использовать matplotlib
-        import matplotlib
-        matplotlib.use('Agg', force=True)
-
-        # ВАЖНО: В дочернем процессе нужно восстановить params_global
-        # Создаем временный объект с атрибутами из словаря
-        import sys
-        import os
-        sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
-
-        # Импортируем params_global и устанавливаем значения
-        import params_global
-        for key, value in params_global_dict.items():
-            setattr(params_global, key, value)
-
         # Создаем конфигурацию для этого графика
         graph_config = _create_graph_config_from_rows(rows, base_config, graph_type)
+        features = _safe_job_features(graph_config)
+        _apply_solver_overrides(graph_config, overrides)
 
         # Определяем тип графика
         actual_type = graph_config.get('type', graph_type)
@@ -183,6 +203,8 @@ def _build_single_graph(args):
             equilibria_info = plot_ode_time(graph_config)
         elif actual_type == 'phase_portrait':
             equilibria_info = plot_phase_portrait(graph_config)
+        elif actual_type == 'bifurcation':
+            equilibria_info = plot_bifurcation(graph_config)
         elif actual_type == 'function':
             plot_function(graph_config)
         else:
@@ -192,8 +214,10 @@ def _build_single_graph(args):
         import matplotlib.pyplot as plt
         plt.close('all')
 
-        # Возвращаем успех, имя файла, количество кривых, и информацию о равновесиях
-        return (True, output_file, len(rows), equilibria_info)
+        # Возвращаем успех, имя файла, количество кривых, информацию о равновесиях
+        # и время построения (для оценки стоимости графиков в следующих запусках)
+        timing = {'features': features, 'seconds': time.perf_counter() - start, 'stages': since(before)}
+        return (True, output_file, len(rows), equilibria_info, timing)
 
     except Exception as e:
         import traceback
@@ -202,7 +226,7 @@ def _build_single_graph(args):
 
         # Возвращаем кортеж: (success, output, error_msg, None) с полным traceback
         error_msg = f"{type(e).__name__}: {str(e)}\n{traceback.format_exc()}"
-        return (False, output_file, error_msg, None)
+        return (False, output_file, error_msg, None, None)
 
 
 def plot_from_excel(config):
@@ -228,29 +252,62 @@ def plot_from_excel(config):
     base_config = config.get('base_config', {})
     graph_type = base_config.get('graph_type', 'ode_time')
 
-    if not excel_file:
-        raise ValueError("Параметр 'excel_file' обязателен для type: from_excel")
+    sweep = config.get('sweep')
+
+    # Повтор сохраненного плана (--replay): задания и base_config берутся из файла плана
+    replay_plan = config.get('replay_plan')
+    if replay_plan:
+        header = load_plan_header(replay_plan)
+        base_config = header['base_config']
+        graph_type = header['graph_type']
+        config.setdefault('fallback_chain', header.get('fallback_chain'))
+
+    if not excel_file and not sweep and not replay_plan:
+        raise ValueError("Параметр 'excel_file' (или 'sweep') обязателен для type: from_excel")
     if not base_config:
         raise ValueError("Параметр 'base_config' обязателен для type: from_excel")
 
-    # Загружаем Excel таблицу
-    print(f"Загрузка Excel: {excel_file}")
-    if sheet_name:
-        print(f"Лист: {sheet_name}")
+    if replay_plan:
+        print(f"Повтор плана: {replay_plan}")
+        grouped_rows = None
+        total_graphs = sum(1 for _ in iter_plan_jobs(replay_plan))
+        print(f"Графиков в плане: {total_graphs}\n")
+    elif excel_file:
+        # Загружаем Excel таблицу
+        print(f"Загрузка Excel: {excel_file}")
+        if sheet_name:
+            print(f"Лист: {sheet_name}")
 
-    try:
-        loader = ExcelConfigLoader(excel_file, sheet_name)
-        loader.load_table()
-        loader.validate_table()
-    except Exception as e:
-        print(f"\n❌ Ошибка загрузки Excel: {str(e)}")
-        raise
+        try:
+            loader = ExcelConfigLoader(excel_file, sheet_name)
+            loader.load_table()
+            loader.validate_table()
+        except Exception as e:
+            print(f"\n❌ Ошибка загрузки Excel: {str(e)}")
+            raise
+
+        # Группируем строки по output (для объединения кривых на одном графике)
+        grouped_rows = loader.get_rows_grouped_by_output()
+        row_count = loader.row_count
+    else:
+        # Без Excel: одна базовая строка, все точки берутся из блока sweep
+        output = sweep.get('output', 'sweep_{index}.svg')
+        grouped_rows = {output: [{'output': output, '__row_number__': '-'}]}
+        row_count = 0
+
+    if replay_plan:
+        pass
+    elif has_sweep(grouped_rows, sweep):
+        # Прогон разворачивается лениво; число графиков считаем отдельным
+        # проходом, который форматирует только имена файлов
+        total_graphs = sum(1 for _ in iter_graph_jobs(grouped_rows, sweep))
+        print(f"Параметрический прогон: {total_graphs} графиков")
+        print(f"Всего строк в таблице: {row_count}\n")
+    else:
+        total_graphs = len(grouped_rows)
+        print(f"Найдено уникальных графиков (по output): {total_graphs}")
+        print(f"Всего строк в таблице: {row_count}\n")
 
-    # Группируем строки по output (для объединения кривых на одном графике)
-    grouped_rows = loader.get_rows_grouped_by_output()
-    total_graphs = len(grouped_rows)
-    print(f"Найдено уникальных графиков (по output): {total_graphs}")
-    print(f"Всего строк в таблице: {loader.row_count}\n")
 
     # Счетчики для отчета
     success_count = 0
@@ -260,80 +317,340 @@ def plot_from_excel(config):
 
     # Проверяем, нужна ли параллелизация
     parallel = config.get('parallel', False)
-    num_workers = config.get('num_workers', 8)
+    num_workers = config.get('num_workers') or default_num_workers()
+
+    # Задания (output, rows) создаются генератором по мере построения.
+    # В параллельном режиме графики с одинаковыми уравнениями идут подряд -
+    # так они попадают в один процесс и используют одну скомпилированную систему
+    if replay_plan:
+        def job_source():
+            return iter_plan_jobs(replay_plan)
+    else:
+        ordered_rows = _order_by_equations(grouped_rows, base_config) if parallel else grouped_rows
+
+        def job_source():
+            return iter_graph_jobs(ordered_rows, sweep)
+    graph_jobs = job_source()
+
+    # Заголовок плана: base_config, graph_type и цепочка попыток. Процессы пула
+    # читают его из файла один раз, а не получают с каждой пачкой
+    fallback_chain = config.get('fallback_chain') or DEFAULT_FALLBACK_CHAIN
+    header = plan_header(base_config, graph_type, fallback_chain)
+    if config.get('save_plan'):
+        saved = write_plan(config['save_plan'], header,
+                           (encode_jobs(chunk) for chunk in _batched(job_source(), 16)))
+        print(f"План сохранен: {config['save_plan']} ({saved} графиков)\n")
+
+    # Инкрементальное построение: графики, у которых не изменились конфигурация,
+    # входные данные и код построения и файлы которых на месте, пропускаются
+    # (build_manifest: false или --force - строить все заново)
+    manifest = BuildManifest(config.get('build_manifest', DEFAULT_MANIFEST_FILE), code_version(),
+                             vars(params_global))
+    # Машиночитаемый отчет (report/equilibria.csv, report/graphs.csv): строки
+    # дописываются по мере готовности графиков; asimptota.txt - по желанию
+    # (report: {text_log: false} - без него, равновесия не копятся в памяти)
+    report_settings = parse_report(config.get('report'))
+    if config.get('dry_run'):
+        report_settings['enabled'] = False
+    report = RunReport(report_settings)
+
+    # Журнал хода построения: каждый готовый график сразу дописывается в файл.
+    # С --resume графики, построенные прерванным запуском, пропускаются
+    # (journal: false - выключить)
+    journal = ProgressJournal(config.get('journal', DEFAULT_JOURNAL_FILE))
+    resumed = journal.completed() if config.get('resume') and journal.enabled else {}
+
+    # Оценка стоимости графиков: по признакам и по времени прошлых запусков.
+    # В параллельном режиме задания по умолчанию отправляются от самых дорогих
+    # (schedule: cost) - в пределах окна заданий (plan_windows), поэтому прогон
+    # не разворачивается в память целиком; schedule: order - в порядке таблицы
+    cost_model = CostModel(config.get('timings_file', DEFAULT_TIMINGS_FILE))
+    schedule = config.get('schedule', 'cost') if parallel else 'order'
+    need_costs = schedule == 'cost' or bool(config.get('dry_run'))
+
+    # output -> (хэш графика, оценка стоимости или None): конфигурация графика
+    # собирается один раз - в предварительном проходе
+    job_digests = {}
+    skipped_count = 0
+    resumed_count = 0
+    if manifest.enabled or journal.enabled:
+        for output_file, rows in job_source():
+            graph_config = _try_graph_config(rows, base_config, graph_type)
+            digest = manifest.digest(graph_config)
+            formats = graph_config.get('formats') if graph_config else None
+            entry = resumed.get(output_file)
+            if (entry is not None and digest is not None and entry.get('hash') == digest
+                    and all(os.path.exists(path) for path in output_files(output_file, formats))):
+                # Построен прерванным запуском и файлы на месте: равновесия - из журнала
+                resumed_count += 1
+                manifest.record(output_file, digest, entry['equilibria'])
+                report.add_graph(output_file, 'resumed', entry['equilibria'], entry.get('seconds'),
+                                 entry.get('attempt', 0))
+                if report.text_log:
+                    equilibria_results.extend(entry['equilibria'])
+            elif not config.get('force') and manifest.is_current(output_file, digest, formats):
+                skipped_count += 1
+                equilibria = manifest.equilibria(output_file)
+                report.add_graph(output_file, 'skipped', equilibria)
+                if report.text_log:
+                    equilibria_results.extend(equilibria)
+            else:
+                cost = cost_model.estimate(_safe_job_features(graph_config)) if need_costs else None
+                job_digests[output_file] = (digest, cost)
+        if skipped_count or resumed_count:
+            graph_jobs = (job for job in graph_jobs if job[0] in job_digests)
+            total_graphs = len(job_digests)
+            if resumed_count:
+                print(f"Продолжение по журналу {journal.path}: уже построено {resumed_count}")
+            print(f"Без изменений (пропускаются): {skipped_count}, к построению: {total_graphs}\n")
+
+    # Время этапов построения (разбор, компиляция, интегрирование, ...) по всем графикам прогона
+    stage_summary = StageSummary()
+
+    def record_build(output_file, result, attempt=0):
+        digest = job_digests.get(output_file, (None, None))[0]
+        success = result[0]
+        equilibria_info = result[3] if len(result) > 3 else None
+        timing = result[4] if len(result) > 4 else None
+        if success:
+            manifest.record(output_file, digest, equilibria_info)
+        else:
+            manifest.forget(output_file)
+        if success and timing:
+            stage_summary.add(output_file, timing.get('stages'), timing['seconds'])
+        journal.record(output_file, success, digest, equilibria_info,
+                       timing['seconds'] if timing else None, attempt, None if success else result[2])
+        report.add_graph(output_file, 'ok' if success else 'error', equilibria_info,
+                         timing['seconds'] if timing else None, attempt, None if success else result[2],
+                         timing.get('stages') if timing else None)
+
+    chunk_size = config.get('chunk_size') or max(1, min(16, total_graphs // (num_workers * 4)))
+
+    def estimate(job):
+        """Оценка стоимости задания (output, rows): из предварительного прохода или по конфигурации"""
+        known = job_digests.get(job[0])
+        if known is not None and known[1] is not None:
+            return known[1]
+        return cost_model.estimate(_safe_job_features(_try_graph_config(job[1], base_config, graph_type)))
+
+    def planned_chunks(jobs, on_estimate=None):
+        """Пачки (задания, оценка стоимости) в порядке отправки процессам"""
+        if schedule == 'cost':
+            def estimate_job(job):
+                cost = estimate(job)
+                if on_estimate is not None:
+                    on_estimate(cost)
+                return cost
+            return plan_windows(jobs, estimate_job, num_workers, config.get('chunk_size') or 16,
+                                config.get('schedule_window'))
+        return ((chunk, float(len(chunk))) for chunk in _batched(jobs, chunk_size))
+
+    if config.get('dry_run'):
+        # Только здесь план разворачивается целиком
+        if schedule == 'cost':
+            plan = list(planned_chunks(graph_jobs))
+        else:
+            size = chunk_size if parallel else 1
+            plan = [(chunk, sum(estimate(job) for job in chunk)) for chunk in _batched(graph_jobs, size)]
+        _print_schedule(plan, num_workers if parallel else 1, schedule)
+        return
+
+    journal.open(resume=bool(config.get('resume')))
+
+    # При schedule: cost полная оценка прогона уточняется по мере чтения окон
+    eta = ProgressETA(0.0 if schedule == 'cost' else float(total_graphs), time.monotonic)
+
+    def record_timing(result):
+        timing = result[4] if len(result) > 4 else None
+        if result[0] and timing:
+            cost_model.record(timing['features'], timing['seconds'])
 
     if parallel:
         # ===== ПАРАЛЛЕЛЬНЫЙ РЕЖИМ =====
-        print(f"Режим: ПАРАЛЛЕЛЬНЫЙ (воркеров: {num_workers})\n")
-
-        from multiprocessing import Pool
+        print(f"Режим: ПАРАЛЛЕЛЬНЫЙ (воркеров: {num_workers}, порядок: {schedule})\n")
 
-        # Подготавливаем данные для передачи в дочерние процессы
-        # Преобразуем params_global в словарь
-        params_global_dict = vars(params_global)
+        # Пул живет между вызовами: тяжелые модули и params_global загружаются
+        # инициализатором один раз на процесс, а не на каждое задание
+        pool = get_worker_pool(vars(params_global), solution_cache_config(), num_workers,
+                               config.get('maxtasksperchild'))
 
-        # Создаем список задач
-        tasks = [
-            (output_file, rows, base_config, graph_type, params_global_dict)
-            for output_file, rows in grouped_rows.items()
-        ]
+        # Жесткий лимит времени на график: зависший процесс останавливается,
+        # а график повторяется со следующей попыткой цепочки (другой метод/допуски)
+        task_timeout = float(config.get('task_timeout', DEFAULT_TASK_TIMEOUT))
 
-        print(f"Построение {len(tasks)} графиков...\n")
+        if config.get('save_plan'):
+            plan_path, temporary_plan = config['save_plan'], False
+        else:
+            fd, plan_path = tempfile.mkstemp(prefix='graph_plan_', suffix='.jsonl')
+            os.close(fd)
+            write_plan(plan_path, header)
+            temporary_plan = True
 
-        # Запускаем параллельное построение с timeout
-        with Pool(num_workers) as pool:
-            # Запускаем все задачи асинхронно
-            async_results = [(task[0], pool.apply_async(_build_single_graph, (task,))) for task in tasks]
+        # Сообщения процессов о начале графиков идут в ту же очередь, что и результаты
+        progress_queue = get_progress_queue()
 
-            # Собираем результаты с timeout
-            for idx, (output_file, async_result) in enumerate(async_results, 1):
+        # Временный план удаляется и при ошибке или Ctrl-C
+        try:
+            # Задания отправляются пачками (одна пачка - один процесс, общие уравнения
+            # компилируются один раз), и в очереди одновременно не больше 2 * num_workers
+            # пачек. Пачки сжимаются (utils.job_plan) по мере отправки, а результаты
+            # обрабатываются по мере готовности, а не в порядке отправки
+            chunk_source = ((encode_jobs(chunk), chunk_cost) for chunk, chunk_cost in
+                            planned_chunks(graph_jobs, lambda cost: eta.extrapolate(cost, total_graphs)))
+            retries = deque()   # (output_file, rows, попытка, оценка стоимости) - по одному графику
+            pending = {}        # chunk_id -> {'chunk', 'cost', 'running': (индекс, pid, время начала)}
+            completed = queue.Queue()
+            recovered = []      # графики, построенные не с первой попытки
+
+            def forward_progress():
+                for message in iter(progress_queue.get, None):
+                    completed.put(('progress',) + tuple(message))
+
+            threading.Thread(target=forward_progress, daemon=True).start()
+
+            print(f"Построение {total_graphs} графиков...\n")
+
+            def submit_chunk():
+                if retries:
+                    output_file, rows, attempt, chunk_cost = retries.popleft()
+                    chunk = encode_jobs([(output_file, rows, attempt)])
+                else:
+                    chunk, chunk_cost = next(chunk_source, (None, None))
+                    if not chunk:
+                        return False
+                chunk_id = next(_CHUNK_IDS)
+                pending[chunk_id] = {'chunk': chunk, 'cost': chunk_cost, 'running': None}
+                # Пачка несет только сжатые задания; base_config процесс берет из файла плана
+                pool.apply_async(
+                    _build_graph_chunk, (chunk_id, plan_path, chunk),
+                    callback=lambda result: completed.put(('done',) + tuple(result)),
+                    error_callback=lambda e, chunk_id=chunk_id: completed.put(('done', chunk_id, e, None))
+                )
+                return True
+
+            def stop_overdue():
+                """Останавливает процессы, превысившие task_timeout; возвращает окончательно неудачные графики"""
+                failed = []
+                now = time.time()
+                for chunk_id, info in list(pending.items()):
+                    if info['running'] is None or info['running'][2] + task_timeout > now:
+                        continue
+                    index, pid, _ = info['running']
+                    kill_worker(pid)
+                    del pending[chunk_id]
+
+                    # Результаты всей пачки потеряны вместе с процессом: графики до зависшего
+                    # повторяются той же попыткой (их решения уже в кэше), зависший - следующей
+                    items = _chunk_items(info['chunk'])
+                    item_cost = info['cost'] / len(items)
+                    for item_idx, (output_file, rows, attempt) in enumerate(items):
+                        if item_idx != index:
+                            retries.append((output_file, rows, attempt, item_cost))
+                            eta.total_cost += item_cost
+                        elif attempt + 1 < len(fallback_chain):
+                            print(f"Timeout: {output_file} ({_attempt_label(fallback_chain, attempt)}) > "
+                                  f"{task_timeout:.0f} с, процесс {pid} остановлен; "
+                                  f"повтор: {_attempt_label(fallback_chain, attempt + 1)}")
+                            retries.append((output_file, rows, attempt + 1, item_cost))
+                            eta.total_cost += item_cost
+                        else:
+                            failed.append(((output_file, rows, attempt),
+                                           (False, output_file,
+                                            f"Timeout: > {task_timeout:.0f} с во всех попытках ({len(fallback_chain)})",
+                                            None)))
+                            eta.update(item_cost)
+                return failed
+
+            idx = 0
+            cache_stats = {'hits': 0, 'misses': 0, 'stores': 0, 'evictions': 0}
+            for _ in range(num_workers * 2):
+                submit_chunk()
+
+            while pending:
+                # Ждём первое сообщение, но не дольше, чем до истечения лимита самого
+                # старого из выполняющихся графиков
+                deadlines = [info['running'][2] + task_timeout for info in pending.values() if info['running']]
+                timeout = max(0.0, min(deadlines) - time.time()) if deadlines else None
                 try:
-                    # Ждём результат максимум 120 секунд (для жёстких систем)
-                    result = async_result.get(timeout=120)
+                    message = completed.get(timeout=timeout)
+                except queue.Empty:
+                    message = None
+
+                if message is None:
+                    finished = stop_overdue()
+                elif message[0] == 'progress':
+                    _, chunk_id, index, pid, started = message
+                    if chunk_id in pending:
+                        pending[chunk_id]['running'] = (index, pid, started)
+                    continue
+                else:
+                    _, chunk_id, results, chunk_cache_stats = message
+                    if chunk_id not in pending:
+                        # Пачка уже остановлена по таймауту
+                        continue
+                    info = pending.pop(chunk_id)
+                    items = _chunk_items(info['chunk'])
+                    if chunk_cache_stats is None:
+                        # Ошибка на уровне пачки (results - исключение)
+                        results = [(False, output_file, f"Ошибка: {results}", None)
+                                   for output_file, rows, attempt in items]
+                    else:
+                        for key, value in chunk_cache_stats.items():
+                            cache_stats[key] += value
+                    finished = list(zip(items, results))
+                    eta.update(info['cost'])
+
+                while len(pending) < num_workers * 2 and submit_chunk():
+                    pass
+
+                remaining = eta.update(0.0)
+                eta_text = f", осталось ~{format_duration(remaining)}" if remaining is not None else ""
+
+                for (output_file, rows, attempt), result in finished:
+                    idx += 1
                     success = result[0]
                     data = result[2]
                     equilibria_info = result[3] if len(result) > 3 else None
+                    record_timing(result)
+                    record_build(output_file, result, attempt)
 
                     if success:
                         success_count += 1
+                        if attempt > 0:
+                            recovered.append((output_file, _attempt_label(fallback_chain, attempt)))
                         # Сохраняем информацию о равновесиях
-                        if equilibria_info:
+                        if equilibria_info and report.text_log:
                             # Теперь equilibria_info - список равновесий для графика
                             if isinstance(equilibria_info, list):
                                 equilibria_results.extend(equilibria_info)
                             else:
                                 equilibria_results.append(equilibria_info)
+                        print(f"Шаг: {idx}/{total_graphs}{eta_text}")
                     else:
-                        error_msg = data
                         error_count += 1
                         errors_list.append({
                             'output': output_file,
-                            'error': error_msg,
-                            'rows': ['?']
+                            'error': data,
+                            'rows': [row.get('__row_number__', '?') for row in rows]
                         })
-
-                except Exception as e:
-                    # Timeout или другая ошибка
-                    error_count += 1
-                    errors_list.append({
-                        'output': output_file,
-                        'error': f"Timeout или ошибка: {str(e)}",
-                        'rows': ['?']
-                    })
-                    print(f"Шаг: {idx}/{len(tasks)} [TIMEOUT/ERROR]")
-                    continue
-
-                print(f"Шаг: {idx}/{len(tasks)}")
+                        print(f"Шаг: {idx}/{total_graphs} [TIMEOUT/ERROR]{eta_text}")
+        finally:
+            progress_queue.put(None)
+            if temporary_plan:
+                os.remove(plan_path)
 
     else:
         # ===== ПОСЛЕДОВАТЕЛЬНЫЙ РЕЖИМ (по умолчанию) =====
         # Обрабатываем каждую группу строк (каждый выходной файл)
-        for idx, (output_file, rows) in enumerate(grouped_rows.items(), 1):
+        for idx, (output_file, rows) in enumerate(graph_jobs, 1):
             print(f"[{idx}/{total_graphs}] {output_file} ({len(rows)} кривых) ... ", end='')
+            start = time.perf_counter()
+            before = snapshot()
 
             try:
                 # Создаем конфигурацию для этого графика
                 graph_config = _create_graph_config_from_rows(rows, base_config, graph_type)
+                features = _safe_job_features(graph_config)
 
                 # Вызываем соответствующую функцию построения
                 # ВАЖНО: используем graph_config['type'], т.к. он может быть переопределен из Excel
@@ -344,23 +661,32 @@ def plot_from_excel(config):
                     equilibria_info = plot_ode_time(graph_config)
                 elif actual_type == 'phase_portrait':
                     equilibria_info = plot_phase_portrait(graph_config)
+                elif actual_type == 'bifurcation':
+                    equilibria_info = plot_bifurcation(graph_config)
                 elif actual_type == 'function':
                     plot_function(graph_config)
                 else:
                     raise ValueError(f"Неизвестный graph_type: {actual_type}")
 
                 # Сохраняем информацию о равновесиях
-                if equilibria_info:
+                if equilibria_info and report.text_log:
                     # Теперь equilibria_info - список равновесий для графика
                     if isinstance(equilibria_info, list):
                         equilibria_results.extend(equilibria_info)
                     else:
                         equilibria_results.append(equilibria_info)
 
-                print("[OK] создан")
+                seconds = time.perf_counter() - start
+                cost_model.record(features, seconds)
+                record_build(output_file, (True, output_file, len(rows), equilibria_info,
+                                           {'features': features, 'seconds': seconds, 'stages': since(before)}))
+                remaining = eta.update(1.0)
+                print(f"[OK] создан ({seconds:.1f} с, осталось ~{format_duration(remaining)})")
                 success_count += 1
 
             except Exception as e:
+                eta.update(1.0)
+                record_build(output_file, (False, output_file, f"{type(e).__name__}: {str(e)}", None))
                 print(f"[ERROR] ошибка")
                 error_count += 1
                 import traceback
@@ -374,11 +700,32 @@ def plot_from_excel(config):
                     'rows': [row.get('__row_number__', '?') for row in rows]
                 })
 
+    if not parallel:
+        cache_stats = get_solution_cache().stats()
+    cost_model.save()
+    manifest.save()
+    journal.close()
+    report_files = report.close()
+
     # Выводим итоговый отчет
     print(f"\n{'='*60}")
     print(f"РЕЗУЛЬТАТ:")
     print(f"  Успешно построено: {success_count}")
     print(f"  Ошибок: {error_count}")
+    if manifest.enabled:
+        print(f"  Пропущено (без изменений): {skipped_count}, перестроено: {success_count + error_count}")
+    if resumed_count:
+        print(f"  Построено до прерывания (по журналу): {resumed_count}")
+    if report_files:
+        print(f"  Отчет: {', '.join(report_files)}")
+    if get_solution_cache().enabled:
+        print(f"  {format_cache_report(cache_stats)}")
+    for line in stage_summary.format().splitlines():
+        print(f"  {line}")
+    if parallel and recovered:
+        print(f"  Построено не с первой попытки: {len(recovered)}")
+        for output_file, label in recovered:
+            print(f"    • {output_file}: {label}")
     print(f"{'='*60}\n")
 
     # Если были ошибки, выводим детали
@@ -394,6 +741,130 @@ def plot_from_excel(config):
         print(f"Информация о равновесиях сохранена в asimptota.txt ({len(equilibria_results)} графиков)\n")
 
 
+def _try_graph_config(rows, base_config, graph_type):
+    """Конфигурация графика для оценки стоимости (None, если строки с ошибкой)"""
+    try:
+        return _create_graph_config_from_rows(rows, base_config, graph_type)
+    except Exception:
+        return None
+
+
+def _safe_job_features(graph_config):
+    """Признаки графика для модели стоимости (None, если их не удалось извлечь)"""
+    if graph_config is None:
+        return None
+    try:
+        return job_features(graph_config)
+    except Exception:
+        return None
+
+
+def _print_schedule(planned_chunks, num_workers, schedule):
+    """Печатает план построения (--dry-run) и оценку общего времени"""
+    print(f"План построения ({'от дорогих к дешевым' if schedule == 'cost' else 'в порядке таблицы'}, "
+          f"процессов: {num_workers}):\n")
+    print(f"  {'пачка':>5}  {'оценка, с':>9}  график")
+    for chunk_idx, (chunk, chunk_cost) in enumerate(planned_chunks, 1):
+        for job_idx, (output_file, rows) in enumerate(chunk):
+            label = f"{chunk_idx:>5}" if job_idx == 0 else ' ' * 5
+            cost = f"{chunk_cost:9.2f}" if job_idx == 0 else ' ' * 9
+            print(f"  {label}  {cost}  {output_file} ({len(rows)} кривых)")
+
+    total = sum(cost for _, cost in planned_chunks)
+    wall = simulate_wall_time([cost for _, cost in planned_chunks], num_workers)
+    print(f"\nСуммарная оценка: {format_duration(total)}, "
+          f"ожидаемое время построения: {format_duration(wall)}\n")
+
+
+def _attempt_label(fallback_chain, attempt):
+    """Описание попытки цепочки для отчета: 'попытка 2/3: BDF, rtol=1e-06'"""
+    overrides = fallback_chain[attempt] if fallback_chain else {}
+    settings = ', '.join(str(value) if key == 'solver_method' else f"{key}={value}"
+                         for key, value in overrides.items())
+    return f"попытка {attempt + 1}/{len(fallback_chain)}: {settings or 'как в конфигурации'}"
+
+
+def _apply_solver_overrides(graph_config, overrides):
+    """
+    Подставляет настройки попытки цепочки (solver_method, rtol, atol, ...)
+    во все кривые графика: solver_method - в кривую, остальное - в ее params.
+    """
+    if not overrides:
+        return
+    param_overrides = {key: value for key, value in overrides.items() if key != 'solver_method'}
+    for curve in graph_config.get('curves') or []:
+        if 'solver_method' in overrides:
+            curve['solver_method'] = overrides['solver_method']
+        if param_overrides:
+            curve['params'] = dict(curve.get('params') or {}, **param_overrides)
+
+
+def _batched(iterable, size):
+    """Разбивает задания на списки по size штук (последний может быть короче)"""
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def _chunk_items(chunk):
+    """Задания сжатой пачки: (output_file, rows, номер попытки; по умолчанию 0)"""
+    return [(output_file, rows, extra[0] if extra else 0) for output_file, rows, *extra in decode_jobs(chunk)]
+
+
+def _build_graph_chunk(chunk_id, plan_path, chunk):
+    """
+    Строит пачку графиков в одном процессе пула (см. _build_single_graph).
+
+    Графики пачки обычно имеют одинаковые уравнения, поэтому разобранная и
+    скомпилированная система берется из кэша процесса (get_ode_system).
+    params_global и кэш решений уже настроены инициализатором пула, а
+    base_config, graph_type и цепочка попыток читаются из заголовка плана
+    один раз на процесс.
+
+    Параметры:
+    - plan_path: файл плана (utils.job_plan), в котором записан заголовок
+    - chunk: сжатые задания (output_file, rows[, номер попытки в fallback_chain])
+
+    Возвращает:
+    - (chunk_id, результаты _build_single_graph, статистика кэша решений за пачку)
+    """
+    header = load_plan_header(plan_path)
+    base_config, graph_type = header['base_config'], header['graph_type']
+    fallback_chain = header.get('fallback_chain')
+
+    cache = get_solution_cache()
+    before = cache.stats()
+
+    results = []
+    for index, (output_file, rows, attempt) in enumerate(_chunk_items(chunk)):
+        # Главный процесс отсчитывает task_timeout от этого сообщения
+        report_progress(chunk_id, index)
+        overrides = fallback_chain[attempt] if fallback_chain else None
+        results.append(_build_single_graph((output_file, rows, base_config, graph_type, overrides)))
+
+    after = cache.stats()
+    return chunk_id, results, {key: after[key] - before[key] for key in after}
+
+
+def _order_by_equations(grouped_rows, base_config):
+    """
+    Упорядочивает группы строк так, чтобы графики с одинаковыми уравнениями
+    шли подряд (порядок внутри одинаковых уравнений сохраняется).
+    """
+    def equations_key(item):
+        row = item[1][0]
+        equations = [str(row[key]) for key in sorted(row) if str(key).startswith('equation_') and row[key]]
+        return tuple(equations) if equations else tuple(base_config.get('equations') or ())
+
+    order = {}
+    for item in grouped_rows.items():
+        order.setdefault(equations_key(item), []).append(item)
+    return dict(item for items in order.values() for item in items)
+
+
 def _create_graph_config_from_rows(rows, base_config, graph_type):
     """
     Создает конфигурацию графика из одной или нескольких строк Excel
@@ -474,6 +945,9 @@ def _create_graph_config_from_rows(rows, base_config, graph_type):
                 if not has_valid_ylim and 'ylim' in config.get('axes', {}):
                     config['axes']['ylim'] = None
 
+        elif actual_graph_type == 'bifurcation':
+            config['curves'] = [_create_bifurcation_curve(config)]
+
         # Автоопределение настроек осей на основе созданных кривых
         if 'curves' in config and config['curves']:
             config['axes'] = ConfigMerger.auto_detect_axes_settings(config['curves'], config.get('axes', {}))
@@ -524,12 +998,41 @@ def _create_graph_config_from_rows(rows, base_config, graph_type):
         elif base_config.get('dpi'):
             config['dpi'] = base_config['dpi']
 
+        # Дополнительные форматы файла (из base_config или --formats)
+        if 'formats' in base_config:
+            config['formats'] = base_config['formats']
+
+        # Прореживание кривых (из первой строки или base_config)
+        if rows[0].get('decimation'):
+            config['decimation'] = rows[0]['decimation']
+        elif 'decimation' in base_config:
+            config['decimation'] = base_config['decimation']
+
         # Обрабатываем заголовок (из первой строки или base_config)
         if rows[0].get('title'):
             config['title'] = rows[0]['title']
         elif base_config.get('title'):
             config['title'] = base_config['title']
 
+        # Обрабатываем ensemble (из первой строки или base_config)
+        ensemble = rows[0].get('ensemble')
+        if ensemble is None:
+            ensemble = base_config.get('ensemble')
+        if ensemble is not None:
+            if isinstance(ensemble, str):
+                config['ensemble'] = ensemble.lower() in ('true', 'yes', '1', 'да')
+            else:
+                config['ensemble'] = bool(ensemble)
+
+        # Обрабатываем all_equilibria (из первой строки или base_config)
+        all_equilibria = rows[0].get('all_equilibria')
+        if all_equilibria is not None:
+            if isinstance(all_equilibria, str):
+                all_equilibria = all_equilibria.lower() in ('true', 'yes', '1', 'да')
+            config['all_equilibria'] = {'enabled': bool(all_equilibria)}
+        elif base_config.get('all_equilibria'):
+            config['all_equilibria'] = base_config['all_equilibria']
+
         # Обрабатываем plot_variables (из первой строки или base_config)
         if rows[0].get('plot_variables'):
             config['plot_variables'] = rows[0]['plot_variables']
@@ -639,15 +1142,88 @@ def _create_graph_config_from_rows(rows, base_config, graph_type):
                 }
                 config['curves'].append(curve)
 
+            elif actual_graph_type == 'bifurcation':
+                config['curves'].append(_create_bifurcation_curve(row_config))
+
         # Автоопределение настроек осей на основе созданных кривых
         config['axes'] = ConfigMerger.auto_detect_axes_settings(config['curves'], config.get('axes', {}))
 
     return config
 
 
+def _create_bifurcation_curve(row_config):
+    """
+    Создает кривую бифуркационной диаграммы из объединенной конфигурации строки.
+
+    Стили ветви берутся из bifurcation_styles ({'stable': ..., 'unstable': ...}),
+    иначе из стиля переменной по оси Y (неустойчивая часть - пунктиром).
+    """
+    variable_names = row_config.get('variable_names')
+    variable = row_config.get('bifurcation_variable') or variable_names[0]
+
+    styles = row_config.get('bifurcation_styles')
+    if styles is None:
+        var_styles = row_config.get('styles') or []
+        index = variable_names.index(variable)
+        style = dict(var_styles[index]) if index < len(var_styles) and var_styles[index] else {}
+        style.pop('use_right_axis', None)
+        styles = {'stable': style, 'unstable': dict(style, linestyle='--')}
+
+    return {
+        'equations': row_config.get('equations'),
+        'variable_names': variable_names,
+        'initial_conditions': row_config.get('initial_conditions'),
+        'params': row_config.get('params', {}),
+        'continuation': row_config.get('continuation'),
+        'variable': variable,
+        'styles': styles,
+        'solver_method': row_config.get('solver_method')
+    }
+
+
+def _solve_curve_ensembles(plotter, curves):
+    """
+    Интегрирует кривые, отличающиеся только начальными условиями, одним ансамблем.
+
+    Кривые группируются по (уравнения, переменные, параметры, t_span, метод);
+    каждая группа из 2+ кривых решается одним вызовом ODEPlotter.solve_ensemble.
+
+    Возвращает:
+    - словарь {индекс кривой: (t, y)} для кривых, решенных в ансамбле
+    """
+    groups = {}
+    for idx, curve in enumerate(curves):
+        key = (
+            tuple(curve['equations']),
+            tuple(curve['variable_names']),
+            repr(sorted((curve.get('params') or {}).items())),
+            tuple(curve['t_span']),
+            curve.get('solver_method')
+        )
+        groups.setdefault(key, []).append(idx)
+
+    solutions = {}
+    for indices in groups.values():
+        if len(indices) < 2:
+            continue
+        first = curves[indices[0]]
+        t, Y = plotter.solve_ensemble(
+            equations_latex=first['equations'],
+            variable_names=first['variable_names'],
+            initial_conditions_list=[curves[idx]['initial_conditions'] for idx in indices],
+            params=first.get('params', {}),
+            t_span=first['t_span'],
+            solver_method=first.get('solver_method')
+        )
+        for k, idx in enumerate(indices):
+            solutions[idx] = (t, Y[k])
+    return solutions
+
+
 def plot_function(config):
     dpi = config.get('dpi', 300)
     plotter = FunctionPlotter(vars(params_global), dpi=dpi)
+    plotter.set_decimation(config.get('decimation'))
 
     for curve in config['curves']:
         plotter.add_curve_from_latex(
@@ -703,7 +1279,7 @@ def plot_function(config):
     #    plotter.ax.legend()
 
     output_path = os.path.join('output', config['output']) # сохраняем в output\1
-    plotter.save(output_path)                              # сохраняем график в формате SVG
+    plotter.save(output_path, formats=config.get('formats'))  # сохраняем график (SVG + дополнительные форматы)
     if not config.get('_silent', False):
         print(f"График создан: {output_path}")
 
@@ -711,6 +1287,7 @@ def plot_function(config):
 def plot_ode_time(config):
     dpi = config.get('dpi', 300)
     plotter = ODEPlotter(vars(params_global), dpi=dpi)
+    plotter.set_decimation(config.get('decimation'))
 
     # ВАЖНО: Если используется dual_y_axis, создаем вторую ось ДО добавления кривых
     axes = config.get('axes', {})
@@ -728,7 +1305,10 @@ def plot_ode_time(config):
     # Собираем информацию о равновесиях (список для всех кривых)
     equilibria_info_list = []
 
-    for curve in config['curves']:
+    # Ансамблевый режим: кривые с разными начальными условиями интегрируются вместе
+    ensemble_solutions = _solve_curve_ensembles(plotter, config['curves']) if config.get('ensemble') else {}
+
+    for curve_idx, curve in enumerate(config['curves']):
         # Фильтруем стили на основе plot_variables
         variable_names = curve['variable_names']
         original_styles = curve['styles']
@@ -761,11 +1341,14 @@ def plot_ode_time(config):
             t_span=curve['t_span'],
             style_list=filtered_styles,
             solver_method=curve.get('solver_method'),
-            equilibria_config=curve.get('equilibria')
+            equilibria_config=curve.get('equilibria'),
+            solution=ensemble_solutions.get(curve_idx)
         )
 
-        # Сохраняем информацию о равновесии для этой кривой
+        # Сохраняем информацию о равновесии для этой кривой (номер кривой - с 1, как в отчете)
         if eq_info:
+            eq_info['curve'] = curve_idx + 1
+            eq_info['source'] = 'curve'
             equilibria_info_list.append(eq_info)
 
     plotter.set_axes(
@@ -815,7 +1398,7 @@ def plot_ode_time(config):
         plotter.set_title(config['title'])
 
     output_path = os.path.join('output', config['output'])
-    plotter.save(output_path)
+    plotter.save(output_path, formats=config.get('formats'))
     if not config.get('_silent', False):
         print(f"График создан: {output_path}")
 
@@ -831,6 +1414,7 @@ def plot_ode_time(config):
 def plot_phase_portrait(config):
     dpi = config.get('dpi', 300)
     plotter = ODEPlotter(vars(params_global), dpi=dpi)
+    plotter.set_decimation(config.get('decimation'))
 
     # Сначала установить пределы осей
     axes = config.get('axes', {})
@@ -838,36 +1422,32 @@ def plot_phase_portrait(config):
         plotter.ax.set_xlim(axes['xlim'])
         plotter.ax.set_ylim(axes['ylim'])
 
-    # Затем построить векторное поле (если есть)
+    # Затем построить векторное поле и изоклины (нуль-клины) - линии, где ds/dt=0 и dw/dt=0.
+    # Оба слоя считаются на сетке одним проходом
     vector_field = config.get('vector_field')
-    if vector_field and vector_field.get('enabled', False):
-        first_curve = config['curves'][0]
-        plotter.add_vector_field(
-            equations_latex=first_curve['equations'],
-            variable_names=first_curve['variable_names'],
-            params=first_curve.get('params', {}),
-            var_indices=first_curve['var_indices'],
-            field_config=vector_field
-        )
-
-    # Построить изоклины (нуль-клины) - линии, где ds/dt=0 и dw/dt=0
     isoclines = config.get('isoclines')
-    if isoclines and isoclines.get('enabled', False):
+    field_config = vector_field if vector_field and vector_field.get('enabled', False) else None
+    isocline_config = isoclines if isoclines and isoclines.get('enabled', False) else None
+    if field_config or isocline_config:
         first_curve = config['curves'][0]
-        plotter.add_isoclines(
+        plotter.add_phase_overlays(
             equations_latex=first_curve['equations'],
             variable_names=first_curve['variable_names'],
             params=first_curve.get('params', {}),
             var_indices=first_curve['var_indices'],
-            isocline_config=isoclines
+            field_config=field_config,
+            isocline_config=isocline_config
         )
 
     # Собираем информацию о равновесиях (список для всех кривых)
     equilibria_info_list = []
 
+    # Ансамблевый режим: кривые с разными начальными условиями интегрируются вместе
+    ensemble_solutions = _solve_curve_ensembles(plotter, config['curves']) if config.get('ensemble') else {}
+
     # Построить траектории
-    for curve in config['curves']:
-        plotter.solve_and_plot_phase(
+    for curve_idx, curve in enumerate(config['curves']):
+        solution = plotter.solve_and_plot_phase(
             equations_latex=curve['equations'],
             variable_names=curve['variable_names'],
             initial_conditions=curve['initial_conditions'],
@@ -875,7 +1455,8 @@ def plot_phase_portrait(config):
             t_span=curve['t_span'],
             var_indices=curve['var_indices'],
             style=curve['style'],
-            solver_method=curve.get('solver_method')
+            solver_method=curve.get('solver_method'),
+            solution=ensemble_solutions.get(curve_idx)
         )
 
         # Для фазового портрета: ВСЕГДА найти равновесие и проанализировать устойчивость
@@ -900,25 +1481,46 @@ def plot_phase_portrait(config):
                 temp_config[var] = {}
             temp_config[var]['show'] = False
 
-        # Находим равновесие с анализом устойчивости
+        # Находим равновесие с анализом устойчивости, продолжая уже
+        # построенную траекторию с конца t_span
         try:
-            system = ODESystem(curve['equations'], curve['variable_names'])
+            system = get_ode_system(curve['equations'], curve['variable_names'])
             merged_params = merge_params(vars(params_global), curve.get('params', {}))
-            param_values = [merged_params[str(p)] for p in system.params]
+            param_values = system.param_vector(merged_params)
 
             eq_info = plotter._add_equilibria(
                 system, curve['variable_names'], curve['initial_conditions'],
                 param_values, curve['t_span'], temp_config,
-                analyze_stability=True
+                analyze_stability=True,
+                solution=solution
             )
 
             # Добавляем в список если нашли равновесие
             if eq_info:
+                eq_info['curve'] = curve_idx + 1
+                eq_info['source'] = 'curve'
                 equilibria_info_list.append(eq_info)
         except Exception as e:
             # Если анализ равновесия не удался, просто пропускаем
             print(f"Warning: Could not analyze equilibrium for phase portrait: {e}")
 
+    # Все равновесия в области графика (включая седла и неустойчивые) -
+    # ищутся методом Ньютона из многих стартовых точек, без интегрирования
+    all_equilibria = config.get('all_equilibria')
+    if all_equilibria and all_equilibria.get('enabled', True):
+        first_curve = config['curves'][0]
+        all_equilibria_info = plotter.add_all_equilibria(
+            equations_latex=first_curve['equations'],
+            variable_names=first_curve['variable_names'],
+            params=first_curve.get('params', {}),
+            var_indices=first_curve['var_indices'],
+            config=all_equilibria
+        )
+        # Равновесия области не относятся к конкретной кривой
+        for eq_info in all_equilibria_info:
+            eq_info['source'] = 'all_equilibria'
+        equilibria_info_list.extend(all_equilibria_info)
+
     plotter.set_axes(
         xlim=axes.get('xlim'),
         ylim=axes.get('ylim'),
@@ -963,7 +1565,7 @@ def plot_phase_portrait(config):
         plotter.set_title(config['title'])
 
     output_path = os.path.join('output', config['output'])
-    plotter.save(output_path)
+    plotter.save(output_path, formats=config.get('formats'))
     if not config.get('_silent', False):
         print(f"График создан: {output_path}")
 
@@ -976,11 +1578,105 @@ def plot_phase_portrait(config):
     return None
 
 
+def plot_bifurcation(config):
+    dpi = config.get('dpi', 300)
+    plotter = ODEPlotter(vars(params_global), dpi=dpi)
+    plotter.set_decimation(config.get('decimation'))
+    axes = config.get('axes', {})
+
+    # Точки бифуркаций (для asimptota.txt)
+    bifurcation_info_list = []
+
+    for curve_idx, curve in enumerate(config['curves']):
+        continuation = curve['continuation']
+        result = plotter.plot_bifurcation(
+            equations_latex=curve['equations'],
+            variable_names=curve['variable_names'],
+            initial_conditions=curve['initial_conditions'],
+            params=curve.get('params', {}),
+            continuation=continuation,
+            variable=curve.get('variable'),
+            styles=curve.get('styles'),
+            solver_method=curve.get('solver_method')
+        )
+
+        if not config.get('_silent', False):
+            print(f"Продолжение по {continuation['parameter']}: {len(result['param'])} точек, {result['message']}")
+
+        for bifurcation in result['bifurcations']:
+            state = bifurcation['state']
+            bifurcation_info_list.append({
+                's_star': float(state[0]),
+                'w_star': float(state[1]) if len(state) > 1 else None,
+                'converged': True,
+                'method': f"{bifurcation['type']} при {result['parameter']} = {bifurcation['param']:.6g}",
+                'curve': curve_idx + 1,
+                'source': 'bifurcation'
+            })
+
+    plotter.set_axes(
+        xlim=axes.get('xlim'),
+        ylim=axes.get('ylim'),
+        xlabel=axes.get('xlabel', config['curves'][0]['continuation']['parameter']),
+        ylabel=axes.get('ylabel', ''),
+        grid=axes.get('grid', True),
+        spines=axes.get('spines'),
+        grid_style=axes.get('grid_style'),
+        xticks=axes.get('xticks'),
+        yticks=axes.get('yticks'),
+        axis_labels_at_end=axes.get('axis_labels_at_end', False),
+        xticks_minor=axes.get('xticks_minor'),
+        yticks_minor=axes.get('yticks_minor')
+    )
+
+    # Устанавливаем заголовок графика, если он указан в конфигурации
+    if 'title' in config:
+        plotter.set_title(config['title'])
+
+    output_path = os.path.join('output', config['output'])
+    plotter.save(output_path, formats=config.get('formats'))
+    if not config.get('_silent', False):
+        print(f"График создан: {output_path}")
+
+    if bifurcation_info_list:
+        for info in bifurcation_info_list:
+            info['output'] = config['output']
+            info['type'] = 'bifurcation'
+        return bifurcation_info_list
+    return None
+
+
 if __name__ == '__main__':
     parser = argparse.ArgumentParser(description='Построение графиков из YAML конфигурации')
     parser.add_argument('--config', required=True, help='Путь к YAML файлу конфигурации')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='Только показать план построения (type: from_excel) и оценку времени')
+    parser.add_argument('--force', action='store_true',
+                        help='Строить все графики заново, даже если они не изменились (type: from_excel)')
+    parser.add_argument('--resume', action='store_true',
+                        help='Продолжить прерванный запуск (type: from_excel): пропустить графики из журнала')
+    parser.add_argument('--save-plan', metavar='FILE',
+                        help='Сохранить план заданий (type: from_excel) в файл для повтора через --replay')
+    parser.add_argument('--replay', metavar='FILE',
+                        help='Построить графики по сохраненному плану заданий вместо Excel таблицы')
+    parser.add_argument('--formats', nargs='+', choices=['svg', 'pdf', 'png'],
+                        help='Дополнительные форматы файлов графиков, например: --formats pdf png')
 
     args = parser.parse_args()
 
     config = load_config(args.config)
+    if args.dry_run:
+        config['dry_run'] = True
+    if args.force:
+        config['force'] = True
+    if args.resume:
+        config['resume'] = True
+    if args.save_plan:
+        config['save_plan'] = args.save_plan
+    if args.replay:
+        config['replay_plan'] = args.replay
+    if args.formats:
+        config['formats'] = args.formats
+        if isinstance(config.get('base_config'), dict):
+            config['base_config']['formats'] = args.formats
     plot_from_config(config)
\ No newline at end of file
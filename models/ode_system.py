@@ -1,13 +1,22 @@
 import sympy as sp
 from sympy.parsing.latex import parse_latex
+from sympy.printing.numpy import NumPyPrinter
 import numpy as np
+from functools import lru_cache
+
+from utils.stage_timer import stage
+
+
+# Сколько разобранных систем держим в памяти процесса (LRU)
+SYSTEM_CACHE_SIZE = 128
 
 
 class ODESystem:
     def __init__(self, equations_latex, variable_names):
         self.equations_latex = equations_latex
         self.variable_names = variable_names
-        self.equations = [parse_latex(eq) for eq in equations_latex]
+        with stage('parse'):
+            self.equations = [parse_latex(eq) for eq in equations_latex]
 
         self.variables = [sp.Symbol(name) for name in variable_names]
 
@@ -15,30 +24,239 @@ class ODESystem:
         for eq in self.equations:
             all_symbols.update(eq.free_symbols)
 
-        self.params = []
-        for sym in all_symbols:
-            if sym not in self.variables and str(sym) != 't':
-                self.params.append(sym)
+        # Сортируем по имени: порядок параметров одинаков во всех процессах
+        # (порядок обхода set зависит от хэш-рандомизации строк)
+        self.params = sorted(
+            (sym for sym in all_symbols if sym not in self.variables and str(sym) != 't'),
+            key=str
+        )
 
+        # Ядро с параметрами в виде аргументов: f(t, *y, *param_values)
         self.func_compiled = None
+        # Слитое CSE-ядро: kernel(t, y, p, out) пишет производные в out
+        self.kernel = None
+        # Ядро аналитической матрицы Якоби: jac_kernel(t, y, p, out)
+        self.jac_kernel = None
 
-    def compile(self, param_values):
+    def compile(self, param_values=None):
+        """
+        Компилирует правые части системы.
+
+        Без param_values (основной режим) lambdify вызывается один раз, а
+        параметры передаются как дополнительные позиционные аргументы:
+        f(t, *y, *param_values). Одно ядро обслуживает любые наборы параметров,
+        символьная подстановка не нужна.
+
+        С param_values возвращается отдельная функция f(t, *y) с подставленными
+        значениями (старый режим, self.func_compiled не меняется).
+        """
         t = sp.Symbol('t')
 
-        substituted = []
-        for eq in self.equations:
-            expr = eq
-            for param, value in zip(self.params, param_values):
-                expr = expr.subs(param, value)
-            substituted.append(expr)
+        if param_values is not None:
+            substituted = [eq.subs(dict(zip(self.params, param_values))) for eq in self.equations]
+            with stage('compile'):
+                return sp.lambdify([t] + self.variables, substituted, 'numpy')
 
-        args = [t] + self.variables
-        self.func_compiled = sp.lambdify(args, substituted, 'numpy')
+        if self.func_compiled is None:
+            args = [t] + self.variables + self.params
+            with stage('compile'):
+                self.func_compiled = sp.lambdify(args, self.equations, 'numpy')
         return self.func_compiled
 
+    def param_vector(self, params):
+        """Упаковывает словарь параметров в вектор в порядке self.params"""
+        return np.array([params[str(p)] for p in self.params], dtype=float)
+
+    def _generate_kernel(self, exprs, targets):
+        """
+        Генерирует функцию kernel(t, y, p, out), которая пишет exprs в out[targets].
+
+        Общие подвыражения выделяются через sympy.cse и считаются один раз.
+        Символы заменяются на безопасные имена: в LaTeX именах бывают фигурные
+        скобки и прочие символы, недопустимые в Python коде.
+        """
+        t_sym = sp.Symbol('t')
+        mapping = {t_sym: sp.Symbol('_t')}
+        mapping.update({var: sp.Symbol(f'_y{i}') for i, var in enumerate(self.variables)})
+        mapping.update({par: sp.Symbol(f'_p{i}') for i, par in enumerate(self.params)})
+        exprs = [sp.sympify(expr).xreplace(mapping) for expr in exprs]
+
+        replacements, reduced = sp.cse(exprs, symbols=sp.numbered_symbols('_x'))
+
+        printer = NumPyPrinter({'fully_qualified_modules': True, 'inline': True,
+                                'allow_unknown_functions': False})
+        not_supported = set()
+
+        def to_code(expr):
+            # doprint сбрасывает _not_supported на каждом вызове - копим сами
+            code = printer.doprint(expr)
+            not_supported.update(printer._not_supported)
+            return code
+
+        lines = ['def _kernel(_t, y, p, out):']
+        lines += [f'    _y{i} = y[{i}]' for i in range(len(self.variables))]
+        lines += [f'    _p{i} = p[{i}]' for i in range(len(self.params))]
+        lines += [f'    {sym} = {to_code(expr)}' for sym, expr in replacements]
+        lines += [f'    out[{target}] = {to_code(expr)}' for target, expr in zip(targets, reduced)]
+        lines.append('    return out')
+
+        if not_supported:
+            # Функции без numpy-аналога: оборачиваем обычное lambdify ядро
+            args = [sp.Symbol('_t')] + [mapping[var] for var in self.variables] + \
+                   [mapping[par] for par in self.params]
+            func = sp.lambdify(args, exprs, 'numpy')
+            index = [tuple(int(i) for i in str(target).split(',')) for target in targets]
+
+            def _kernel(_t, y, p, out):
+                for idx, value in zip(index, func(_t, *y, *p)):
+                    out[idx] = value
+                return out
+            return _kernel
+
+        namespace = {'numpy': np}
+        exec('\n'.join(lines), namespace)
+        return namespace['_kernel']
+
+    def compile_kernel(self):
+        """
+        Генерирует одно слитое ядро для всех уравнений системы.
+
+        Общие подвыражения (например, w^{(1-2)} или \\exp(h*s)) выделяются через
+        sympy.cse и считаются один раз на вызов, а результат пишется в
+        переданный буфер out вместо создания списка и np.array на каждом шаге.
+
+        Возвращает:
+        - функцию kernel(t, y, p, out) -> out, где y - состояние (компоненты
+          могут быть массивами одной формы), p - вектор параметров
+          в порядке self.params
+        """
+        if self.kernel is None:
+            targets = [str(i) for i in range(len(self.equations))]
+            with stage('compile'):
+                self.kernel = self._generate_kernel(self.equations, targets)
+        return self.kernel
+
+    def compile_jacobian(self):
+        """
+        Строит аналитическую матрицу Якоби J_ij = ∂f_i/∂y_j через sympy
+        и компилирует ее в ядро jac_kernel(t, y, p, out) рядом с правыми частями.
+
+        Используется неявными методами solve_ivp (Radau, BDF, LSODA) через jac=,
+        уточнением равновесий и анализом устойчивости вместо конечных разностей.
+        """
+        if self.jac_kernel is None:
+            with stage('compile'):
+                n = len(self.variables)
+                jacobian = sp.Matrix(self.equations).jacobian(self.variables)
+                exprs = [jacobian[i, j] for i in range(n) for j in range(n)]
+                targets = [f'{i}, {j}' for i in range(n) for j in range(n)]
+                self.jac_kernel = self._generate_kernel(exprs, targets)
+        return self.jac_kernel
+
+    def evaluate(self, t, y, param_values, out=None):
+        """
+        Вычисляет правые части через слитое ядро.
+
+        Параметры:
+        - t: время
+        - y: состояние (вектор или список массивов одной формы)
+        - param_values: значения параметров в порядке self.params
+        - out: буфер формы (n_vars,) + форма компонент y; если None - создается
+
+        Буфер можно переиспользовать только если результат сразу потребляется:
+        solve_ivp хранит ссылки на возвращенные производные между шагами.
+        """
+        kernel = self.kernel if self.kernel is not None else self.compile_kernel()
+        if out is None:
+            out = np.empty((len(self.variables),) + getattr(y[0], 'shape', ()))
+        return kernel(t, y, param_values, out)
+
     def right_hand_side(self, t, y, param_values):
-        if self.func_compiled is None:
-            self.compile(param_values)
+        return self.evaluate(t, y, param_values)
+
+    def evaluate_grid(self, X, Y, var_indices, param_values, fixed_values=None, t=0.0):
+        """
+        Вычисляет правые части сразу на всей сетке через broadcasting NumPy.
+
+        Параметры:
+        - X, Y: массивы одной формы (например, из np.meshgrid) со значениями
+          переменных var_indices[0] и var_indices[1]
+        - var_indices: индексы переменных, отложенных по осям
+        - param_values: значения параметров в порядке self.params
+        - fixed_values: словарь {имя переменной: значение} для переменных,
+          которых нет на осях (по умолчанию 0)
+        - t: время (для неавтономных систем)
+
+        Возвращает:
+        - массив производных формы (n_vars,) + X.shape
+        """
+        X = np.asarray(X, dtype=float)
+        Y = np.asarray(Y, dtype=float)
+        fixed_values = fixed_values or {}
+
+        state = []
+        for i, name in enumerate(self.variable_names):
+            if i == var_indices[0]:
+                state.append(X)
+            elif i == var_indices[1]:
+                state.append(Y)
+            else:
+                state.append(np.full(X.shape, float(fixed_values.get(name, 0.0))))
+
+        # Деление на ноль и переполнение на краях сетки - нормальная ситуация
+        with np.errstate(all='ignore'):
+            return self.evaluate(t, state, param_values)
+
+    def jacobian(self, t, y, param_values, out=None):
+        """
+        Вычисляет аналитическую матрицу Якоби в точке y.
+
+        Возвращает:
+        - массив формы (n_vars, n_vars) + форма компонент y
+        """
+        jac_kernel = self.jac_kernel if self.jac_kernel is not None else self.compile_jacobian()
+        if out is None:
+            n = len(self.variables)
+            out = np.empty((n, n) + getattr(y[0], 'shape', ()))
+        return jac_kernel(t, y, param_values, out)
+
+
+def _normalize_latex(equation):
+    """Нормализует LaTeX строку для ключа кэша (лишние пробелы не важны)"""
+    return ' '.join(str(equation).split())
+
+
+@lru_cache(maxsize=SYSTEM_CACHE_SIZE)
+def _cached_system(equations_key, variable_names_key):
+    return ODESystem(list(equations_key), list(variable_names_key))
+
+
+def get_ode_system(equations_latex, variable_names):
+    """
+    Возвращает разобранную систему ОДУ из общего кэша процесса.
+
+    parse_latex и lambdify дорогие, а в пакетных построениях одни и те же
+    уравнения повторяются в сотнях строк Excel. Ключ кэша - нормализованные
+    LaTeX строки и имена переменных, поэтому все плоттеры и EquilibriumFinder
+    получают один и тот же объект ODESystem.
+
+    Параметры:
+    - equations_latex: список уравнений в LaTeX
+    - variable_names: список имен переменных
+
+    Возвращает:
+    - ODESystem (общий экземпляр, не модифицировать снаружи)
+    """
+    equations_key = tuple(_normalize_latex(eq) for eq in equations_latex)
+    variable_names_key = tuple(str(name) for name in variable_names)
+    return _cached_system(equations_key, variable_names_key)
+
+
+def clear_system_cache():
+    """Очищает кэш разобранных систем"""
+    _cached_system.cache_clear()
+
 
-        result = self.func_compiled(t, *y)
-        return np.array(result)
\ No newline at end of file
+def system_cache_info():
+    """Статистика кэша систем (hits, misses, maxsize, currsize)"""
+    return _cached_system.cache_info()
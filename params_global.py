@@ -25,5 +25,7 @@ n_points = 10000
 #t_span = [0, 8]
 #rtol = 1e-9  # это точность для метода DOP853
 #atol = 1e-12 # это точность для метода DOP853
+#max_step = 'auto'   # 'auto' - (t1 - t0) / 100, 'none' - без ограничения шага, или число
+#dense_output = False   # True - хранить плотное решение и брать точки для графика по разрешению рисунка (dense_points)
 #default_solver_method = 'RK45'    # в качетсве метода по дефолту используем метод DOP853
 # Если нужно честно строить много точек, то можно воспользоваться методом RK45 и грузануть в него 5 миллионов точек, в мою систему как раз вписывается, может чуть-чуть сброс на диск есть, но некритично в целом
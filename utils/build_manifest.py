@@ -0,0 +1,225 @@
+"""
+Манифест сборки: инкрементальное построение графиков Excel.
+
+Для каждого выходного файла в манифесте хранится хэш всего, от чего зависит
+график:
+- полностью объединенной конфигурации графика (base_config + строки Excel);
+- входных данных вне конфигурации (значения params_global);
+- версии кода построения (исходники main.py, core, models, utils и версии
+  numpy, scipy, sympy, matplotlib).
+
+График пропускается, если хэш не изменился и все его файлы (SVG и
+дополнительные форматы) на месте. Вместе с хэшем хранится информация о
+равновесиях графика, чтобы asimptota.txt оставался полным и при пропуске.
+
+Во время построения манифест сохраняется не реже раза в AUTOSAVE_SECONDS
+секунд, поэтому после падения или Ctrl-C следующий обычный запуск (без
+--resume) не перестраивает уже готовые графики.
+
+Использование:
+    manifest = BuildManifest(code_version=code_version(), inputs=vars(params_global))
+    digest = manifest.digest(graph_config)
+    if not manifest.is_current(output, digest, graph_config.get('formats')):
+        ...
+        manifest.record(output, digest, equilibria_info)
+    manifest.save()
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+from utils.solution_cache import _canonical
+
+
+DEFAULT_MANIFEST_FILE = '.build_manifest.json'
+OUTPUT_DIR = 'output'
+
+# Как часто сохранять манифест во время построения, секунд
+AUTOSAVE_SECONDS = 10.0
+
+# Каталоги и файлы, исходники которых определяют версию кода построения
+_CODE_PATHS = ('main.py', 'core', 'models', 'utils')
+_LIBRARIES = ('numpy', 'scipy', 'sympy', 'matplotlib')
+
+_RENDER_FORMATS = ('svg', 'pdf', 'png')
+
+
+def _json_default(value):
+    """Значения конфигурации вне JSON (numpy и прочее) для хэша графика"""
+    if hasattr(value, 'tolist'):
+        return value.tolist()
+    return str(value)
+
+
+def code_version(root: Optional[str] = None, paths: Sequence[str] = _CODE_PATHS,
+                 libraries: Sequence[str] = _LIBRARIES) -> str:
+    """
+    Хэш исходников и версий библиотек.
+
+    По умолчанию - всего кода построения; paths (файлы и каталоги относительно
+    корня проекта) и libraries сужают хэш до нужной части кода.
+    """
+    root = Path(root or os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    digest = hashlib.sha256()
+    for name in paths:
+        path = root / name
+        files = sorted(path.rglob('*.py')) if path.is_dir() else [path]
+        for file in files:
+            try:
+                data = file.read_bytes()
+            except OSError:
+                continue
+            digest.update(file.relative_to(root).as_posix().encode('utf-8'))
+            digest.update(hashlib.sha256(data).digest())
+
+    for library in libraries:
+        try:
+            version = __import__(library).__version__
+        except ImportError:
+            version = None
+        digest.update(f'{library}={version}'.encode('utf-8'))
+    return digest.hexdigest()
+
+
+def output_files(output: str, formats: Optional[Sequence[str]] = None) -> List[str]:
+    """Пути файлов графика так же, как их записывает GraphPlotter.save"""
+    path = os.path.join(OUTPUT_DIR, output)
+    stem, ext = os.path.splitext(path)
+    main_format = ext.lower().lstrip('.')
+    if main_format not in _RENDER_FORMATS:
+        main_format = 'svg'
+    files = [path]
+    for fmt in formats or []:
+        fmt = str(fmt).lower().lstrip('.')
+        if fmt != main_format:
+            files.append(f'{stem}.{fmt}')
+    return files
+
+
+def equilibria_to_json(value):
+    """Информация о равновесиях в JSON (комплексные собственные значения - [re, im])"""
+    if isinstance(value, dict):
+        return {str(k): equilibria_to_json(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [equilibria_to_json(v) for v in value]
+    if isinstance(value, complex):
+        return {'__complex__': [value.real, value.imag]}
+    if hasattr(value, 'item'):
+        return equilibria_to_json(value.item())
+    return value
+
+
+def equilibria_from_json(value):
+    """Обратное к equilibria_to_json"""
+    if isinstance(value, dict):
+        if set(value) == {'__complex__'}:
+            return complex(*value['__complex__'])
+        return {k: equilibria_from_json(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [equilibria_from_json(v) for v in value]
+    return value
+
+
+class BuildManifest:
+    """
+    Хэши построенных графиков (output -> хэш и равновесия) в JSON файле.
+
+    path=None - манифест выключен: все графики строятся заново и ничего не сохраняется.
+    """
+
+    def __init__(self, path: Optional[str] = DEFAULT_MANIFEST_FILE, code_version: str = '',
+                 inputs: Optional[Dict] = None, autosave_seconds: Optional[float] = AUTOSAVE_SECONDS):
+        self.path = path
+        self.entries = {}
+        self.autosave_seconds = autosave_seconds
+        self._dirty = False
+        self._saved_at = time.monotonic()
+        base = _canonical({'code': code_version, 'inputs': {
+            key: value for key, value in (inputs or {}).items()
+            if not key.startswith('__') and isinstance(value, (bool, int, float, str, list, tuple, dict))
+        }})
+        # Общая часть хэша считается один раз, для графика дописывается только его конфигурация
+        self._base_hash = hashlib.sha256(
+            json.dumps(base, sort_keys=True, separators=(',', ':'), ensure_ascii=True).encode('utf-8'))
+        self._load()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.path)
+
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.entries = json.load(f).get('outputs', {})
+        except (OSError, ValueError):
+            pass
+
+    def save(self):
+        if not self.path or not self._dirty:
+            return
+        try:
+            directory = os.path.dirname(os.path.abspath(self.path))
+            fd, tmp_name = tempfile.mkstemp(dir=directory, suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({'outputs': self.entries}, f, ensure_ascii=False)
+            os.replace(tmp_name, self.path)
+            self._dirty = False
+            self._saved_at = time.monotonic()
+        except OSError as e:
+            print(f"Warning: Could not save build manifest: {e}")
+
+    def digest(self, graph_config: Optional[Dict]) -> Optional[str]:
+        """Хэш графика (None, если конфигурацию построить не удалось)"""
+        if graph_config is None:
+            return None
+        # json.dumps в C без обхода всей конфигурации в Python (как _canonical);
+        # _canonical - только если ключи не сортируются (ключи разных типов)
+        try:
+            payload = json.dumps(graph_config, sort_keys=True, separators=(',', ':'),
+                                 ensure_ascii=True, default=_json_default)
+        except TypeError:
+            payload = json.dumps(_canonical(graph_config), sort_keys=True, separators=(',', ':'),
+                                 ensure_ascii=True)
+        digest = self._base_hash.copy()
+        digest.update(b'\n' + payload.encode('utf-8'))
+        return digest.hexdigest()
+
+    def is_current(self, output: str, digest: Optional[str], formats: Optional[Sequence[str]] = None) -> bool:
+        """График не изменился с прошлого построения и все его файлы на месте"""
+        entry = self.entries.get(output)
+        if digest is None or entry is None or entry.get('hash') != digest:
+            return False
+        return all(os.path.exists(path) for path in output_files(output, formats))
+
+    def equilibria(self, output: str) -> List[Dict]:
+        """Информация о равновесиях, сохраненная при последнем построении графика"""
+        entry = self.entries.get(output) or {}
+        return equilibria_from_json(entry.get('equilibria') or [])
+
+    def record(self, output: str, digest: Optional[str], equilibria_info=None):
+        """Запоминает успешно построенный график"""
+        if not self.path or digest is None:
+            return
+        if equilibria_info and not isinstance(equilibria_info, list):
+            equilibria_info = [equilibria_info]
+        self.entries[output] = {'hash': digest, 'equilibria': equilibria_to_json(equilibria_info or [])}
+        self._dirty = True
+        self._autosave()
+
+    def forget(self, output: str):
+        """Удаляет запись графика (например, после ошибки построения)"""
+        if self.entries.pop(output, None) is not None:
+            self._dirty = True
+            self._autosave()
+
+    def _autosave(self):
+        """Сохраняет манифест, если с прошлого сохранения прошло autosave_seconds"""
+        if self.autosave_seconds is not None and time.monotonic() - self._saved_at >= self.autosave_seconds:
+            self.save()
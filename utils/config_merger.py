@@ -1,13 +1,28 @@
-import copy
 from typing import Dict, List, Any
 
 
+def _copy_block(value):
+    """
+    Копия блока конфигурации (вложенные dict и list копируются, значения - нет).
+
+    Блоки YAML состоят только из dict, list и скаляров, поэтому такая копия
+    эквивалентна copy.deepcopy, но в несколько раз быстрее.
+    """
+    if isinstance(value, dict):
+        return {key: _copy_block(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_copy_block(item) for item in value]
+    return value
+
+
 class ConfigMerger:
     """
     Объединение базового конфига из YAML с параметрами из строки Excel
 
     Логика слияния:
-    1. Начинаем с глубокой копии base_config
+    1. Начинаем с поверхностной копии base_config: блоки, которые строка
+       может изменить (params, styles, axes, ...), заменяются новыми копиями,
+       остальные общие для всех строк и не должны изменяться на месте
     2. Параметры из row_params переопределяют базовые
     3. Специальные колонки (s0, w0, color_s и т.д.) преобразуются в нужную структуру
     4. Приоритет: Excel > YAML > defaults
@@ -25,8 +40,10 @@ class ConfigMerger:
         Возвращает:
         - Объединенная конфигурация для построения графика
         """
-        # Глубокая копия базового конфига, чтобы не модифицировать оригинал
-        config = copy.deepcopy(base_config)
+        # Поверхностная копия: глубокое копирование всего base_config на каждую
+        # строку Excel занимало основное время загрузки больших таблиц.
+        # Изменяемые строкой блоки копируются в _parse_* ниже
+        config = dict(base_config)
 
         # 0. Обработка уравнений (equation_1, equation_2) - ПРИОРИТЕТ!
         # Если в Excel указаны уравнения, они полностью заменяют базовые
@@ -42,7 +59,8 @@ class ConfigMerger:
         # 2. Обработка начальных условий (s0, w0)
         initial_conditions = ConfigMerger._parse_initial_conditions(
             row_params,
-            config.get('initial_conditions', [300, 0.5])
+            config.get('initial_conditions', [300, 0.5]),
+            config.get('variable_names')
         )
         if initial_conditions:
             config['initial_conditions'] = initial_conditions
@@ -88,6 +106,10 @@ class ConfigMerger:
         if row_params.get('dpi'):
             config['dpi'] = row_params['dpi']
 
+        # 9.1. Прореживание кривых при сохранении (minmax или none)
+        if row_params.get('decimation'):
+            config['decimation'] = row_params['decimation']
+
         # 10. Обработка plot_variables (какие переменные строить)
         if row_params.get('plot_variables'):
             config['plot_variables'] = row_params['plot_variables']
@@ -104,8 +126,50 @@ class ConfigMerger:
         if equilibria:
             config['equilibria'] = equilibria
 
+        # 13. Обработка настроек продолжения по параметру (graph_type: bifurcation)
+        continuation = ConfigMerger._parse_continuation(
+            row_params,
+            config.get('continuation', {})
+        )
+        if continuation:
+            config['continuation'] = continuation
+
+        if row_params.get('bifurcation_variable'):
+            config['bifurcation_variable'] = str(row_params['bifurcation_variable']).strip()
+
         return config
 
+    @staticmethod
+    def _parse_continuation(row_params: Dict, base_continuation: Dict) -> Dict:
+        """
+        Обрабатывает настройки продолжения из колонок continuation_parameter,
+        continuation_min, continuation_max, continuation_step, continuation_method
+
+        Приоритет:
+        1. Колонки Excel
+        2. Блок continuation из YAML
+        """
+        continuation = _copy_block(base_continuation) if base_continuation else {}
+
+        if row_params.get('continuation_parameter') is not None:
+            continuation['parameter'] = str(row_params['continuation_parameter']).strip()
+
+        param_range = list(continuation.get('range', [None, None]))
+        if row_params.get('continuation_min') is not None:
+            param_range[0] = float(row_params['continuation_min'])
+        if row_params.get('continuation_max') is not None:
+            param_range[1] = float(row_params['continuation_max'])
+        if param_range != [None, None]:
+            continuation['range'] = param_range
+
+        if row_params.get('continuation_step') is not None:
+            continuation['step'] = float(row_params['continuation_step'])
+
+        if row_params.get('continuation_method') is not None:
+            continuation['method'] = str(row_params['continuation_method']).strip()
+
+        return continuation
+
     @staticmethod
     def _parse_equations(row_params: Dict, base_equations: List) -> List:
         """
@@ -160,10 +224,12 @@ class ConfigMerger:
 
         Параметры из row_params с известными именами переопределяют base_params
         """
-        params = copy.deepcopy(base_params)
+        params = dict(base_params)
 
-        # Список известных параметров системы
+        # Список известных параметров системы + параметры, уже заданные в YAML
+        # (так переопределяются и параметры с другими именами, например из sweep)
         known_params = ['a', 'alpha', 'betta', 'b', 'c', 'h']
+        known_params += [name for name in params if name not in known_params]
 
         for param in known_params:
             if param in row_params and row_params[param] is not None:
@@ -172,9 +238,10 @@ class ConfigMerger:
         return params
 
     @staticmethod
-    def _parse_initial_conditions(row_params: Dict, base_ic: List) -> List:
+    def _parse_initial_conditions(row_params: Dict, base_ic: List, variable_names: List = None) -> List:
         """
         Обрабатывает начальные условия из колонок s0, w0
+        (и <имя переменной>0 для остальных переменных, например x0, y0)
 
         Приоритет:
         1. s0, w0 из Excel
@@ -182,6 +249,11 @@ class ConfigMerger:
         """
         ic = list(base_ic)  # копируем базовые
 
+        for i, name in enumerate(variable_names or []):
+            key = f'{name}0'
+            if name not in ('s', 'w') and i < len(ic) and row_params.get(key) is not None:
+                ic[i] = row_params[key]
+
         # s0 → initial_conditions[0]
         if 's0' in row_params and row_params['s0'] is not None:
             ic[0] = row_params['s0']
@@ -228,7 +300,7 @@ class ConfigMerger:
         Для ode_time обычно 2 стиля: [style_s, style_w]
         """
         # Глубокая копия базовых стилей
-        styles = copy.deepcopy(base_styles)
+        styles = _copy_block(base_styles)
 
         # Убедимся, что есть минимум 2 стиля (для s и w)
         while len(styles) < 2:
@@ -300,7 +372,7 @@ class ConfigMerger:
         - ylim_min, ylim_max → axes.ylim
         - ylim_right_min, ylim_right_max → axes.ylim_right
         """
-        axes = copy.deepcopy(base_axes)
+        axes = _copy_block(base_axes)
 
         # xlim
         xlim = axes.get('xlim', [None, None])
@@ -391,7 +463,7 @@ class ConfigMerger:
         2. Если есть хотя бы один → dual_y_axis = true, right spine = true
         3. Иначе → dual_y_axis = false, right spine = false
         """
-        axes = copy.deepcopy(base_axes)
+        axes = _copy_block(base_axes)
 
         # Проверяем, есть ли кривые с правой осью
         has_right_axis = False
@@ -498,7 +570,7 @@ class ConfigMerger:
             }
         """
         # Глубокая копия базовых настроек
-        equilibria = copy.deepcopy(base_equilibria)
+        equilibria = _copy_block(base_equilibria)
 
         # Обеспечиваем наличие структуры для s и w
         if 's' not in equilibria:
@@ -556,6 +628,12 @@ class ConfigMerger:
         if 'equilibrium_t_max' in row_params and row_params['equilibrium_t_max'] is not None:
             equilibria['t_max'] = float(row_params['equilibrium_t_max'])
 
+        if 'equilibrium_settle_window' in row_params and row_params['equilibrium_settle_window'] is not None:
+            equilibria['settle_window'] = float(row_params['equilibrium_settle_window'])
+
+        if 'equilibrium_method' in row_params and row_params['equilibrium_method'] is not None:
+            equilibria['method'] = str(row_params['equilibrium_method']).strip()
+
         if 'equilibrium_refine' in row_params and row_params['equilibrium_refine'] is not None:
             val = row_params['equilibrium_refine']
             if isinstance(val, str):
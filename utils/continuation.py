@@ -0,0 +1,366 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Модуль продолжения равновесий по параметру (бифуркационные диаграммы).
+
+Вместо отдельного поиска равновесия для каждого значения параметра
+(интегрирование с нуля) ветвь равновесий x*(λ) прослеживается
+последовательностью коротких шагов Ньютона, каждый из которых стартует
+с предыдущего корня и использует аналитическую матрицу Якоби из ODESystem.
+
+Методы:
+1. natural   - шаг по параметру λ, предиктор - линейная экстраполяция
+               по двум последним точкам. Не проходит точки поворота.
+2. arclength - псевдо-длина дуги: шаг вдоль касательной к ветви в
+               пространстве (x, λ). Проходит точки поворота (fold).
+
+Бифуркации определяются по смене знаков собственных значений J:
+- fold (LP)  - вещественное собственное значение проходит через 0
+               (меняется знак det J)
+- Hopf (H)   - пара комплексных собственных значений пересекает мнимую ось
+"""
+
+import numpy as np
+from typing import Dict, Optional, Sequence
+import warnings
+
+from utils.stage_timer import timed
+
+
+CONTINUATION_METHODS = ('arclength', 'natural')
+
+
+class EquilibriumContinuation:
+    """
+    Продолжение ветви равновесий системы ODESystem по одному параметру.
+    """
+
+    def __init__(
+        self,
+        system,
+        params: Dict,
+        parameter: str,
+        tol: float = 1e-10,
+        max_newton: int = 20
+    ):
+        """
+        Параметры:
+        ----------
+        system : ODESystem
+            Система (правые части и матрица Якоби компилируются один раз)
+        params : dict
+            Значения всех параметров системы
+        parameter : str
+            Имя параметра продолжения (например 'h' или 'alpha')
+        tol : float
+            Порог сходимости Ньютона по max|f|
+        max_newton : int
+            Максимальное число итераций Ньютона на шаг
+        """
+        names = [str(p) for p in system.params]
+        if parameter not in names:
+            raise ValueError(f"Unknown continuation parameter: {parameter}. System parameters: {names}")
+
+        self.system = system
+        self.parameter = parameter
+        self.param_index = names.index(parameter)
+        self.param_values = system.param_vector(params)
+        self.tol = tol
+        self.max_newton = max_newton
+
+    def params_at(self, lam):
+        """Вектор параметров системы со значением λ на месте параметра продолжения"""
+        param_values = self.param_values.copy()
+        param_values[self.param_index] = lam
+        return param_values
+
+    def rhs(self, x, lam):
+        return self.system.evaluate(0, x, self.params_at(lam))
+
+    def jacobian(self, x, lam):
+        return self.system.jacobian(0, x, self.params_at(lam))
+
+    def rhs_param_derivative(self, x, lam):
+        """∂f/∂λ центральной разностью (параметр один - это два вызова ядра)"""
+        h = 1e-7 * (1 + abs(lam))
+        return (self.rhs(x, lam + h) - self.rhs(x, lam - h)) / (2 * h)
+
+    @timed('equilibria')
+    def newton(self, x, lam):
+        """Ньютон по x при фиксированном λ. Возвращает (x, converged, iterations)"""
+        x = np.array(x, dtype=float)
+        with np.errstate(all='ignore'):
+            for iteration in range(self.max_newton + 1):
+                f = self.rhs(x, lam)
+                if not np.all(np.isfinite(f)):
+                    return x, False, iteration
+                if np.max(np.abs(f)) < self.tol:
+                    return x, True, iteration
+                if iteration == self.max_newton:
+                    break
+                try:
+                    x = x - np.linalg.solve(self.jacobian(x, lam), f)
+                except np.linalg.LinAlgError:
+                    return x, False, iteration
+        return x, False, self.max_newton
+
+    def _tangent(self, x, lam, previous, scale):
+        """
+        Единичная касательная к ветви f(x, λ) = 0 в точке (x, λ)
+        в масштабированных координатах u / scale.
+
+        Решается [J  f_λ; previousᵀ] t = [0; 1], так что t сонаправлена previous.
+        """
+        n = len(x)
+        A = np.zeros((n + 1, n + 1))
+        A[:n, :n] = self.jacobian(x, lam) * scale[:n]
+        A[:n, n] = self.rhs_param_derivative(x, lam) * scale[n]
+        A[n] = previous
+        b = np.zeros(n + 1)
+        b[n] = 1.0
+        t = np.linalg.solve(A, b)
+        return t / np.linalg.norm(t)
+
+    def _arclength_corrector(self, u_pred, tangent, scale):
+        """
+        Ньютон для расширенной системы (u - масштабированные координаты (x, λ) / scale):
+            f(x, λ) = 0
+            tangentᵀ (u - u_pred) = 0
+        """
+        n = len(u_pred) - 1
+        u = u_pred.copy()
+        A = np.zeros((n + 1, n + 1))
+        G = np.zeros(n + 1)
+        with np.errstate(all='ignore'):
+            for iteration in range(self.max_newton + 1):
+                x, lam = u[:n] * scale[:n], u[n] * scale[n]
+                f = self.rhs(x, lam)
+                if not np.all(np.isfinite(f)):
+                    return u, False, iteration
+                if np.max(np.abs(f)) < self.tol:
+                    return u, True, iteration
+                if iteration == self.max_newton:
+                    break
+                G[:n] = f
+                G[n] = tangent @ (u - u_pred)
+                A[:n, :n] = self.jacobian(x, lam) * scale[:n]
+                A[:n, n] = self.rhs_param_derivative(x, lam) * scale[n]
+                A[n] = tangent
+                try:
+                    u = u - np.linalg.solve(A, G)
+                except np.linalg.LinAlgError:
+                    return u, False, iteration
+        return u, False, self.max_newton
+
+    @timed('equilibria')
+    def run(
+        self,
+        x0: Sequence[float],
+        param_range: Sequence[float],
+        method: str = 'arclength',
+        step: Optional[float] = None,
+        max_steps: int = 2000
+    ) -> Dict:
+        """
+        Прослеживает ветвь равновесий от param_range[0] к param_range[1].
+
+        Параметры:
+        ----------
+        x0 : array
+            Начальное приближение к равновесию при λ = param_range[0]
+        param_range : [λ_start, λ_end]
+            Диапазон параметра (может быть убывающим)
+        method : str
+            'arclength' (псевдо-длина дуги) или 'natural' (шаг по параметру)
+        step : float, optional
+            Начальный шаг по параметру (по умолчанию 1/200 диапазона).
+            Для arclength шаг дальше адаптируется по числу итераций Ньютона
+        max_steps : int
+            Максимальное число точек ветви
+
+        Возвращает:
+        -----------
+        result : dict
+            {
+                'parameter': имя параметра,
+                'param': значения λ (M,),
+                'states': равновесия (n, M),
+                'eigenvalues': собственные значения J (M, n),
+                'stable': маска устойчивости (M,),
+                'bifurcations': [{'type': 'fold'|'hopf', 'param', 'state', 'index'}],
+                'message': причина остановки
+            }
+        """
+        if method not in CONTINUATION_METHODS:
+            raise ValueError(f"Unknown continuation method: {method}. Valid methods: {list(CONTINUATION_METHODS)}")
+
+        lam0, lam1 = float(param_range[0]), float(param_range[1])
+        direction = 1.0 if lam1 >= lam0 else -1.0
+        step = abs(step) if step else abs(lam1 - lam0) / 200
+
+        x, converged, _ = self.newton(x0, lam0)
+        if not converged:
+            raise ValueError(f"Continuation: Newton did not converge to an equilibrium at "
+                             f"{self.parameter} = {lam0} from {list(x0)}")
+
+        if method == 'natural':
+            lams, xs, message = self._run_natural(x, lam0, lam1, direction, step, max_steps)
+        else:
+            lams, xs, message = self._run_arclength(x, lam0, lam1, direction, step, max_steps)
+
+        states = np.array(xs).T
+        params = np.array(lams)
+        eigenvalues = np.array([np.linalg.eigvals(self.jacobian(states[:, i], params[i]))
+                                for i in range(len(params))])
+        stable = np.all(eigenvalues.real < -1e-10, axis=1)
+
+        return {
+            'parameter': self.parameter,
+            'param': params,
+            'states': states,
+            'eigenvalues': eigenvalues,
+            'stable': stable,
+            'bifurcations': self._detect_bifurcations(params, states, eigenvalues),
+            'message': message
+        }
+
+    def _run_natural(self, x, lam, lam1, direction, step, max_steps):
+        lams, xs = [lam], [x]
+        h = step
+        min_step = step / 64
+        tolerance = 1e-12 * (1 + abs(lam1))
+
+        while len(lams) < max_steps and direction * (lam1 - lam) > tolerance:
+            h_use = min(h, abs(lam1 - lam))
+            lam_new = lam + direction * h_use
+
+            # Предиктор: линейная экстраполяция по двум последним точкам
+            x_pred = x
+            if len(lams) > 1:
+                x_pred = x + (x - xs[-2]) * (lam_new - lam) / (lam - lams[-2])
+
+            x_new, converged, iterations = self.newton(x_pred, lam_new)
+            if not converged:
+                h /= 2
+                if h < min_step:
+                    return lams, xs, (f"Newton failed at {self.parameter} = {lam_new:.6g} "
+                                      f"(possible fold, use method: arclength)")
+                continue
+
+            lam, x = lam_new, x_new
+            lams.append(lam)
+            xs.append(x)
+            if iterations <= 3:
+                h = min(h * 1.5, step)
+
+        # Конец диапазона может совпасть с последней разрешенной точкой
+        if direction * (lam1 - lam) <= tolerance:
+            return lams, xs, 'Reached the end of the parameter range.'
+        return lams, xs, 'max_steps reached.'
+
+    def _run_arclength(self, x, lam, lam1, direction, step, max_steps):
+        n = len(x)
+
+        # Длина дуги считается в масштабированных координатах: иначе переменные
+        # порядка сотен (s) и параметр порядка 0.01 (h) несоизмеримы
+        scale = np.append(np.maximum(np.abs(x), 1.0), abs(lam1 - lam) or 1.0)
+        u = np.append(x, lam) / scale
+        lams, xs = [lam], [x]
+
+        # Начальная касательная - в сторону λ_end
+        previous = np.zeros(n + 1)
+        previous[n] = direction
+        tangent = self._tangent(x, lam, previous, scale)
+
+        # Шаг по дуге, при котором приращение λ примерно равно step
+        ds = step / scale[n] / max(abs(tangent[n]), 1e-3)
+        ds_max, ds_min = 10 * step / scale[n], ds / 1024
+
+        while len(lams) < max_steps:
+            u_new, converged, iterations = self._arclength_corrector(u + ds * tangent, tangent, scale)
+            if not converged:
+                ds /= 2
+                if ds < ds_min:
+                    return lams, xs, f"Newton failed at {self.parameter} = {u[n] * scale[n]:.6g}"
+                continue
+
+            u_new = u_new * scale
+            u_old = u * scale
+
+            # Вышли за диапазон - последняя точка ровно на границе
+            if direction * (u_new[n] - lam1) > 0:
+                self._append_boundary(lams, xs, u_old, u_new, lam1)
+                return lams, xs, 'Reached the end of the parameter range.'
+
+            # Ветвь вернулась за начало диапазона (после точки поворота) -
+            # последняя точка тоже на границе, в начале диапазона
+            if direction * (u_new[n] - lams[0]) < 0:
+                self._append_boundary(lams, xs, u_old, u_new, lams[0])
+                return lams, xs, 'Branch left the parameter range after a fold.'
+
+            lams.append(u_new[n])
+            xs.append(u_new[:n])
+            u = u_new / scale
+
+            try:
+                tangent = self._tangent(u_new[:n], u_new[n], tangent, scale)
+            except np.linalg.LinAlgError:
+                return lams, xs, f"Singular extended Jacobian at {self.parameter} = {u_new[n]:.6g}"
+
+            if iterations <= 3:
+                ds = min(ds * 1.3, ds_max)
+            elif iterations > 6:
+                ds /= 1.5
+
+        return lams, xs, 'max_steps reached.'
+
+    def _append_boundary(self, lams, xs, u_old, u_new, lam_bound):
+        """
+        Добавляет точку ветви на границе lam_bound между u_old и u_new
+        (без масштаба): линейная интерполяция и коррекция Ньютоном при
+        фиксированном параметре. Если Ньютон не сошелся, точка не добавляется.
+        """
+        n = len(u_old) - 1
+        x_guess = u_old[:n] + (u_new[:n] - u_old[:n]) * (lam_bound - u_old[n]) / (u_new[n] - u_old[n])
+        x_end, converged, _ = self.newton(x_guess, lam_bound)
+        if converged:
+            lams.append(lam_bound)
+            xs.append(x_end)
+
+    def _detect_bifurcations(self, params, states, eigenvalues):
+        """
+        Ищет fold и Hopf между соседними точками ветви по смене знаков
+        собственных значений, положение оценивается линейной интерполяцией
+        тестовой функции.
+        """
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            det = np.real(np.prod(eigenvalues, axis=1))
+
+        complex_mask = np.abs(eigenvalues.imag) > 1e-10
+        # Тестовая функция Hopf: наибольшая вещественная часть комплексной пары
+        hopf = np.where(complex_mask.any(axis=1),
+                        np.max(np.where(complex_mask, eigenvalues.real, -np.inf), axis=1),
+                        np.nan)
+
+        bifurcations = []
+        for i in range(1, len(params)):
+            found = None
+            if np.sign(det[i]) != np.sign(det[i - 1]) and det[i] != det[i - 1]:
+                found = ('fold', det[i - 1], det[i])
+            elif np.isfinite(hopf[i]) and np.isfinite(hopf[i - 1]) and np.sign(hopf[i]) != np.sign(hopf[i - 1]):
+                found = ('hopf', hopf[i - 1], hopf[i])
+            if found is None:
+                continue
+
+            kind, g0, g1 = found
+            theta = g0 / (g0 - g1) if g0 != g1 else 0.5
+            bifurcations.append({
+                'type': kind,
+                'param': float(params[i - 1] + theta * (params[i] - params[i - 1])),
+                'state': states[:, i - 1] + theta * (states[:, i] - states[:, i - 1]),
+                'index': i
+            })
+
+        return bifurcations
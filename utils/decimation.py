@@ -0,0 +1,111 @@
+"""
+Прореживание кривых перед передачей в matplotlib с учетом разрешения рисунка.
+
+Кривая из 10 000 - 5 000 000 точек на рисунке шириной 2400 пикселей почти вся
+состоит из точек, которые ложатся в один и тот же пиксель. Прореживание
+оставляет только точки, влияющие на изображение при данном размере и DPI:
+
+1. minmax - для кривых с монотонным x (графики от времени): в каждом столбце
+   пикселей остаются первая, последняя, минимальная и максимальная точки
+   (в исходном порядке). Растеризация ломаной по ним совпадает с исходной:
+   вертикальный отрезок столбца и переходы между соседними столбцами те же,
+   экстремумы не теряются.
+2. Для кривых с немонотонным x (фазовые траектории) последовательные точки,
+   попавшие в одну ячейку сетки пикселей, заменяются первой и последней.
+
+Размер столбца/ячейки - 1 / oversample пикселя (по умолчанию oversample=2).
+Точки NaN (разрывы кривой) сохраняются всегда.
+
+Использование:
+    keep = decimation_indices(px, py, oversample=2)
+    line.set_data(x[keep], y[keep])
+"""
+
+import numpy as np
+from typing import Dict, Optional
+
+
+DECIMATION_METHODS = ('minmax', 'none')
+DEFAULT_DECIMATION = {'method': 'minmax', 'oversample': 2, 'min_points': 2000}
+
+
+def parse_decimation(config) -> Dict:
+    """
+    Настройки прореживания графика по блоку decimation из YAML/Excel.
+
+    config: None/True (по умолчанию), False или 'none' (выключить),
+            строка с методом или {method, oversample, min_points}
+    """
+    settings = dict(DEFAULT_DECIMATION)
+    if config is None or config is True:
+        return settings
+    if config is False:
+        settings['method'] = 'none'
+        return settings
+    if isinstance(config, str):
+        config = {'method': config}
+    settings.update(config)
+    settings['method'] = str(settings['method']).strip().lower()
+    if settings['method'] not in DECIMATION_METHODS:
+        raise ValueError(f"Unknown decimation method: {settings['method']}. "
+                         f"Valid methods: {list(DECIMATION_METHODS)}")
+    if not float(settings['oversample']) > 0:
+        raise ValueError(f"Decimation oversample must be positive: {settings['oversample']}")
+    return settings
+
+
+def _is_monotonic(values: np.ndarray) -> bool:
+    finite = values[np.isfinite(values)]
+    if len(finite) < 2:
+        return True
+    steps = np.diff(finite)
+    return bool(np.all(steps >= 0) or np.all(steps <= 0))
+
+
+def decimation_indices(px: np.ndarray, py: np.ndarray, oversample: float = 2,
+                       monotonic: Optional[bool] = None) -> np.ndarray:
+    """
+    Индексы точек кривой, которые нужно оставить.
+
+    Параметры:
+    - px, py: координаты точек в пикселях (display координаты matplotlib)
+    - oversample: число столбцов/ячеек на пиксель
+    - monotonic: монотонен ли x (None - определить по px)
+
+    Возвращает:
+    - отсортированный массив индексов
+    """
+    px = np.asarray(px, dtype=float)
+    py = np.asarray(py, dtype=float)
+    n = len(px)
+    if n <= 2:
+        return np.arange(n)
+
+    if monotonic is None:
+        monotonic = _is_monotonic(px)
+
+    finite = np.isfinite(px) & np.isfinite(py)
+    with np.errstate(invalid='ignore'):
+        column = np.floor(np.where(finite, px, 0.0) * oversample)
+        row = np.floor(np.where(finite, py, 0.0) * oversample)
+
+    # Новая группа начинается при смене столбца (ячейки) и на каждой NaN точке
+    # и после нее, чтобы разрывы кривой остались на месте
+    change = np.empty(n, dtype=bool)
+    change[0] = True
+    change[1:] = (column[1:] != column[:-1]) | ~finite[1:] | ~finite[:-1]
+    if not monotonic:
+        change[1:] |= row[1:] != row[:-1]
+    groups = np.cumsum(change) - 1
+
+    starts = np.flatnonzero(change)
+    ends = np.append(starts[1:], n) - 1
+    keep = [starts, ends]
+
+    if monotonic:
+        # Внутри группы точки упорядочены по y: первая - минимум, последняя - максимум
+        order = np.lexsort((np.where(finite, py, 0.0), groups))
+        keep.append(order[starts])
+        keep.append(order[ends])
+
+    return np.unique(np.concatenate(keep))
@@ -0,0 +1,105 @@
+"""
+Плотное (dense output) решение ОДУ с ленивой передискретизацией.
+
+Вместо массива из n_points точек на равномерной сетке хранятся только узлы
+шагов интегратора и интерполянт между ними. Точки для отрисовки или экспорта
+считаются тогда, когда известно, сколько их нужно (sample(n)), поэтому
+длинный интервал t_span не требует ни мелкого шага, ни миллионов точек.
+
+Интерполянт - всегда кубический эрмитов сплайн по узлам (значения и
+производные в узлах хранятся в .npz без pickle), поэтому график из кэша
+решений совпадает с графиком после интегрирования. Собственный интерполянт
+метода (OdeSolution) у DOP853 точнее сплайна по одним шагам, поэтому после
+solve_ivp к узлам добавляются REFINE_POINTS точек внутри каждого шага,
+взятых из OdeSolution: расхождение с ним падает с ~1e-2 до ~1e-5.
+"""
+
+import numpy as np
+from scipy.interpolate import CubicHermiteSpline
+from typing import Dict, Tuple
+
+
+# Сколько точек OdeSolution добавляется внутри каждого шага интегратора
+REFINE_POINTS = 3
+
+
+class DenseTrajectory:
+    """
+    Траектория t -> y(t) на отрезке [t_nodes[0], t_nodes[-1]].
+
+    Атрибуты:
+    - t_nodes: моменты принятых шагов интегратора и точки внутри шагов, форма (m,)
+    - y_nodes: состояния в узлах, форма (n_vars, m)
+    - dydt_nodes: производные в узлах, форма (n_vars, m)
+    """
+
+    def __init__(self, t_nodes, y_nodes, dydt_nodes):
+        self.t_nodes = np.asarray(t_nodes, dtype=float)
+        self.y_nodes = np.asarray(y_nodes, dtype=float)
+        self.dydt_nodes = np.asarray(dydt_nodes, dtype=float)
+        self._interpolant = None
+        if len(self.t_nodes) > 1:
+            self._interpolant = CubicHermiteSpline(self.t_nodes, self.y_nodes, self.dydt_nodes, axis=1)
+
+    @classmethod
+    def from_solve_ivp(cls, sol, rhs):
+        """
+        Из результата solve_ivp(..., dense_output=True).
+
+        rhs(t, y) - правые части с поддержкой массивов (ODESystem.evaluate),
+        считаются один раз для всех узлов, чтобы траекторию можно было сохранить.
+        """
+        if len(sol.t) < 2:
+            return cls(sol.t, sol.y, rhs(sol.t, sol.y) if len(sol.t) else np.empty_like(sol.y))
+        # Узлы: шаги интегратора и REFINE_POINTS точек OdeSolution внутри каждого шага
+        fractions = np.arange(REFINE_POINTS + 1) / (REFINE_POINTS + 1)
+        t = np.append((sol.t[:-1, None] + np.diff(sol.t)[:, None] * fractions).ravel(), sol.t[-1])
+        inner = np.ones(len(t), dtype=bool)
+        inner[::REFINE_POINTS + 1] = False
+        y = np.empty((sol.y.shape[0], len(t)))
+        y[:, ~inner] = sol.y
+        y[:, inner] = sol.sol(t[inner])
+        # На очень коротких шагах точки внутри шага могут совпасть с узлом
+        keep = np.append(np.diff(t) > 0, True)
+        t, y = t[keep], y[:, keep]
+        return cls(t, y, rhs(t, y))
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, np.ndarray]):
+        """Из массивов, сохраненных arrays() (например, из кэша решений)"""
+        return cls(arrays['t_nodes'], arrays['y_nodes'], arrays['dydt_nodes'])
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        """Массивы для сохранения (кэш решений, экспорт)"""
+        return {'t_nodes': self.t_nodes, 'y_nodes': self.y_nodes, 'dydt_nodes': self.dydt_nodes}
+
+    @property
+    def t_end(self) -> float:
+        return float(self.t_nodes[-1])
+
+    @property
+    def end_state(self) -> np.ndarray:
+        return self.y_nodes[:, -1]
+
+    def __call__(self, t) -> np.ndarray:
+        """Состояние в моменты t (скаляр -> (n_vars,), массив -> (n_vars, len(t)))"""
+        if self._interpolant is None:
+            # Вырожденная траектория из одной точки
+            t = np.asarray(t, dtype=float)
+            return np.broadcast_to(self.y_nodes[:, :1], self.y_nodes.shape[:1] + t.shape).copy()
+        return self._interpolant(t)
+
+    def sample(self, n_points: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Равномерная выборка из n_points точек по всему отрезку: (t, y).
+
+        Концы берутся точно из узлов, чтобы конечное состояние совпадало
+        с результатом интегратора.
+        """
+        if len(self.t_nodes) < 2:
+            return self.t_nodes.copy(), self.y_nodes.copy()
+        t = np.linspace(self.t_nodes[0], self.t_nodes[-1], max(int(n_points), 2))
+        y = np.asarray(self(t), dtype=float)
+        y[:, 0] = self.y_nodes[:, 0]
+        y[:, -1] = self.y_nodes[:, -1]
+        return t, y
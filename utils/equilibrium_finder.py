@@ -9,7 +9,8 @@
     dw/dt = 0
 
 Модуль использует два подхода:
-1. Численное интегрирование на большом временном интервале
+1. Численное интегрирование на большом временном интервале (с остановкой
+   по событию, как только система успокоилась)
 2. Уточнение через scipy.optimize.fsolve
 """
 
@@ -19,13 +20,24 @@ from scipy.optimize import fsolve
 from typing import Dict, Tuple, Optional, Callable
 import warnings
 
+from utils.validators import IMPLICIT_SOLVER_METHODS
+from utils.batch_integrators import solve_batch, BATCH_SOLVER_METHODS
+from utils.stage_timer import timed
+
 
 class EquilibriumFinder:
     """
     Класс для поиска равновесий системы ОДУ.
     """
 
-    def __init__(self, ode_func: Callable, convergence_threshold: float = 1e-6):
+    def __init__(
+        self,
+        ode_func: Callable,
+        convergence_threshold: float = 1e-6,
+        jac_func: Optional[Callable] = None,
+        settle_window: Optional[float] = None,
+        blowup_threshold: float = 1e12
+    ):
         """
         Инициализация поискового модуля.
 
@@ -35,16 +47,70 @@ class EquilibriumFinder:
             Функция правых частей ОДУ с сигнатурой: f(t, y, params) -> dy/dt
         convergence_threshold : float
             Порог для проверки сходимости (максимальное |dy/dt|)
+        jac_func : callable, optional
+            Аналитическая матрица Якоби с сигнатурой: J(t, y, params) -> df/dy.
+            Если не задана, используются конечные разности.
+        settle_window : float, optional
+            Сколько времени max|dy/dt| должен непрерывно оставаться ниже
+            convergence_threshold, чтобы интегрирование остановилось досрочно.
+            По умолчанию t_max / 100.
+        blowup_threshold : float
+            Интегрирование прерывается, если max|y| превысит это значение
+            или решение станет NaN/inf
         """
         self.ode_func = ode_func
         self.convergence_threshold = convergence_threshold
+        self.jac_func = jac_func
+        self.settle_window = settle_window
+        self.blowup_threshold = blowup_threshold
 
+    def _make_events(self, params: Dict, window: float):
+        """
+        Создает терминальные события для solve_ivp.
+
+        settled: max|dy/dt| держится ниже порога в течение window.
+            Событие хранит момент t_below, когда норма производной опустилась
+            ниже порога, и равно t_below + window - t (пока норма ниже порога)
+            или window (пока выше). Состояние обновляется только при движении
+            вперед по времени, поэтому при поиске корня внутри шага solve_ivp
+            функция линейна по t и корень находится точно.
+        blowup: max|y| > blowup_threshold или нечисловые значения.
+        """
+        state = {'t_last': -np.inf, 't_below': None}
+
+        def settled(t, y):
+            if t > state['t_last']:
+                state['t_last'] = t
+                with np.errstate(all='ignore'):
+                    norm = np.max(np.abs(self.ode_func(t, y, params)))
+                if norm < self.convergence_threshold:
+                    if state['t_below'] is None:
+                        state['t_below'] = t
+                else:
+                    state['t_below'] = None
+            if state['t_below'] is None:
+                return window
+            return state['t_below'] + window - t
+
+        def blowup(t, y):
+            if not np.all(np.isfinite(y)):
+                return -1.0
+            return self.blowup_threshold - np.max(np.abs(y))
+
+        settled.terminal = True
+        settled.direction = -1
+        blowup.terminal = True
+        blowup.direction = -1
+        return [settled, blowup]
+
+    @timed('equilibria')
     def find_by_integration(
         self,
         y0: np.ndarray,
         params: Dict,
         t_max: float = 1000.0,
-        method: str = 'LSODA'
+        method: str = 'LSODA',
+        t0: float = 0.0
     ) -> Tuple[np.ndarray, bool, Dict]:
         """
         Поиск равновесия численным интегрированием до большого времени.
@@ -56,9 +122,15 @@ class EquilibriumFinder:
         params : dict
             Параметры системы
         t_max : float
-            Время интегрирования (чем больше, тем точнее, но медленнее)
+            Максимальное время интегрирования. Для методов solve_ivp
+            интегрирование останавливается раньше, как только производные
+            держатся ниже convergence_threshold в течение settle_window,
+            и прерывается при расходимости решения
         method : str
-            Метод интегрирования (LSODA, Radau, BDF)
+            Метод интегрирования (LSODA, Radau, BDF, ... или BATCH_RK4/BATCH_DOPRI)
+        t0 : float
+            Начальный момент времени. Позволяет продолжить уже посчитанную
+            траекторию: y0 - ее конечное состояние в момент t0
 
         Возвращает:
         -----------
@@ -70,20 +142,64 @@ class EquilibriumFinder:
             Дополнительная информация (производные, время сходимости и т.д.)
         """
         try:
+            # Аналитическая матрица Якоби для неявных методов
+            solver_kwargs = {}
+            if self.jac_func is not None and method in IMPLICIT_SOLVER_METHODS:
+                solver_kwargs['jac'] = lambda t, y: self.jac_func(t, y, params)
+
+            # Траектория уже дошла до t_max: интегрировать нечего,
+            # проверяем сходимость прямо в конечной точке
+            if t_max <= t0:
+                y_final = np.asarray(y0, dtype=float)
+                derivatives = self.ode_func(t0, y_final, params)
+                max_derivative = np.max(np.abs(derivatives))
+                converged = max_derivative < self.convergence_threshold
+                return y_final, converged, {
+                    'derivatives': derivatives,
+                    'max_derivative': max_derivative,
+                    't_final': t0,
+                    'converged': converged,
+                    'trajectory_length': 1,
+                    'settled_early': False
+                }
+
             # Интегрируем систему
-            sol = solve_ivp(
-                fun=lambda t, y: self.ode_func(t, y, params),
-                t_span=[0, t_max],
-                y0=y0,
-                method=method,
-                dense_output=False,
-                rtol=1e-8,
-                atol=1e-10
-            )
+            if method in BATCH_SOLVER_METHODS:
+                sol = solve_batch(
+                    lambda t, y: self.ode_func(t, y, params),
+                    [t0, t_max],
+                    y0,
+                    method=method,
+                    rtol=1e-8,
+                    atol=1e-10,
+                    max_step=(t_max - t0) / 1000
+                )
+            else:
+                window = self.settle_window if self.settle_window is not None else t_max / 100
+                sol = solve_ivp(
+                    fun=lambda t, y: self.ode_func(t, y, params),
+                    t_span=[t0, t_max],
+                    y0=y0,
+                    method=method,
+                    dense_output=False,
+                    rtol=1e-8,
+                    atol=1e-10,
+                    events=self._make_events(params, window),
+                    **solver_kwargs
+                )
 
             if not sol.success:
                 return y0, False, {'error': 'Integration failed', 'message': sol.message}
 
+            # Событие blowup: решение уходит на бесконечность
+            t_events = getattr(sol, 't_events', None)
+            if t_events is not None and len(t_events[1]) > 0:
+                return sol.y[:, -1], False, {
+                    'error': 'Solution diverged',
+                    't_final': sol.t[-1],
+                    'max_derivative': np.inf
+                }
+
             # Берем последнее значение как приближение к равновесию
             y_final = sol.y[:, -1]
 
@@ -99,7 +215,8 @@ class EquilibriumFinder:
                 'max_derivative': max_derivative,
                 't_final': sol.t[-1],
                 'converged': converged,
-                'trajectory_length': len(sol.t)
+                'trajectory_length': len(sol.t),
+                'settled_early': t_events is not None and len(t_events[0]) > 0
             }
 
             return y_final, converged, info
@@ -107,6 +224,7 @@ class EquilibriumFinder:
         except Exception as e:
             return y0, False, {'error': str(e)}
 
+    @timed('equilibria')
     def refine_by_optimization(
         self,
         y_guess: np.ndarray,
@@ -139,6 +257,11 @@ class EquilibriumFinder:
             def equations(y):
                 return self.ode_func(0, y, params)
 
+            jacobian = None
+            if self.jac_func is not None:
+                def jacobian(y):
+                    return self.jac_func(0, y, params)
+
             # Решаем систему
             with warnings.catch_warnings():
                 warnings.simplefilter("ignore")
@@ -147,12 +270,15 @@ class EquilibriumFinder:
                     solution, infodict, ier, msg = fsolve(
                         equations,
                         y_guess,
+                        fprime=jacobian,
                         full_output=True
                     )
                     success = (ier == 1)
                 else:
                     from scipy.optimize import root
-                    result = root(equations, y_guess, method=method)
+                    # Якобиан используют только hybr и lm, остальные методы его игнорируют
+                    result = root(equations, y_guess, method=method,
+                                  jac=jacobian if method in ('hybr', 'lm') else None)
                     solution = result.x
                     success = result.success
                     msg = result.message
@@ -173,12 +299,15 @@ class EquilibriumFinder:
         except Exception as e:
             return y_guess, False, {'error': str(e)}
 
+    @timed('equilibria')
     def find_equilibrium(
         self,
         y0: np.ndarray,
         params: Dict,
         t_max: float = 1000.0,
-        refine: bool = True
+        refine: bool = True,
+        method: str = 'LSODA',
+        t0: float = 0.0
     ) -> Dict:
         """
         Полный поиск равновесия: интегрирование + уточнение.
@@ -193,6 +322,10 @@ class EquilibriumFinder:
             Время интегрирования
         refine : bool
             Уточнять ли результат через оптимизацию
+        method : str
+            Метод интегрирования (см. find_by_integration)
+        t0 : float
+            Начальный момент времени (см. find_by_integration)
 
         Возвращает:
         -----------
@@ -207,7 +340,7 @@ class EquilibriumFinder:
         """
         # Шаг 1: Численное интегрирование
         y_approx, converged_int, info_int = self.find_by_integration(
-            y0, params, t_max
+            y0, params, t_max, method, t0
         )
 
         result = {
@@ -230,6 +363,159 @@ class EquilibriumFinder:
 
         return result
 
+    def _newton_batch(
+        self,
+        X: np.ndarray,
+        params: Dict,
+        tol: float,
+        max_iter: int,
+        box: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Векторизованный метод Ньютона для пачки стартовых точек.
+
+        X - стартовые точки формы (n, N). ode_func и jac_func должны принимать
+        состояние, компоненты которого - массивы формы (N,) (как
+        ODESystem.right_hand_side / ODESystem.jacobian). Без jac_func матрица
+        Якоби считается конечными разностями тем же векторизованным вызовом.
+
+        Возвращает (X, converged, residual): точки, маску сходимости и max|f|.
+        """
+        n, N = X.shape
+        X = X.copy()
+        active = np.ones(N, dtype=bool)
+        converged = np.zeros(N, dtype=bool)
+        residual = np.full(N, np.inf)
+        # Точки, ушедшие далеко за пределы области поиска, отбрасываем
+        span = box[:, 1] - box[:, 0]
+        lower = (box[:, 0] - span)[:, None]
+        upper = (box[:, 1] + span)[:, None]
+
+        with np.errstate(all='ignore'):
+            for _ in range(max_iter):
+                idx = np.flatnonzero(active)
+                if len(idx) == 0:
+                    break
+                Xa = X[:, idx]
+                F = np.asarray(self.ode_func(0, Xa, params), dtype=float).reshape(n, -1)
+                residual[idx] = np.max(np.abs(F), axis=0)
+
+                done = residual[idx] < tol
+                converged[idx[done]] = True
+
+                if self.jac_func is not None:
+                    J = np.asarray(self.jac_func(0, Xa, params), dtype=float).reshape(n, n, -1)
+                else:
+                    epsilon = 1e-8
+                    J = np.empty((n, n, len(idx)))
+                    for j in range(n):
+                        Xp = Xa.copy()
+                        Xp[j] += epsilon
+                        Fp = np.asarray(self.ode_func(0, Xp, params), dtype=float).reshape(n, -1)
+                        J[:, j] = (Fp - F) / epsilon
+
+                # Решаем J dx = -F для всех точек сразу: (N, n, n) @ (N, n, 1)
+                J = np.moveaxis(J, -1, 0)
+                rhs = -F.T[:, :, None]
+                try:
+                    dX = np.linalg.solve(J, rhs)[:, :, 0]
+                except np.linalg.LinAlgError:
+                    dX = (np.linalg.pinv(J) @ rhs)[:, :, 0]
+                X[:, idx] = Xa + dX.T
+
+                bad = ~np.all(np.isfinite(X[:, idx]), axis=0) | \
+                    np.any((X[:, idx] < lower) | (X[:, idx] > upper), axis=0)
+                active[idx[done | bad]] = False
+
+        return X, converged, residual
+
+    @timed('equilibria')
+    def find_all_equilibria(
+        self,
+        bounds,
+        params: Dict,
+        n_starts: int = 256,
+        seeds: str = 'sobol',
+        tol: float = 1e-10,
+        max_iter: int = 50,
+        dedup_tol: float = 1e-6
+    ) -> list:
+        """
+        Поиск всех равновесий в прямоугольной области (multi-start Newton).
+
+        В отличие от find_equilibrium находит и неустойчивые равновесия
+        (седла, неустойчивые узлы и фокусы), к которым траектории не приходят.
+        Из n_starts стартовых точек одновременно запускается векторизованный
+        метод Ньютона, сошедшиеся корни внутри области объединяются с
+        точностью dedup_tol, каждый классифицируется через analyze_stability.
+
+        Параметры:
+        ----------
+        bounds : list of (min, max)
+            Границы области поиска для каждой переменной
+        params : dict
+            Параметры системы
+        n_starts : int
+            Число стартовых точек
+        seeds : str
+            'sobol' (квазислучайная последовательность) или 'grid' (равномерная сетка)
+        tol : float
+            Порог сходимости Ньютона по max|f|
+        max_iter : int
+            Максимальное число итераций Ньютона
+        dedup_tol : float
+            Относительная точность, с которой корни считаются совпадающими
+
+        Возвращает:
+        -----------
+        equilibria : list of dict
+            Для каждого равновесия (в порядке возрастания первой координаты):
+            {
+                'equilibrium': точка,
+                'residual': max|f| в точке,
+                'stability', 'type', 'eigenvalues', ...: результат analyze_stability
+            }
+        """
+        box = np.asarray(bounds, dtype=float).reshape(-1, 2)
+        n = len(box)
+
+        if seeds == 'grid':
+            per_axis = max(2, int(round(n_starts ** (1.0 / n))))
+            axes = [np.linspace(lo, hi, per_axis) for lo, hi in box]
+            unit = None
+            X = np.array([g.ravel() for g in np.meshgrid(*axes, indexing='ij')])
+        elif seeds == 'sobol':
+            from scipy.stats import qmc
+            with warnings.catch_warnings():
+                # Предупреждение о числе точек не степени двойки не важно
+                warnings.simplefilter("ignore")
+                unit = qmc.Sobol(d=n, scramble=False).random(n_starts)
+            X = (box[:, 0] + unit * (box[:, 1] - box[:, 0])).T
+        else:
+            raise ValueError(f"Unknown seeds: {seeds}. Use 'sobol' or 'grid'")
+
+        X, converged, residual = self._newton_batch(X, params, tol, max_iter, box)
+
+        # Только сошедшиеся корни внутри области (с небольшим запасом)
+        margin = 1e-9 * (1 + np.abs(box))
+        inside = np.all((X >= (box[:, 0] - margin[:, 0])[:, None]) &
+                        (X <= (box[:, 1] + margin[:, 1])[:, None]), axis=0)
+        candidates = np.flatnonzero(converged & inside)
+
+        # Удаляем дубликаты: одно и то же равновесие находится из многих стартов
+        roots = []
+        for i in candidates[np.lexsort(X[::-1, candidates])]:
+            x = X[:, i]
+            if not any(np.all(np.abs(x - r['equilibrium']) <= dedup_tol * (1 + np.abs(r['equilibrium'])))
+                       for r in roots):
+                roots.append({'equilibrium': x.copy(), 'residual': float(residual[i])})
+
+        for root in roots:
+            root.update(self.analyze_stability(root['equilibrium'], params))
+
+        return roots
+
+    @timed('equilibria')
     def analyze_stability(
         self,
         equilibrium: np.ndarray,
@@ -238,7 +524,8 @@ class EquilibriumFinder:
         """
         Анализ устойчивости и типа равновесия.
 
-        Вычисляет матрицу Якоби численно, находит собственные значения
+        Берет аналитическую матрицу Якоби (если задана jac_func) или вычисляет
+        ее численно, находит собственные значения
         и определяет тип равновесия (узел, фокус, седло) и устойчивость.
 
         Параметры:
@@ -259,18 +546,23 @@ class EquilibriumFinder:
                 'imag_parts': мнимые части собственных значений
             }
         """
-        epsilon = 1e-8
         n = len(equilibrium)
-        jacobian = np.zeros((n, n))
 
-        # Численно вычисляем матрицу Якоби: J_ij = ∂f_i/∂y_j
-        f0 = self.ode_func(0, equilibrium, params)
+        if self.jac_func is not None:
+            # Аналитическая матрица Якоби: J_ij = ∂f_i/∂y_j
+            jacobian = np.asarray(self.jac_func(0, equilibrium, params), dtype=float)
+        else:
+            epsilon = 1e-8
+            jacobian = np.zeros((n, n))
+
+            # Численно вычисляем матрицу Якоби: J_ij = ∂f_i/∂y_j
+            f0 = self.ode_func(0, equilibrium, params)
 
-        for j in range(n):
-            y_perturbed = equilibrium.copy()
-            y_perturbed[j] += epsilon
-            f_perturbed = self.ode_func(0, y_perturbed, params)
-            jacobian[:, j] = (f_perturbed - f0) / epsilon
+            for j in range(n):
+                y_perturbed = equilibrium.copy()
+                y_perturbed[j] += epsilon
+                f_perturbed = self.ode_func(0, y_perturbed, params)
+                jacobian[:, j] = (f_perturbed - f0) / epsilon
 
         # Вычисляем собственные значения
         eigenvalues = np.linalg.eigvals(jacobian)
@@ -1,3 +1,4 @@
+import numpy as np
 import pandas as pd
 import os
 from typing import List, Dict, Any
@@ -101,35 +102,47 @@ class ExcelConfigLoader:
         Возвращает все строки таблицы как список словарей
 
         Особенности обработки:
-        - NaN значения заменяются на None
+        - в словарь строки попадают только заполненные ячейки (пустые/NaN
+          ячейки не хранятся: row.get(колонка) для них возвращает None)
         - Пустые строки пропускаются
         - Добавляется поле __row_number__ для отладки
 
+        Таблица разбирается по колонкам: пустые ячейки и строки без output
+        находятся одной векторной операцией, а в словари копируются только
+        заполненные ячейки. Поэтому время и память пропорциональны числу
+        заполненных ячеек, а не размеру таблицы.
+
         Возвращает:
         - Список словарей, каждый словарь = строка таблицы
         """
         if self.df is None:
             raise ValueError("Таблица не загружена. Вызовите load_table() сначала")
 
-        rows = []
-
-        for idx, row in self.df.iterrows():
-            # Преобразуем строку в словарь
-            row_dict = row.to_dict()
-
-            # Заменяем NaN на None для корректной обработки
-            row_dict = {k: (None if pd.isna(v) else v) for k, v in row_dict.items()}
+        df = self.df
+        filled = df.notna().to_numpy()
 
-            # Добавляем номер строки для отладки (Excel row = idx + 2, т.к. +1 заголовок, +1 индекс с 0)
-            row_dict['__row_number__'] = int(idx) + 2
+        # Пропускаем строки без output (обязательное поле)
+        output = df['output']
+        keep = (output.notna() & (output.astype(str).str.strip() != '')).to_numpy()
+        filled &= keep[:, None]
 
-            # Пропускаем строки без output (обязательное поле)
-            if row_dict.get('output') is None or str(row_dict.get('output')).strip() == '':
+        rows = [{} for _ in range(len(df))]
+        for position, column in enumerate(df.columns):
+            indices = np.flatnonzero(filled[:, position])
+            if len(indices) == 0:
                 continue
-
-            rows.append(row_dict)
-
-        return rows
+            # object -> значения Python (int, float, str), как в строках iterrows
+            values = df.iloc[:, position].to_numpy(dtype=object)
+            for i in indices:
+                rows[i][column] = values[i]
+
+        # Номер строки для отладки (Excel row = idx + 2, т.к. +1 заголовок, +1 индекс с 0)
+        row_numbers = df.index.to_numpy()
+        result = []
+        for i in np.flatnonzero(keep):
+            rows[i]['__row_number__'] = int(row_numbers[i]) + 2
+            result.append(rows[i])
+        return result
 
     def get_rows_grouped_by_output(self) -> Dict[str, List[Dict[str, Any]]]:
         """
@@ -144,13 +157,8 @@ class ExcelConfigLoader:
         if self.df is None:
             raise ValueError("Таблица не загружена. Вызовите load_table() сначала")
 
-        rows = self.get_all_rows()
         grouped = {}
-
-        for row in rows:
-            output = row['output']
-            if output not in grouped:
-                grouped[output] = []
-            grouped[output].append(row)
+        for row in self.get_all_rows():
+            grouped.setdefault(row['output'], []).append(row)
 
         return grouped
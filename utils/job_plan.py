@@ -0,0 +1,134 @@
+"""
+Компактный план заданий для параллельного построения и повтора прогона.
+
+План состоит из заголовка и пачек заданий:
+- заголовок - общее для всех графиков: base_config, graph_type, цепочка
+  попыток fallback_chain. Он записывается в файл один раз, а каждый процесс
+  пула читает его один раз (load_plan_header кэшируется), поэтому base_config
+  не передается с каждой пачкой;
+- пачка - задания (output, строки Excel) в сжатом виде (encode_jobs):
+  строки (имена колонок, уравнения, цвета, имена файлов) хранятся один раз
+  в таблице строк пачки, набор колонок строки Excel - один раз в таблице
+  схем, а строка Excel - это номер схемы и кортеж значений, где числа
+  (параметры, начальные условия) лежат как есть, а строки заменены номерами.
+
+Файл плана - JSON lines: первая строка - заголовок, дальше по строке на
+пачку. Такой файл можно сохранить (--save-plan) и повторить прогон по нему
+(--replay) без Excel таблицы.
+"""
+
+import hashlib
+import json
+import os
+from functools import lru_cache
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+
+PLAN_FORMAT_VERSION = 1
+
+
+def encode_jobs(items: Sequence[Tuple]) -> Dict:
+    """
+    Сжимает задания пачки.
+
+    Параметры:
+    - items: список (output, rows, ...) - дополнительные поля задания
+      (например, номер попытки) сохраняются как есть
+
+    Возвращает:
+    - {'strings': [...], 'schemas': [...], 'jobs': [(номер output, [(номер схемы, значения)], ...)]}
+    """
+    strings, string_ids = [], {}
+    schemas, schema_ids = [], {}
+
+    def intern(value: str) -> int:
+        index = string_ids.get(value)
+        if index is None:
+            index = string_ids[value] = len(strings)
+            strings.append(value)
+        return index
+
+    jobs = []
+    for output, rows, *extra in items:
+        coded_rows = []
+        for row in rows:
+            # Схема: имена колонок (номера строк) и признак "значение - строка"
+            schema = tuple((intern(str(key)), isinstance(value, str)) for key, value in row.items())
+            schema_id = schema_ids.get(schema)
+            if schema_id is None:
+                schema_id = schema_ids[schema] = len(schemas)
+                schemas.append(schema)
+            values = tuple(intern(value) if isinstance(value, str) else value for value in row.values())
+            coded_rows.append((schema_id, values))
+        jobs.append((intern(str(output)), coded_rows, *extra))
+
+    return {'strings': strings, 'schemas': schemas, 'jobs': jobs}
+
+
+def decode_jobs(chunk: Dict) -> List[Tuple]:
+    """Обратное к encode_jobs: список (output, rows, ...)"""
+    strings = chunk['strings']
+    schemas = [[(strings[key], is_string) for key, is_string in schema] for schema in chunk['schemas']]
+
+    items = []
+    for output, coded_rows, *extra in chunk['jobs']:
+        rows = []
+        for schema_id, values in coded_rows:
+            rows.append({key: strings[value] if is_string else value
+                         for (key, is_string), value in zip(schemas[schema_id], values)})
+        items.append((strings[output], rows, *extra))
+    return items
+
+
+def plan_header(base_config: Dict, graph_type: str, fallback_chain: Optional[List[Dict]] = None) -> Dict:
+    """Заголовок плана (общие для всех заданий настройки)"""
+    header = {'version': PLAN_FORMAT_VERSION, 'base_config': base_config, 'graph_type': graph_type,
+              'fallback_chain': fallback_chain}
+    payload = json.dumps(header, sort_keys=True, default=str, ensure_ascii=True)
+    header['plan_id'] = hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+    return header
+
+
+def _dumps(value) -> str:
+    return json.dumps(value, default=str, ensure_ascii=False)
+
+
+def write_plan(path: str, header: Dict, chunks: Iterator[Dict] = ()) -> int:
+    """
+    Записывает план: заголовок и сжатые пачки (encode_jobs).
+
+    Возвращает:
+    - число записанных заданий
+    """
+    count = 0
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(_dumps(header) + '\n')
+        for chunk in chunks:
+            f.write(_dumps(chunk) + '\n')
+            count += len(chunk['jobs'])
+    return count
+
+
+@lru_cache(maxsize=8)
+def _read_header(path: str, mtime: float) -> Dict:
+    with open(path, 'r', encoding='utf-8') as f:
+        header = json.loads(f.readline())
+    if header.get('version') != PLAN_FORMAT_VERSION:
+        raise ValueError(f"Unsupported job plan version: {header.get('version')} (expected {PLAN_FORMAT_VERSION})")
+    return header
+
+
+def load_plan_header(path: str) -> Dict:
+    """Заголовок плана (читается один раз на процесс, пока файл не изменится)"""
+    return _read_header(os.path.abspath(path), os.path.getmtime(path))
+
+
+def iter_plan_jobs(path: str) -> Iterator[Tuple[str, List[Dict]]]:
+    """Задания (output, rows) из файла плана - по одной пачке в памяти"""
+    load_plan_header(path)
+    with open(path, 'r', encoding='utf-8') as f:
+        f.readline()
+        for line in f:
+            if line.strip():
+                for output, rows, *_ in decode_jobs(json.loads(line)):
+                    yield output, rows
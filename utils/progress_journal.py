@@ -0,0 +1,97 @@
+"""
+Журнал хода построения графиков Excel (для продолжения после прерывания).
+
+Каждый завершенный график сразу дописывается в журнал отдельной строкой
+JSON (JSON lines): output, успех, хэш графика (см. utils.build_manifest),
+равновесия, время построения, номер попытки или текст ошибки. Журнал
+только дополняется, поэтому после падения, OOM или Ctrl-C в нем остаются
+все графики, построенные до прерывания (недописанная последняя строка
+при чтении пропускается).
+
+С --resume графики, успешно построенные по журналу с тем же хэшем,
+пропускаются, а их равновесия попадают в asimptota.txt из журнала.
+Без --resume журнал начинается заново.
+
+Использование:
+    journal = ProgressJournal()
+    completed = journal.completed()     # только для --resume
+    journal.open(resume=True)
+    journal.record(output, True, digest, equilibria_info, seconds)
+    journal.close()
+"""
+
+import json
+import os
+from typing import Dict, Optional
+
+from utils.build_manifest import equilibria_to_json, equilibria_from_json
+
+
+DEFAULT_JOURNAL_FILE = '.graph_journal.jsonl'
+
+
+class ProgressJournal:
+    """
+    Журнал завершенных графиков в файле JSON lines.
+
+    path=None - журнал выключен.
+    """
+
+    def __init__(self, path: Optional[str] = DEFAULT_JOURNAL_FILE):
+        self.path = path
+        self._file = None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.path)
+
+    def completed(self) -> Dict[str, Dict]:
+        """
+        Успешно построенные графики по журналу: output -> запись
+        (поле equilibria уже восстановлено из JSON).
+
+        Если график встречается несколько раз, действует последняя запись.
+        """
+        entries = {}
+        if not self.path or not os.path.exists(self.path):
+            return entries
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # Строка, которую не успели дописать при прерывании
+                    continue
+                if entry.get('ok'):
+                    entry['equilibria'] = equilibria_from_json(entry.get('equilibria') or [])
+                    entries[entry['output']] = entry
+                else:
+                    entries.pop(entry.get('output'), None)
+        return entries
+
+    def open(self, resume: bool = False):
+        """Открывает журнал для записи: с resume - дописывает, иначе начинает заново"""
+        if not self.path:
+            return
+        self._file = open(self.path, 'a' if resume else 'w', encoding='utf-8')
+
+    def record(self, output: str, success: bool, digest: Optional[str] = None, equilibria_info=None,
+               seconds: Optional[float] = None, attempt: int = 0, error: Optional[str] = None):
+        """Дописывает завершенный график и сразу сбрасывает строку на диск"""
+        if self._file is None:
+            return
+        if equilibria_info and not isinstance(equilibria_info, list):
+            equilibria_info = [equilibria_info]
+        entry = {'output': output, 'ok': bool(success), 'hash': digest,
+                 'seconds': None if seconds is None else round(float(seconds), 3), 'attempt': attempt}
+        if success:
+            entry['equilibria'] = equilibria_to_json(equilibria_info or [])
+        else:
+            entry['error'] = str(error).splitlines()[0] if error else None
+        self._file.write(json.dumps(entry, ensure_ascii=False) + '\n')
+        self._file.flush()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
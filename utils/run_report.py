@@ -0,0 +1,243 @@
+"""
+Машиночитаемый отчет о построении графиков Excel.
+
+Пока идет построение, результаты каждого графика сразу дописываются
+в два CSV файла с постоянной схемой (строка заголовка всегда одна и та же):
+- equilibria.csv - по строке на равновесие: номер кривой в конфигурации
+  графика и источник (curve - равновесие кривой, all_equilibria - поиск
+  всех равновесий области, bifurcation - точка бифуркации ветви),
+  координаты, сходимость, метод, устойчивость, тип, первые два
+  собственных значения;
+- graphs.csv - по строке на график: статус, время построения, номер
+  попытки, число равновесий, ошибка и время этапов построения
+  (см. utils.stage_timer).
+
+Поэтому результаты большого прогона можно анализировать (pandas, numpy)
+до окончания построения и без разбора текстового asimptota.txt, который
+остается необязательным текстовым представлением тех же данных.
+
+После построения CSV дополнительно сохраняются в выбранных форматах:
+- npy - структурированный массив NumPy (np.load(..., allow_pickle=False));
+- parquet - через pandas (нужен pyarrow или fastparquet).
+
+Использование:
+    report = RunReport(parse_report(config.get('report')))
+    report.add_graph(output, 'ok', equilibria_info, seconds=1.2)
+    report.close()
+"""
+
+import csv
+import math
+import os
+import numpy as np
+from typing import Dict, List, Optional
+
+from utils.stage_timer import STAGES
+
+
+REPORT_FORMATS = ('csv', 'npy', 'parquet')
+DEFAULT_REPORT = {'enabled': True, 'dir': 'report', 'formats': ['csv', 'npy'], 'text_log': True}
+
+# Статусы графиков в graphs.csv
+GRAPH_STATUSES = ('ok', 'error', 'skipped', 'resumed')
+
+# Схемы таблиц: (колонка, тип) - порядок и типы колонок не меняются
+EQUILIBRIA_SCHEMA = [
+    ('output', 'str'), ('graph_type', 'str'), ('curve', 'int'), ('source', 'str'),
+    ('s_star', 'float'), ('w_star', 'float'), ('converged', 'bool'), ('method', 'str'),
+    ('max_derivative', 'float'), ('stability', 'str'), ('equilibrium_type', 'str'),
+    ('eig1_re', 'float'), ('eig1_im', 'float'), ('eig2_re', 'float'), ('eig2_im', 'float'),
+]
+GRAPHS_SCHEMA = [
+    ('output', 'str'), ('status', 'str'), ('seconds', 'float'), ('attempt', 'int'),
+    ('n_equilibria', 'int'), ('error', 'str'),
+] + [(f'{name}_seconds', 'float') for name in STAGES]
+
+
+def parse_report(config) -> Dict:
+    """
+    Настройки отчета по блоку report из YAML.
+
+    config: None/True (по умолчанию), False (выключить) или {dir, formats, text_log}
+    """
+    settings = dict(DEFAULT_REPORT)
+    if config is None or config is True:
+        return settings
+    if config is False:
+        settings['enabled'] = False
+        return settings
+    settings.update(config)
+    formats = settings['formats']
+    settings['formats'] = [str(fmt).lower() for fmt in ([formats] if isinstance(formats, str) else formats)]
+    for fmt in settings['formats']:
+        if fmt not in REPORT_FORMATS:
+            raise ValueError(f"Unknown report format: {fmt}. Valid formats: {list(REPORT_FORMATS)}")
+    return settings
+
+
+def _cell(value, kind: str) -> str:
+    """Значение для CSV: пустая строка - нет значения"""
+    if value is None:
+        return ''
+    if kind == 'bool':
+        return '1' if value else '0'
+    if kind == 'int':
+        return str(int(value))
+    if kind == 'float':
+        value = float(value)
+        return '' if math.isnan(value) else repr(value)
+    return str(value)
+
+
+def _eigenvalue_cells(eigenvalues) -> List[Optional[float]]:
+    cells = []
+    for ev in list(eigenvalues or [])[:2]:
+        ev = complex(ev)
+        cells += [ev.real, ev.imag]
+    return cells + [None] * (4 - len(cells))
+
+
+def equilibrium_rows(output: str, equilibria_info) -> List[List]:
+    """Строки equilibria.csv для графика (по схеме EQUILIBRIA_SCHEMA)"""
+    if not equilibria_info:
+        return []
+    if not isinstance(equilibria_info, list):
+        equilibria_info = [equilibria_info]
+    rows = []
+    for info in equilibria_info:
+        # curve пустой у равновесий, не относящихся к кривой (all_equilibria)
+        rows.append([output, info.get('type'), info.get('curve'), info.get('source'),
+                     info.get('s_star'), info.get('w_star'), info.get('converged', False), info.get('method'),
+                     info.get('max_derivative'), info.get('stability'), info.get('equilibrium_type')]
+                    + _eigenvalue_cells(info.get('eigenvalues')))
+    return rows
+
+
+def read_table(path: str, schema) -> np.ndarray:
+    """
+    Читает CSV отчета в структурированный массив NumPy.
+
+    Пустые ячейки: float - NaN, int - -1, bool - False, str - ''.
+    """
+    columns = {name: [] for name, _ in schema}
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        reader = csv.reader(f)
+        next(reader, None)
+        for row in reader:
+            for (name, kind), cell in zip(schema, row):
+                if kind == 'float':
+                    columns[name].append(float(cell) if cell else np.nan)
+                elif kind == 'int':
+                    columns[name].append(int(cell) if cell else -1)
+                elif kind == 'bool':
+                    columns[name].append(cell == '1')
+                else:
+                    columns[name].append(cell)
+
+    dtype = []
+    for name, kind in schema:
+        if kind == 'str':
+            width = max((len(value) for value in columns[name]), default=1)
+            dtype.append((name, f'U{max(width, 1)}'))
+        else:
+            dtype.append((name, {'float': 'f8', 'int': 'i8', 'bool': '?'}[kind]))
+    table = np.empty(len(columns[schema[0][0]]), dtype=dtype)
+    for name, _ in schema:
+        table[name] = columns[name]
+    return table
+
+
+class RunReport:
+    """
+    Потоковая запись отчета: по строке CSV на график/равновесие сразу после
+    получения результата (файл сбрасывается на диск после каждого графика).
+    """
+
+    TABLES = {'equilibria': EQUILIBRIA_SCHEMA, 'graphs': GRAPHS_SCHEMA}
+
+    def __init__(self, settings: Optional[Dict] = None):
+        self.settings = settings or parse_report(None)
+        self.enabled = bool(self.settings.get('enabled', True))
+        self.directory = self.settings.get('dir', DEFAULT_REPORT['dir'])
+        self._files = {}
+        self._writers = {}
+        if not self.enabled:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        for table, schema in self.TABLES.items():
+            f = open(self.path(table, 'csv'), 'w', encoding='utf-8', newline='')
+            self._files[table] = f
+            self._writers[table] = csv.writer(f)
+            self._writers[table].writerow([name for name, _ in schema])
+            f.flush()
+
+    @property
+    def text_log(self) -> bool:
+        """Нужен ли текстовый asimptota.txt"""
+        return bool(self.settings.get('text_log', True))
+
+    def path(self, table: str, fmt: str) -> str:
+        return os.path.join(self.directory, f'{table}.{fmt}')
+
+    def _write(self, table: str, rows: List[List]):
+        schema = self.TABLES[table]
+        for row in rows:
+            self._writers[table].writerow([_cell(value, kind) for value, (_, kind) in zip(row, schema)])
+
+    def add_graph(self, output: str, status: str, equilibria_info=None, seconds: Optional[float] = None,
+                  attempt: int = 0, error: Optional[str] = None, stages: Optional[Dict] = None):
+        """
+        Дописывает результат графика (status - один из GRAPH_STATUSES).
+
+        stages - время этапов графика (utils.stage_timer.since), этап -> (секунды, вызовы)
+        """
+        if not self.enabled:
+            return
+        rows = equilibrium_rows(output, equilibria_info)
+        error = str(error).splitlines()[0] if error else None
+        if stages is None:
+            stage_seconds = [None] * len(STAGES)
+        else:
+            stage_seconds = [stages[name][0] if name in stages else 0.0 for name in STAGES]
+        self._write('equilibria', rows)
+        self._write('graphs', [[output, status, seconds, attempt, len(rows), error] + stage_seconds])
+        for f in self._files.values():
+            f.flush()
+
+    def close(self) -> List[str]:
+        """
+        Закрывает CSV и сохраняет таблицы в остальных форматах.
+
+        Возвращает:
+        - список записанных файлов
+        """
+        if not self.enabled:
+            return []
+        for f in self._files.values():
+            f.close()
+        self._files = {}
+
+        formats = self.settings.get('formats') or []
+        written = []
+        parquet = True
+        for table, schema in self.TABLES.items():
+            if 'csv' in formats:
+                written.append(self.path(table, 'csv'))
+            if 'npy' not in formats and 'parquet' not in formats:
+                continue
+            data = read_table(self.path(table, 'csv'), schema)
+            if 'npy' in formats:
+                np.save(self.path(table, 'npy'), data, allow_pickle=False)
+                written.append(self.path(table, 'npy'))
+            if 'parquet' in formats and parquet:
+                try:
+                    import pandas as pd
+                    pd.DataFrame(data).to_parquet(self.path(table, 'parquet'), index=False)
+                    written.append(self.path(table, 'parquet'))
+                except ImportError as e:
+                    print(f"Warning: Could not write parquet report (pyarrow or fastparquet required): "
+                          f"{str(e).splitlines()[0]}")
+                    parquet = False
+            if 'csv' not in formats:
+                os.remove(self.path(table, 'csv'))
+        return written
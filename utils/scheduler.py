@@ -0,0 +1,316 @@
+"""
+Планирование параллельного построения графиков по оценке стоимости.
+
+Графики Excel сильно различаются по времени: один жесткий график с длинным
+t_span в конце таблицы может занять единственный процесс, пока остальные
+простаивают. Поэтому задания отправляются от самых дорогих к самым дешевым
+(LPT - longest processing time first), а дешевые объединяются в пачки
+примерно равной стоимости.
+
+Стоимость графика оценивается так (по убыванию приоритета):
+1. Время того же графика (те же признаки и параметры) из прошлых запусков.
+2. Среднее время графиков того же класса (уравнения, тип, метод, t_span,
+   оверлеи - без конкретных значений параметров).
+3. Эвристика по признакам (число кривых, длина t_span, метод решения,
+   признаки жесткости, разрешение оверлеев), умноженная на поправочный
+   коэффициент, откалиброванный по прошлым запускам.
+
+Задания сортируются не все сразу, а окнами (plan_windows): из прогона
+читается SCHEDULE_WINDOW * num_workers * max_chunk заданий, они
+упорядочиваются LPT и отправляются, затем читается следующее окно. Так
+память главного процесса не растет с размером прогона.
+
+Время прошлых запусков хранится в JSON файле (по умолчанию .graph_timings.json);
+для отдельных графиков - не больше MAX_EXACT_TIMINGS последних использованных.
+"""
+
+import hashlib
+import heapq
+import json
+import os
+import time
+from itertools import islice
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+
+DEFAULT_TIMINGS_FILE = '.graph_timings.json'
+
+# Относительная стоимость шага методов решения (LSODA = 1)
+_SOLVER_FACTORS = {
+    'RK23': 1.5, 'RK45': 1.0, 'DOP853': 1.2, 'LSODA': 1.0,
+    'BDF': 2.0, 'Radau': 3.0, 'BATCH_RK4': 0.3, 'BATCH_DOPRI': 0.3
+}
+
+# Сколько прошлых измерений помнить для одного графика/класса (скользящее среднее)
+_HISTORY_WEIGHT = 0.3
+
+# Сколько подписей конкретных графиков хранить в файле времен: при сохранении
+# остаются последние использованные (классы и масштаб обобщают остальные)
+MAX_EXACT_TIMINGS = 10000
+
+# Окно планирования: сколько пачек максимального размера на процесс
+# читается и сортируется за раз
+SCHEDULE_WINDOW = 8
+
+
+def _digest(value) -> str:
+    payload = json.dumps(value, sort_keys=True, default=str, ensure_ascii=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+
+
+def job_features(graph_config: Dict) -> Dict:
+    """
+    Признаки графика для оценки стоимости (по готовой конфигурации графика).
+    """
+    curves = graph_config.get('curves') or []
+    graph_type = graph_config.get('type', 'ode_time')
+
+    t_lengths = []
+    solvers = []
+    rtols = []
+    for curve in curves:
+        t_span = curve.get('t_span') or (curve.get('params') or {}).get('t_span')
+        if t_span and len(t_span) == 2:
+            t_lengths.append(abs(float(t_span[1]) - float(t_span[0])))
+        solvers.append(curve.get('solver_method') or (curve.get('params') or {}).get('default_solver_method') or 'LSODA')
+        rtols.append(float((curve.get('params') or {}).get('rtol', 1e-9)))
+
+    overlay = 0
+    for key, size_key, default in (('vector_field', 'density', 20), ('isoclines', 'resolution', 200)):
+        layer = graph_config.get(key)
+        if layer and layer.get('enabled', False):
+            overlay += int(layer.get(size_key, default)) ** 2
+
+    all_equilibria = graph_config.get('all_equilibria')
+    n_starts = int(all_equilibria.get('n_starts', 256)) if all_equilibria and all_equilibria.get('enabled', True) else 0
+
+    continuation_steps = 0
+    for curve in curves:
+        continuation = curve.get('continuation')
+        if continuation:
+            span = abs(float(continuation['range'][1]) - float(continuation['range'][0]))
+            step = continuation.get('step')
+            continuation_steps += int(span / float(step)) if step else 200
+
+    equations = [curve.get('equations') for curve in curves]
+    return {
+        'type': graph_type,
+        'equations': _digest(equations),
+        'n_curves': len(curves),
+        't_span': max(t_lengths) if t_lengths else 0.0,
+        'solvers': sorted(set(solvers)),
+        # Признак жесткости: пользователь выбрал неявный метод или очень жесткие допуски
+        'stiff': any(s in ('BDF', 'Radau') for s in solvers) or (min(rtols) < 1e-10 if rtols else False),
+        'overlay': overlay,
+        'n_starts': n_starts,
+        'continuation_steps': continuation_steps,
+        'equilibria': any(curve.get('equilibria') for curve in curves) or graph_type == 'phase_portrait',
+        'params': _digest([(curve.get('params'), curve.get('initial_conditions')) for curve in curves])
+    }
+
+
+def heuristic_cost(features: Dict) -> float:
+    """Эвристическая оценка времени графика в секундах (до калибровки)"""
+    solver = max((_SOLVER_FACTORS.get(s, 1.0) for s in features['solvers']), default=1.0)
+    stiff = 3.0 if features['stiff'] else 1.0
+    # Число шагов растет примерно пропорционально t_span (не меньше 100 шагов на кривую)
+    per_curve = 0.02 * max(1.0, features['t_span'] / 10.0) * solver * stiff
+    if features['equilibria']:
+        per_curve *= 2.0
+
+    cost = 0.5  # создание фигуры и сохранение
+    cost += features['n_curves'] * per_curve
+    cost += features['overlay'] * 2e-6
+    cost += features['n_starts'] * 5e-4
+    cost += features['continuation_steps'] * 5e-3
+    return cost
+
+
+class CostModel:
+    """
+    Оценка стоимости графиков с учетом времени прошлых запусков.
+
+    Использование:
+        model = CostModel()
+        cost = model.estimate(features)
+        ...
+        model.record(features, seconds)
+        model.save()
+    """
+
+    def __init__(self, path: Optional[str] = DEFAULT_TIMINGS_FILE):
+        self.path = path
+        self.exact = {}     # подпись графика -> [секунды, время последнего использования]
+        self.classes = {}   # подпись класса -> секунды
+        self.scale = 1.0    # факт / эвристика
+        self._dirty = False
+        self._load()
+
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            # Старый формат: подпись -> секунды (без времени использования)
+            self.exact = {key: value if isinstance(value, list) else [value, 0.0]
+                          for key, value in data.get('exact', {}).items()}
+            self.classes = data.get('classes', {})
+            self.scale = float(data.get('scale', 1.0))
+        except (OSError, ValueError):
+            pass
+
+    def save(self):
+        if not self.path or not self._dirty:
+            return
+        if len(self.exact) > MAX_EXACT_TIMINGS:
+            recent = heapq.nlargest(MAX_EXACT_TIMINGS, self.exact.items(), key=lambda item: item[1][1])
+            self.exact = dict(recent)
+        try:
+            with open(self.path, 'w', encoding='utf-8') as f:
+                json.dump({'exact': self.exact, 'classes': self.classes, 'scale': self.scale}, f)
+            self._dirty = False
+        except OSError as e:
+            print(f"Warning: Could not save graph timings: {e}")
+
+    @staticmethod
+    def signatures(features: Dict) -> Tuple[str, str]:
+        """(подпись конкретного графика, подпись класса графиков)"""
+        class_features = {k: v for k, v in features.items() if k != 'params'}
+        return _digest(features), _digest(class_features)
+
+    def estimate(self, features: Optional[Dict]) -> float:
+        """Оценка времени графика в секундах"""
+        if features is None:
+            return heuristic_cost({'solvers': [], 'stiff': False, 't_span': 0.0, 'equilibria': False,
+                                   'n_curves': 1, 'overlay': 0, 'n_starts': 0,
+                                   'continuation_steps': 0}) * self.scale
+        exact, cls = self.signatures(features)
+        if exact in self.exact:
+            entry = self.exact[exact]
+            entry[1] = time.time()
+            return entry[0]
+        if cls in self.classes:
+            return self.classes[cls]
+        return heuristic_cost(features) * self.scale
+
+    @staticmethod
+    def _smooth(previous: float, seconds: float) -> float:
+        return (1 - _HISTORY_WEIGHT) * previous + _HISTORY_WEIGHT * seconds
+
+    def record(self, features: Optional[Dict], seconds: float):
+        """Запоминает фактическое время графика"""
+        if features is None:
+            return
+        exact, cls = self.signatures(features)
+        previous = self.exact.get(exact)
+        self.exact[exact] = [seconds if previous is None else self._smooth(previous[0], seconds), time.time()]
+        previous = self.classes.get(cls)
+        self.classes[cls] = seconds if previous is None else self._smooth(previous, seconds)
+
+        ratio = seconds / max(heuristic_cost(features), 1e-6)
+        self.scale = self._smooth(self.scale, ratio)
+        self._dirty = True
+
+
+def plan_chunks(jobs: Sequence, costs: Sequence[float], num_workers: int,
+                max_chunk: int = 16) -> List[Tuple[List, float]]:
+    """
+    Порядок отправки заданий: от дорогих к дешевым, дешевые - пачками.
+
+    Пачка набирается, пока ее суммарная стоимость не превысит
+    total / (4 * num_workers) - так в конце работы остаются только мелкие
+    пачки и процессы заканчивают примерно одновременно.
+
+    Возвращает:
+    - список (задания пачки, оценка стоимости пачки)
+    """
+    order = sorted(range(len(jobs)), key=lambda i: -costs[i])
+    target = sum(costs) / max(1, 4 * num_workers)
+
+    chunks = []
+    current, current_cost = [], 0.0
+    for i in order:
+        if current and (current_cost + costs[i] > target or len(current) >= max_chunk):
+            chunks.append((current, current_cost))
+            current, current_cost = [], 0.0
+        current.append(jobs[i])
+        current_cost += costs[i]
+    if current:
+        chunks.append((current, current_cost))
+    return chunks
+
+
+def plan_windows(jobs: Iterable, estimate: Callable, num_workers: int, max_chunk: int = 16,
+                 window: Optional[int] = None) -> Iterator[Tuple[List, float]]:
+    """
+    plan_chunks по окнам: задания читаются по window штук (по умолчанию
+    SCHEDULE_WINDOW * num_workers * max_chunk), каждое окно упорядочивается
+    отдельно. В памяти одновременно только одно окно.
+
+    Параметры:
+    - jobs: итератор заданий (output, rows, ...)
+    - estimate: функция задание -> оценка стоимости графика
+
+    Возвращает:
+    - итератор (задания пачки, оценка стоимости пачки)
+    """
+    window = window or SCHEDULE_WINDOW * max(1, num_workers) * max_chunk
+    iterator = iter(jobs)
+    while True:
+        window_jobs = list(islice(iterator, window))
+        if not window_jobs:
+            return
+        costs = [estimate(job) for job in window_jobs]
+        yield from plan_chunks(window_jobs, costs, num_workers, max_chunk)
+
+
+def simulate_wall_time(chunk_costs: Sequence[float], num_workers: int) -> float:
+    """Оценка общего времени: пачки по очереди достаются первому освободившемуся процессу"""
+    workers = [0.0] * max(1, num_workers)
+    for cost in chunk_costs:
+        heapq.heapreplace(workers, workers[0] + cost)
+    return max(workers)
+
+
+def format_duration(seconds: float) -> str:
+    """Длительность в виде 1:05:03 / 5:03"""
+    seconds = int(round(max(0.0, seconds)))
+    hours, rest = divmod(seconds, 3600)
+    minutes, seconds = divmod(rest, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes}:{seconds:02d}"
+
+
+class ProgressETA:
+    """
+    Оставшееся время по оценкам стоимости: прошедшее время масштабируется
+    отношением оставшейся оценочной стоимости к выполненной.
+    """
+
+    def __init__(self, total_cost: float, clock):
+        self.total_cost = total_cost
+        self.done_cost = 0.0
+        self.clock = clock
+        self.start = clock()
+        self._read = 0
+        self._read_cost = 0.0
+        self._extrapolated = 0.0
+
+    def extrapolate(self, cost: float, total_jobs: int):
+        """
+        Добавляет оценку очередного задания, когда прогон читается по частям
+        (plan_windows): к уже известным оценкам прибавляется средняя оценка
+        на каждое еще не прочитанное из total_jobs заданий.
+        """
+        self.total_cost -= self._extrapolated
+        self._read += 1
+        self._read_cost += cost
+        self._extrapolated = self._read_cost / self._read * max(0, total_jobs - self._read)
+        self.total_cost += cost + self._extrapolated
+
+    def update(self, cost: float) -> Optional[float]:
+        self.done_cost += cost
+        if self.done_cost <= 0:
+            return None
+        elapsed = self.clock() - self.start
+        return elapsed * max(0.0, self.total_cost - self.done_cost) / self.done_cost
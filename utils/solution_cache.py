@@ -0,0 +1,238 @@
+"""
+Кэш решений ОДУ на диске, адресуемый по содержимому задачи.
+
+Одна и та же задача (уравнения, параметры, начальные условия, t_span, метод,
+rtol, atol, ...) часто решается несколько раз: на ode_time и phase_portrait
+графиках одной книги Excel и при повторных запусках после правки стилей.
+Ключ кэша - SHA-256 от канонического JSON описания задачи и версии кода
+решения (solver_version: исходники решателей и равновесий, версии numpy,
+scipy, sympy), значение - массивы NumPy в файле .npz (без текста и без
+потери точности). После исправления решателя или обновления библиотек
+старые записи не используются и со временем вытесняются.
+
+Размер кэша ограничен: при превышении max_bytes удаляются записи, к которым
+дольше всего не обращались (LRU по времени модификации файла, которое
+обновляется при каждом попадании).
+
+Использование:
+    cache = get_solution_cache()
+    arrays = cache.get(spec)
+    if arrays is None:
+        ...
+        cache.put(spec, t=t, y=y)
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import numpy as np
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Optional
+
+
+DEFAULT_CACHE_DIR = '.solution_cache'
+DEFAULT_CACHE_MAX_MB = 512
+
+# Версия формата ключа: меняется, если меняется смысл сохраненных решений
+CACHE_FORMAT_VERSION = 1
+
+# Код, от которого зависят сохраненные решения и равновесия (относительно корня проекта)
+_SOLVER_PATHS = ('models', 'core/ode_plotter.py', 'utils/equilibrium_finder.py', 'utils/batch_integrators.py',
+                 'utils/dense_trajectory.py', 'utils/continuation.py', 'utils/solution_cache.py')
+_SOLVER_LIBRARIES = ('numpy', 'scipy', 'sympy')
+
+
+def _canonical(value):
+    """Приводит описание задачи к JSON-совместимому виду с однозначным представлением"""
+    if isinstance(value, dict):
+        return {str(k): _canonical(v) for k, v in sorted(value.items(), key=lambda item: str(item[0]))}
+    if isinstance(value, (list, tuple)):
+        return [_canonical(v) for v in value]
+    if isinstance(value, np.ndarray):
+        return _canonical(value.tolist())
+    if isinstance(value, (bool, np.bool_)):
+        return bool(value)
+    if isinstance(value, (int, float, np.integer, np.floating)):
+        # repr float однозначен (round-trip), 1 и 1.0 дают один ключ
+        return repr(float(value))
+    if value is None:
+        return None
+    return str(value)
+
+
+@lru_cache(maxsize=1)
+def solver_version() -> str:
+    """Хэш кода решения и версий библиотек (считается один раз на процесс)"""
+    # Импорт здесь: utils.build_manifest сам импортирует этот модуль
+    from utils.build_manifest import code_version
+    return code_version(paths=_SOLVER_PATHS, libraries=_SOLVER_LIBRARIES)
+
+
+def problem_key(spec: Dict) -> str:
+    """SHA-256 ключ задачи по ее каноническому описанию и версии кода решения"""
+    payload = json.dumps({'version': CACHE_FORMAT_VERSION, 'code': solver_version(), 'spec': _canonical(spec)},
+                         sort_keys=True, separators=(',', ':'), ensure_ascii=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class SolutionCache:
+    """
+    Ограниченный по размеру LRU кэш решений на диске.
+
+    Записи раскладываются по подкаталогам по первым двум символам ключа.
+    Запись атомарна (временный файл + os.replace), поэтому кэш безопасно
+    использовать из нескольких процессов одновременно.
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, max_mb: float = DEFAULT_CACHE_MAX_MB,
+                 enabled: bool = True):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.enabled = enabled
+
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        # Оценка размера кэша: считается при первой записи, дальше ведется инкрементально
+        self._size = None
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f'{key}.npz'
+
+    def get(self, spec: Dict) -> Optional[Dict[str, np.ndarray]]:
+        """Возвращает сохраненные массивы задачи или None (промах)"""
+        if not self.enabled:
+            return None
+
+        path = self._path(problem_key(spec))
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                arrays = {name: data[name] for name in data.files}
+        except (OSError, ValueError, KeyError):
+            self.misses += 1
+            return None
+
+        # Попадание: обновляем время обращения для LRU
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        self.hits += 1
+        return arrays
+
+    def put(self, spec: Dict, **arrays):
+        """Сохраняет массивы решения задачи"""
+        if not self.enabled:
+            return
+
+        path = self._path(problem_key(spec))
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_name = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                np.savez(f, **arrays)
+            os.replace(tmp_name, path)
+        except OSError as e:
+            print(f"Warning: Could not write solution cache: {e}")
+            return
+
+        self.stores += 1
+        if self._size is None:
+            self._size = self._scan_size()
+        else:
+            self._size += path.stat().st_size
+        if self._size > self.max_bytes:
+            self._evict()
+
+    def _entries(self):
+        return [p for p in self.cache_dir.glob('*/*.npz') if p.is_file()]
+
+    def _scan_size(self) -> int:
+        return sum(p.stat().st_size for p in self._entries())
+
+    def _evict(self):
+        """Удаляет самые давно использованные записи, пока кэш не станет меньше 90% лимита"""
+        entries = []
+        for p in self._entries():
+            try:
+                stat = p.stat()
+                entries.append((stat.st_mtime, stat.st_size, p))
+            except OSError:
+                continue
+        entries.sort()
+
+        size = sum(entry[1] for entry in entries)
+        target = self.max_bytes * 0.9
+        for _, entry_size, p in entries:
+            if size <= target:
+                break
+            try:
+                p.unlink()
+                size -= entry_size
+                self.evictions += 1
+            except OSError:
+                continue
+        self._size = size
+
+    def clear(self):
+        """Удаляет все записи кэша"""
+        for p in self._entries():
+            try:
+                p.unlink()
+            except OSError:
+                pass
+        self._size = 0
+
+    def stats(self) -> Dict[str, int]:
+        return {'hits': self.hits, 'misses': self.misses, 'stores': self.stores, 'evictions': self.evictions}
+
+    def reset_stats(self):
+        self.hits = self.misses = self.stores = self.evictions = 0
+
+
+_cache = None
+_cache_config = {}
+
+
+def configure_solution_cache(config=None):
+    """
+    Настраивает кэш процесса по блоку solution_cache из YAML.
+
+    config: False (выключить), True/None (по умолчанию) или
+            {enabled: bool, dir: str, max_mb: float}
+    """
+    global _cache, _cache_config
+    if config is None or config is True:
+        config = {}
+    elif config is False:
+        config = {'enabled': False}
+    _cache_config = dict(config)
+    _cache = SolutionCache(
+        cache_dir=config.get('dir', DEFAULT_CACHE_DIR),
+        max_mb=float(config.get('max_mb', DEFAULT_CACHE_MAX_MB)),
+        enabled=bool(config.get('enabled', True))
+    )
+    return _cache
+
+
+def get_solution_cache() -> SolutionCache:
+    """Кэш решений текущего процесса (создается с настройками по умолчанию)"""
+    if _cache is None:
+        configure_solution_cache(_cache_config)
+    return _cache
+
+
+def solution_cache_config() -> Dict:
+    """Текущие настройки кэша (для передачи в дочерние процессы)"""
+    return dict(_cache_config)
+
+
+def format_cache_report(stats: Dict[str, int]) -> str:
+    """Строка отчета о работе кэша"""
+    total = stats['hits'] + stats['misses']
+    rate = 100.0 * stats['hits'] / total if total else 0.0
+    return (f"Кэш решений: попаданий {stats['hits']}, промахов {stats['misses']} ({rate:.0f}% попаданий), "
+            f"записано {stats['stores']}, вытеснено {stats['evictions']}")
@@ -0,0 +1,149 @@
+"""
+Замеры времени построения графиков по этапам.
+
+Этапы (STAGES):
+- parse - разбор LaTeX (parse_latex);
+- compile - компиляция правых частей и матрицы Якоби (lambdify, ядра CSE);
+- solve - интегрирование (solve_ivp, пакетные методы);
+- equilibria - поиск равновесий (EquilibriumFinder) и продолжение по параметру;
+- overlays - векторное поле и изоклины;
+- render - отрисовка фигуры (savefig в буферы в памяти);
+- save - запись файлов графика.
+
+Время этапа исключающее: пока внутри этапа идет другой этап (например,
+компиляция матрицы Якоби при поиске равновесий), время идет вложенному.
+Поэтому этапы не пересекаются и их сумма не больше времени построения.
+Повторный вход в тот же этап (рекурсия) не считается отдельным вызовом.
+
+Счетчики свои в каждом процессе и в каждом потоке (сессии Streamlit в
+app.py строят графики в разных потоках и не портят замеры друг друга).
+Этапы графика - разность snapshot() до и после построения (since): процессы
+пула возвращают ее вместе со временем графика, а главный процесс
+складывает графики прогона в StageSummary.
+
+Использование:
+    with stage('solve'):
+        sol = solve_ivp(...)
+
+    before = snapshot()
+    ...                              # построение графика
+    stages = since(before)           # {'solve': (0.8, 3), ...}
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+from typing import Dict, Optional, Tuple
+
+
+STAGES = ('parse', 'compile', 'solve', 'equilibria', 'overlays', 'render', 'save')
+
+# Счетчики потока: seconds, calls и открытые этапы stack ([имя, начало текущего отрезка])
+_local = threading.local()
+
+
+def _state():
+    if not hasattr(_local, 'stack'):
+        _local.seconds = dict.fromkeys(STAGES, 0.0)
+        _local.calls = dict.fromkeys(STAGES, 0)
+        _local.stack = []
+    return _local.seconds, _local.calls, _local.stack
+
+
+@contextmanager
+def stage(name: str):
+    """Относит время блока к этапу name (исключающее время, см. описание модуля)"""
+    seconds, calls, stack = _state()
+    if name not in seconds:
+        raise ValueError(f"Unknown stage: {name}. Valid stages: {list(STAGES)}")
+    now = time.perf_counter()
+    if stack:
+        # Внешний этап стоит на паузе, пока идет вложенный
+        seconds[stack[-1][0]] += now - stack[-1][1]
+    entry = [name, now]
+    stack.append(entry)
+    try:
+        yield
+    finally:
+        now = time.perf_counter()
+        stack.pop()
+        seconds[name] += now - entry[1]
+        if stack:
+            stack[-1][1] = now
+        if not stack or stack[-1][0] != name:
+            calls[name] += 1
+
+
+def timed(name: str):
+    """Декоратор: весь вызов функции относится к этапу name"""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with stage(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def snapshot() -> Dict[str, Tuple[float, int]]:
+    """Текущие счетчики потока: этап -> (секунды, вызовы)"""
+    seconds, calls, _ = _state()
+    return {name: (seconds[name], calls[name]) for name in STAGES}
+
+
+def since(before: Dict[str, Tuple[float, int]]) -> Dict[str, Tuple[float, int]]:
+    """Этапы после snapshot() before: этап -> (секунды, вызовы), только этапы с вызовами"""
+    seconds, calls, _ = _state()
+    stages = {}
+    for name in STAGES:
+        count = calls[name] - before[name][1]
+        if count:
+            stages[name] = (seconds[name] - before[name][0], count)
+    return stages
+
+
+class StageSummary:
+    """
+    Этапы всех графиков прогона: суммы по этапам, число вызовов и самый
+    долгий по каждому этапу график.
+    """
+
+    def __init__(self):
+        self.seconds = dict.fromkeys(STAGES, 0.0)
+        self.calls = dict.fromkeys(STAGES, 0)
+        self.slowest = {}
+        self.graphs = 0
+        self.graph_seconds = 0.0
+
+    def add(self, output: str, stages: Optional[Dict], seconds: float):
+        """Добавляет график: stages - результат since, seconds - полное время построения"""
+        self.graphs += 1
+        self.graph_seconds += seconds
+        for name, (stage_seconds, calls) in (stages or {}).items():
+            self.seconds[name] += stage_seconds
+            self.calls[name] += calls
+            if stage_seconds > self.slowest.get(name, (0.0, None))[0]:
+                self.slowest[name] = (stage_seconds, output)
+
+    def format(self) -> str:
+        """Таблица этапов для итогового отчета (пустая строка, если графиков не было)"""
+        if not self.graphs:
+            return ''
+        total = self.graph_seconds
+        other = max(0.0, total - sum(self.seconds.values()))
+
+        def share(value):
+            return f"{100.0 * value / total:5.1f}%" if total > 0 else '    -'
+
+        lines = [f"Этапы построения (графиков: {self.graphs}, суммарно по процессам {total:.2f} с):",
+                 f"  {'этап':<11} {'всего, с':>9} {'доля':>6} {'вызовов':>8} {'на график, с':>13}  дольше всего"]
+        for name in STAGES:
+            if not self.calls[name]:
+                continue
+            seconds, output = self.slowest.get(name, (0.0, ''))
+            lines.append(f"  {name:<11} {self.seconds[name]:9.2f} {share(self.seconds[name]):>6} "
+                         f"{self.calls[name]:8d} {self.seconds[name] / self.graphs:13.3f}  "
+                         f"{output} ({seconds:.2f} с)")
+        lines.append(f"  {'прочее':<11} {other:9.2f} {share(other):>6} {'':>8} {other / self.graphs:13.3f}")
+        return '\n'.join(lines)
@@ -0,0 +1,250 @@
+"""
+Параметрические прогоны (sweep): развертывание диапазонов параметров
+и начальных условий в задания на построение графиков.
+
+Источники:
+1. Блок sweep в YAML (type: from_excel):
+
+    sweep:
+      mode: product            # product (декартово произведение) или zip
+      params:
+        h: {start: 0.01, stop: 0.1, num: 100}
+        alpha: [4, 5]
+      initial_conditions:
+        s0: {start: 100, stop: 400, step: 100}
+      output: "sweep_h{h:.3f}.svg"
+
+2. Ячейки Excel со значениями вида
+    linspace(0.01, 0.1, 100)   - num точек от start до stop
+    arange(100, 400, 100)      - с шагом step (stop включается)
+    [4, 5, 6]                  - список значений
+   Режим для строки - колонка sweep_mode (product по умолчанию).
+   Разворачиваются только числовые колонки (параметры системы, <переменная>0,
+   t_start/t_end, числовые настройки). Текстовые колонки (title, label_*,
+   color_*, linestyle_*, подписи и стили равновесий, plot_variables,
+   decimation, ...) остаются как есть: подпись [S] - это подпись, а не прогон.
+
+Каждая точка прогона - это обычная строка Excel (словарь колонка -> значение),
+дальше она обрабатывается ConfigMerger как любая другая строка. Колонка output
+может быть шаблоном str.format с именами колонок и {index}; точки с одинаковым
+output, идущие подряд, попадают на один график (разными кривыми).
+
+Развертывание ленивое: строки и задания создаются генераторами по одной,
+поэтому прогон на 10 000 точек не требует ни таблицы на 10 000 строк,
+ни хранения всех конфигураций в памяти.
+"""
+
+import itertools
+import re
+import numpy as np
+from typing import Dict, Iterator, List, Tuple, Any
+
+
+SWEEP_MODES = ('product', 'zip')
+
+# linspace(a, b, n) / arange(a, b, step) / [v1, v2, ...]
+_CELL_FUNCTION = re.compile(r'^\s*(linspace|arange|logspace)\s*\((.*)\)\s*$', re.IGNORECASE)
+_CELL_LIST = re.compile(r'^\s*\[(.*)\]\s*$')
+
+
+def parse_sweep_values(spec) -> List[Any]:
+    """
+    Преобразует описание оси прогона в список значений.
+
+    Поддерживает:
+    - список [v1, v2, ...]
+    - {start, stop, num} - равномерно (как np.linspace), log: true - логарифмически
+    - {start, stop, step} - с шагом, stop включается
+    - {values: [...]}
+    - строку в синтаксисе ячейки Excel (linspace(...), arange(...), [...])
+    - скаляр (одно значение)
+    """
+    if isinstance(spec, str):
+        parsed = parse_sweep_cell(spec)
+        return parsed if parsed is not None else [spec]
+
+    if isinstance(spec, dict):
+        if 'values' in spec:
+            return list(spec['values'])
+        start, stop = float(spec['start']), float(spec['stop'])
+        if 'num' in spec:
+            num = int(spec['num'])
+            if spec.get('log', False):
+                values = np.geomspace(start, stop, num)
+            else:
+                values = np.linspace(start, stop, num)
+        elif 'step' in spec:
+            step = float(spec['step'])
+            # Небольшой запас, чтобы stop включался несмотря на округление
+            values = np.arange(start, stop + step * 0.5, step)
+        else:
+            raise ValueError(f"Sweep range needs 'num' or 'step': {spec}")
+        return [float(v) for v in values]
+
+    if isinstance(spec, (list, tuple, np.ndarray)):
+        return list(spec)
+
+    return [spec]
+
+
+def parse_sweep_cell(value) -> List[Any]:
+    """
+    Разбирает ячейку Excel с синтаксисом прогона.
+
+    Возвращает список значений или None, если ячейка - обычное значение.
+    """
+    if not isinstance(value, str):
+        return None
+
+    match = _CELL_FUNCTION.match(value)
+    if match:
+        name = match.group(1).lower()
+        args = [float(arg) for arg in match.group(2).split(',')]
+        if len(args) != 3:
+            raise ValueError(f"Sweep cell '{value}' needs 3 arguments: start, stop, num/step")
+        if name == 'arange':
+            return parse_sweep_values({'start': args[0], 'stop': args[1], 'step': args[2]})
+        return parse_sweep_values({'start': args[0], 'stop': args[1], 'num': args[2],
+                                   'log': name == 'logspace'})
+
+    match = _CELL_LIST.match(value)
+    if match:
+        return [_parse_scalar(item) for item in match.group(1).split(',') if item.strip()]
+
+    return None
+
+
+def _parse_scalar(text):
+    text = text.strip().strip('"\'')
+    try:
+        return float(text)
+    except ValueError:
+        return text
+
+
+def _combine(axes: Dict[str, List[Any]], mode: str) -> Iterator[Dict[str, Any]]:
+    """Перебирает точки прогона: декартово произведение или попарно (zip)"""
+    if mode not in SWEEP_MODES:
+        raise ValueError(f"Unknown sweep mode: {mode}. Valid modes: {list(SWEEP_MODES)}")
+
+    names = list(axes.keys())
+    if not names:
+        yield {}
+        return
+
+    if mode == 'zip':
+        lengths = {name: len(values) for name, values in axes.items()}
+        if len(set(lengths.values())) > 1:
+            raise ValueError(f"Sweep mode 'zip' needs axes of equal length: {lengths}")
+        combinations = zip(*axes.values())
+    else:
+        combinations = itertools.product(*axes.values())
+
+    for combination in combinations:
+        yield dict(zip(names, combination))
+
+
+def _sweep_axes(sweep: Dict) -> Dict[str, List[Any]]:
+    """Оси прогона из YAML блока sweep (params + initial_conditions)"""
+    axes = {}
+    for section in ('params', 'initial_conditions'):
+        for name, spec in (sweep.get(section) or {}).items():
+            axes[str(name)] = parse_sweep_values(spec)
+    return axes
+
+
+# Текстовые колонки Excel: их значения не разворачиваются в прогон
+_TEXT_COLUMNS = frozenset((
+    'output', 'graph_type', 'sweep_mode', 'title', 'plot_variables', 'decimation', 'solver_method',
+    'show_arrows', 'continuation_parameter', 'continuation_method', 'bifurcation_variable',
+    'equilibrium_method', 'equilibrium_refine',
+))
+_TEXT_PREFIXES = ('equation_', 'label_', 'color_', 'linestyle_', 'xticks', 'yticks')
+_TEXT_SUFFIXES = ('_label', '_color', '_linestyle', '_show')
+
+
+def _is_sweepable(key) -> bool:
+    """Может ли колонка разворачиваться в прогон (только числовые колонки)"""
+    key = str(key)
+    return key not in _TEXT_COLUMNS and not key.startswith(_TEXT_PREFIXES) and not key.endswith(_TEXT_SUFFIXES)
+
+
+def _format_output(template, row: Dict, index: int) -> str:
+    """Подставляет значения колонок в шаблон output (если это шаблон)"""
+    template = str(template)
+    if '{' not in template:
+        return template
+    try:
+        return template.format(index=index, **row)
+    except (KeyError, IndexError, ValueError):
+        return template
+
+
+def expand_row(row: Dict, sweep: Dict = None, start_index: int = 0) -> Iterator[Dict]:
+    """
+    Разворачивает одну строку Excel в строки для всех точек прогона.
+
+    Оси прогона - ячейки строки с синтаксисом прогона плюс оси YAML блока sweep
+    (ячейки строки перекрывают одноименные оси YAML). Строка без прогона
+    возвращается как есть.
+
+    Синтаксис прогона распознается только в числовых колонках (_is_sweepable):
+    {'output': 'g.svg', 'label_s': '[S]', 'title': '[A, B]'} - один график
+    с подписью '[S]' и заголовком '[A, B]', а не два графика.
+    """
+    sweep = sweep or {}
+
+    axes = _sweep_axes(sweep)
+    for key, value in row.items():
+        if not _is_sweepable(key):
+            continue
+        values = parse_sweep_cell(value)
+        if values is not None:
+            axes[key] = values
+
+    if not axes:
+        yield row
+        return
+
+    mode = str(row.get('sweep_mode') or sweep.get('mode', 'product')).strip().lower()
+    template = sweep.get('output') or row.get('output')
+
+    for index, point in enumerate(_combine(axes, mode), start_index):
+        expanded = dict(row)
+        # numpy скаляры -> float (дешевле в pickle, нормально печатаются)
+        expanded.update({k: (float(v) if isinstance(v, np.generic) else v) for k, v in point.items()})
+        expanded['output'] = _format_output(template, expanded, index)
+        expanded['__sweep_index__'] = index
+        yield expanded
+
+
+def iter_graph_jobs(grouped_rows: Dict[str, List[Dict]], sweep: Dict = None) -> Iterator[Tuple[str, List[Dict]]]:
+    """
+    Генератор заданий (output, rows) из сгруппированных строк Excel с учетом прогона.
+
+    Подряд идущие точки с одинаковым output объединяются в один график.
+    Группы строк без прогона проходят без изменений.
+    """
+    for output, rows in grouped_rows.items():
+        index = 0
+        expanded_rows = []
+        for row in rows:
+            for expanded in expand_row(row, sweep, index):
+                expanded_rows.append(expanded)
+                index += 1
+                # Не держим точки в памяти: выдаем график, как только output сменился
+                if len(expanded_rows) > 1 and expanded_rows[-1]['output'] != expanded_rows[-2]['output']:
+                    last = expanded_rows.pop()
+                    yield expanded_rows[0]['output'], expanded_rows
+                    expanded_rows = [last]
+        if expanded_rows:
+            yield expanded_rows[0]['output'], expanded_rows
+
+
+def has_sweep(grouped_rows: Dict[str, List[Dict]], sweep: Dict = None) -> bool:
+    """Есть ли прогон в YAML или хотя бы в одной ячейке Excel"""
+    if sweep:
+        return True
+    return any(parse_sweep_cell(value) is not None
+               for rows in grouped_rows.values() for row in rows
+               for key, value in row.items() if _is_sweepable(key))
@@ -1,3 +1,11 @@
+import os
+
+from utils.batch_integrators import BATCH_SOLVER_METHODS
+
+# Неявные методы solve_ivp, которые принимают аналитическую матрицу Якоби (jac=)
+IMPLICIT_SOLVER_METHODS = ('Radau', 'BDF', 'LSODA')
+
+
 def validate_config(config):
     # Проверка обязательного ключа 'type'
     if 'type' not in config:
@@ -6,14 +14,27 @@ def validate_config(config):
     plot_type = config['type']
 
     # Проверка допустимых типов
-    valid_types = ['function', 'ode_time', 'phase_portrait', 'from_excel']
+    valid_types = ['function', 'ode_time', 'phase_portrait', 'bifurcation', 'from_excel']
     if plot_type not in valid_types:
         raise ValueError(f"Invalid type: {plot_type}. Valid types: {valid_types}")
 
+    # Дополнительные форматы файлов графика (svg, pdf, png)
+    valid_formats = ['svg', 'pdf', 'png']
+    for fmt in config.get('formats') or []:
+        if str(fmt).lower() not in valid_formats:
+            raise ValueError(f"Invalid format: {fmt}. Valid formats: {valid_formats}")
+
     # Для from_excel - особая валидация
     if plot_type == 'from_excel':
-        if 'excel_file' not in config:
-            raise ValueError("Missing required key 'excel_file' for type: from_excel")
+        if 'replay_plan' in config:
+            # Задания и base_config берутся из сохраненного плана (--replay).
+            # План нельзя сохранять в тот же файл: он перезаписался бы во время чтения
+            save_plan = config.get('save_plan')
+            if save_plan and os.path.realpath(save_plan) == os.path.realpath(config['replay_plan']):
+                raise ValueError(f"save_plan and replay_plan must be different files: {save_plan}")
+            return True
+        if 'excel_file' not in config and 'sweep' not in config:
+            raise ValueError("Missing required key 'excel_file' (or 'sweep') for type: from_excel")
         if 'base_config' not in config:
             raise ValueError("Missing required key 'base_config' for type: from_excel")
         # Для from_excel curves и output не требуются, они из Excel
@@ -26,7 +47,8 @@ def validate_config(config):
             raise ValueError(f"Missing required key: {key}")
 
     # Список допустимых методов решения ОДУ
-    valid_solver_methods = ['RK23', 'RK45', 'DOP853', 'Radau', 'BDF', 'LSODA']
+    # (методы SciPy + пакетные NumPy интеграторы из utils.batch_integrators)
+    valid_solver_methods = ['RK23', 'RK45', 'DOP853', 'Radau', 'BDF', 'LSODA'] + list(BATCH_SOLVER_METHODS)
 
     for curve in config['curves']:
         if plot_type == 'function':
@@ -47,10 +69,21 @@ def validate_config(config):
             if 't_span' not in curve:
                 raise ValueError("Each ODE curve must have 't_span'")
 
-            # Проверка метода решения ОДУ, если указан
-            if 'solver_method' in curve:
-                if curve['solver_method'] not in valid_solver_methods:
-                    raise ValueError(f"Invalid solver_method: {curve['solver_method']}. Valid methods: {valid_solver_methods}")
+        elif plot_type == 'bifurcation':
+            if 'equations' not in curve:
+                raise ValueError("Each bifurcation curve must have 'equations'")
+            if 'variable_names' not in curve:
+                raise ValueError("Each bifurcation curve must have 'variable_names'")
+            if 'initial_conditions' not in curve:
+                raise ValueError("Each bifurcation curve must have 'initial_conditions'")
+            continuation = curve.get('continuation')
+            if not continuation or 'parameter' not in continuation or 'range' not in continuation:
+                raise ValueError("Each bifurcation curve must have 'continuation' with 'parameter' and 'range'")
+
+        # Проверка метода решения ОДУ, если указан
+        if plot_type != 'function' and 'solver_method' in curve:
+            if curve['solver_method'] not in valid_solver_methods:
+                raise ValueError(f"Invalid solver_method: {curve['solver_method']}. Valid methods: {valid_solver_methods}")
  
     return True
 
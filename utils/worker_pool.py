@@ -0,0 +1,156 @@
+"""
+Долгоживущий пул процессов для параллельного построения графиков.
+
+Пул создается один раз и переиспользуется между вызовами plot_from_excel
+(например, в app.py или при нескольких конфигурациях подряд). Инициализатор
+каждого процесса один раз:
+- включает backend Agg и импортирует matplotlib, sympy, scipy;
+- восстанавливает params_global из словаря;
+- настраивает кэш решений.
+
+Поэтому задания несут только свои строки Excel, а не params_global целиком.
+
+Процессы сообщают о начале каждого графика через очередь прогресса
+(report_progress): главный процесс знает, какой процесс строит какой график,
+и может принудительно завершить зависший процесс (kill_worker) - пул сам
+запускает вместо него новый.
+
+Настройки по умолчанию зависят от числа ядер:
+- num_workers = cpu_count - 1 (одно ядро остается главному процессу,
+  который раздает задания и пишет отчет), но не меньше 1;
+- maxtasksperchild = 4 * cpu_count пачек: процесс периодически
+  перезапускается, и память, которую держат matplotlib и кэши sympy,
+  не растет бесконечно.
+"""
+
+import atexit
+import os
+import pickle
+import signal
+import sys
+import time
+from multiprocessing import Pool, Queue, cpu_count
+from typing import Dict, Optional
+
+
+# Жесткий лимит времени на один график, секунд
+DEFAULT_TASK_TIMEOUT = 120
+
+# Цепочка попыток для графика, превысившего лимит: настройки решателя,
+# которые подставляются во все кривые графика. Первая попытка - как в конфигурации
+DEFAULT_FALLBACK_CHAIN = [
+    {},
+    {'solver_method': 'BDF'},                                   # неявный метод с аналитическим Якобианом
+    {'solver_method': 'Radau', 'rtol': 1e-6, 'atol': 1e-9},     # более грубые допуски
+]
+
+_pool = None
+_pool_key = None
+_progress_queue = None
+
+
+def default_num_workers() -> int:
+    """Число процессов по умолчанию: все ядра, кроме одного"""
+    return max(1, cpu_count() - 1)
+
+
+def default_maxtasksperchild() -> int:
+    """Сколько пачек заданий процесс выполняет до перезапуска"""
+    return 4 * cpu_count()
+
+
+def _init_worker(params_global_dict: Dict, cache_config: Dict, progress_queue=None):
+    """Инициализатор процесса пула: тяжелые модули и глобальные параметры загружаются один раз"""
+    global _progress_queue
+    _progress_queue = progress_queue
+
+    # КРИТИЧНО для Windows: принудительно устанавливаем non-GUI backend
+    # ДО любых импортов, которые могут использовать matplotlib
+    import matplotlib
+    matplotlib.use('Agg', force=True)
+    import matplotlib.pyplot  # noqa: F401
+    import sympy  # noqa: F401
+    import scipy.integrate  # noqa: F401
+
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+    # Восстанавливаем params_global из словаря родительского процесса
+    import params_global
+    for key, value in params_global_dict.items():
+        setattr(params_global, key, value)
+
+    from utils.solution_cache import configure_solution_cache
+    configure_solution_cache(cache_config)
+
+
+def _picklable_params(params_global_dict: Dict) -> Dict:
+    """Только простые значения params_global (без модулей, функций и служебных имен)"""
+    params = {}
+    for key, value in params_global_dict.items():
+        if key.startswith('__'):
+            continue
+        try:
+            pickle.dumps(value)
+        except Exception:
+            continue
+        params[key] = value
+    return params
+
+
+def get_worker_pool(params_global_dict: Dict, cache_config: Dict, num_workers: Optional[int] = None,
+                    maxtasksperchild: Optional[int] = None):
+    """
+    Возвращает пул процессов, создавая его при первом вызове.
+
+    Если изменились настройки (число процессов, params_global, кэш решений),
+    старый пул закрывается и создается новый.
+    """
+    global _pool, _pool_key, _progress_queue
+
+    num_workers = num_workers or default_num_workers()
+    maxtasksperchild = maxtasksperchild or default_maxtasksperchild()
+    initargs = (_picklable_params(params_global_dict), dict(cache_config or {}))
+    key = (num_workers, maxtasksperchild, pickle.dumps(initargs))
+
+    if _pool is not None and _pool_key == key:
+        return _pool
+
+    shutdown_worker_pool()
+    _progress_queue = Queue()
+    _pool = Pool(num_workers, initializer=_init_worker, initargs=initargs + (_progress_queue,),
+                 maxtasksperchild=maxtasksperchild)
+    _pool_key = key
+    return _pool
+
+
+def get_progress_queue():
+    """Очередь сообщений (chunk_id, индекс графика в пачке, pid, время) от процессов пула"""
+    return _progress_queue
+
+
+def report_progress(chunk_id, index: int):
+    """Вызывается в процессе пула перед началом очередного графика пачки"""
+    if _progress_queue is not None:
+        _progress_queue.put((chunk_id, index, os.getpid(), time.time()))
+
+
+def kill_worker(pid: int):
+    """Принудительно завершает процесс пула (пул запустит вместо него новый)"""
+    try:
+        os.kill(pid, getattr(signal, 'SIGKILL', signal.SIGTERM))
+    except OSError:
+        pass
+
+
+def shutdown_worker_pool():
+    """Закрывает пул (вызывается автоматически при выходе)"""
+    global _pool, _pool_key, _progress_queue
+    if _pool is not None:
+        _pool.terminate()
+        _pool.join()
+    _pool = None
+    _pool_key = None
+    _progress_queue = None
+
+
+atexit.register(shutdown_worker_pool)
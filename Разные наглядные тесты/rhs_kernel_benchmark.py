@@ -0,0 +1,37 @@
+# Сравнение скорости вычисления правых частей: старый путь (lambdify -> список -> np.array)
+# и слитое CSE-ядро, которое пишет результат в заранее выделенный буфер.
+# Запуск из корня проекта: python "Разные наглядные тесты/rhs_kernel_benchmark.py"
+import os
+import sys
+import timeit
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.config_loader import load_config
+from models.ode_system import get_ode_system
+
+config_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'configs', 'demo_lotka.yaml')
+curve = load_config(config_path)['curves'][0]
+
+system = get_ode_system(curve['equations'], curve['variable_names'])
+param_values = system.param_vector(curve['params'])
+y = np.array(curve['initial_conditions'], dtype=float)
+
+old_func = system.compile()
+kernel = system.compile_kernel()
+out = np.empty(len(y))
+
+n = 200000
+t_old = timeit.timeit(lambda: np.array(old_func(0.0, *y, *param_values)), number=n)
+t_new = timeit.timeit(lambda: kernel(0.0, y, param_values, out), number=n)
+t_new_alloc = timeit.timeit(lambda: system.evaluate(0.0, y, param_values), number=n)
+
+assert np.allclose(np.array(old_func(0.0, *y, *param_values)), kernel(0.0, y, param_values, out))
+
+print(f'Система: {config_path}')
+print(f'lambdify + np.array:        {t_old / n * 1e6:.2f} мкс/вызов')
+print(f'CSE-ядро, общий буфер:      {t_new / n * 1e6:.2f} мкс/вызов')
+print(f'CSE-ядро, новый буфер:      {t_new_alloc / n * 1e6:.2f} мкс/вызов')
+print(f'Ускорение (общий буфер):    {t_old / t_new:.2f}x')